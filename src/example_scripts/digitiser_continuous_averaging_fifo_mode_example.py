@@ -53,7 +53,7 @@ def continuous_averaging_multi_fifo_example(
         sample_rate_in_hz=40000000,
         acquisition_length_in_samples=acquisition_length,
         pre_trigger_length_in_samples=0,
-        timeout_in_ms=1000,
+        timeout_in_ms=5000,  # longer than the 1 s between the frames of the mock source
         enabled_channels=[0],
         vertical_ranges_in_mv=[200],
         vertical_offsets_in_percent=[0],
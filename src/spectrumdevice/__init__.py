@@ -18,6 +18,10 @@ for controlling devices:
 | `SpectrumAWGAnalogChannel`       | Controlling analog channels of an AWG                   |
 | `SpectrumAWGIOLine`              | Controlling multipurpose IO lines of an AWG             |
 | `PulseGenerator`                 | Controlling pulse generators belonging to IO lines      |
+| `AcquisitionEngine`              | Reading FIFO acquisitions into a queue on a thread      |
+| `Recorder`                       | Streaming raw FIFO acquisitions directly to disk        |
+| `RecordingReader`                | Random access to the frames of a recording              |
+| `SoftwareAverager`               | Averaging acquisitions in software with integer sums    |
 
 ### Mock Classes
 `spectrumdevice` also includes mock classes for testing software without drivers installed or hardware connected:
@@ -65,6 +69,7 @@ from .measurement import Measurement
 from .devices.digitiser.digitiser_card import SpectrumDigitiserCard
 from .devices.digitiser.digitiser_channel import SpectrumDigitiserAnalogChannel, SpectrumDigitiserIOLine
 from .devices.digitiser.digitiser_star_hub import SpectrumDigitiserStarHub
+from .devices.digitiser.zero_copy_frame import ZeroCopyFrame
 from .devices.awg.awg_card import SpectrumAWGCard
 from .devices.awg.awg_channel import SpectrumAWGAnalogChannel, SpectrumAWGIOLine
 from .devices.mocks import MockSpectrumDigitiserCard, MockSpectrumDigitiserStarHub, MockSpectrumAWGCard
@@ -76,6 +81,10 @@ from .devices.abstract_device import (
 )
 from .devices.digitiser.abstract_spectrum_digitiser import AbstractSpectrumDigitiser
 from .features.pulse_generator.pulse_generator import PulseGenerator
+from .features.acquisition_engine.acquisition_engine import AcquisitionEngine
+from .features.recorder.recorder import Recorder
+from .features.recorder.recording_reader import RecordingReader
+from .features.software_averager.software_averager import SoftwareAverager
 
 __all__ = [
     "SpectrumDigitiserAnalogChannel",
@@ -92,11 +101,16 @@ __all__ = [
     "settings",
     "features",
     "Measurement",
+    "ZeroCopyFrame",
     "SpectrumAWGCard",
     "MockSpectrumAWGCard",
     "SpectrumAWGAnalogChannel",
     "SpectrumAWGIOLine",
     "PulseGenerator",
+    "AcquisitionEngine",
+    "Recorder",
+    "RecordingReader",
+    "SoftwareAverager",
 ]
 
 
@@ -1,6 +1,6 @@
 """Provides a partially-implemented abstract class common to individual channels of Spectrum devices."""
 from abc import abstractmethod, ABC
-from typing import Any, TypeVar, Generic
+from typing import Any, ContextManager, TypeVar, Generic
 
 # Christian Baker, King's College London
 # Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
@@ -64,6 +64,11 @@ class AbstractSpectrumChannel(SpectrumChannelInterface, Generic[ChannelNameType]
     ) -> int:
         return self._parent_device.read_spectrum_device_register(spectrum_register, length)
 
+    def parent_device_register_batch(self) -> ContextManager[None]:
+        """Queue the register writes made to the parent device inside a `with` block. See
+        `AbstractSpectrumDevice.register_batch()`."""
+        return self._parent_device.register_batch()
+
     def __eq__(self, other: object) -> bool:
         if isinstance(other, AbstractSpectrumChannel):
             return (self.name == other.name) and (self._parent_device == other._parent_device)
@@ -5,13 +5,20 @@
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 
 from abc import ABC
+from contextlib import contextmanager
 from copy import copy
+from typing import Iterator, Optional
 
 from spectrumdevice.devices.abstract_device.device_interface import (
     SpectrumDeviceInterface,
     AnalogChannelInterfaceType,
     IOLineInterfaceType,
 )
+from spectrumdevice.devices.abstract_device.register_batch import (
+    COMMAND_REGISTERS,
+    RegisterWriteBatch,
+    UNBATCHED_REGISTERS,
+)
 from spectrumdevice.exceptions import SpectrumDeviceNotConnected, SpectrumDriversNotFound
 from spectrumdevice.settings import SpectrumRegisterLength, TriggerSettings
 from spectrumdevice.settings.output_channel_pairing import (
@@ -45,6 +52,8 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
     spectrumdevice/__init__.py, which inherit the methods defined here. Note that the concrete mock devices override
     several of the methods defined here."""
 
+    _register_batch: Optional[RegisterWriteBatch] = None
+
     def _connect(self, visa_string: str) -> None:
         self._handle = spectrum_handle_factory(visa_string)
         self._connected = True
@@ -86,17 +95,18 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
 
         Args:
             settings (`TriggerSettings`): A `TriggerSettings` dataclass containing the setting values to apply."""
-        self.set_trigger_sources(settings.trigger_sources)
-        if len(set(self.trigger_sources) & set(EXTERNAL_TRIGGER_SOURCES)) > 0:
-            if settings.external_trigger_mode is not None:
-                self.set_external_trigger_mode(settings.external_trigger_mode)
-            if settings.external_trigger_level_in_mv is not None:
-                self.set_external_trigger_level_in_mv(settings.external_trigger_level_in_mv)
-            if settings.external_trigger_pulse_width_in_samples is not None:
-                self.set_external_trigger_pulse_width_in_samples(settings.external_trigger_pulse_width_in_samples)
-
-        # Write the configuration to the card
-        self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
+        with self.register_batch():
+            self.set_trigger_sources(settings.trigger_sources)
+            if len(set(self.trigger_sources) & set(EXTERNAL_TRIGGER_SOURCES)) > 0:
+                if settings.external_trigger_mode is not None:
+                    self.set_external_trigger_mode(settings.external_trigger_mode)
+                if settings.external_trigger_level_in_mv is not None:
+                    self.set_external_trigger_level_in_mv(settings.external_trigger_level_in_mv)
+                if settings.external_trigger_pulse_width_in_samples is not None:
+                    self.set_external_trigger_pulse_width_in_samples(settings.external_trigger_pulse_width_in_samples)
+
+            # Write the configuration to the card
+            self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
 
     def configure_channel_pairing(self, channel_pair: ChannelPair, mode: ChannelPairingMode) -> None:
         """Configures a pair of consecutive channels to operate either independently, in differential mode or
@@ -147,7 +157,7 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
 
         This method is used internally by `AbstractSpectrumDigitiser` and its subclasses to configure a hardware
         device, but can also be used to set the value of registers that are not implemented in
-        `AbstractSpectrumDigitiser` and its subclasses.
+        `AbstractSpectrumDigitiser` and its subclasses. Inside a `register_batch()` block, the write is queued.
 
         Args:
             spectrum_register (int): Identifier of the register to set. This should be a global constant imported from
@@ -157,6 +167,22 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
             length (`SpectrumRegisterLength`): A `SpectrumRegisterLength` object specifying the length of the register
                 to set, in bits.
         """
+        batch = self._register_batch
+        if batch is not None and spectrum_register not in UNBATCHED_REGISTERS:
+            if spectrum_register not in COMMAND_REGISTERS:
+                batch.queue(spectrum_register, value, length)
+                return
+            if spectrum_register == SPC_M2CMD and value == M2CMD_CARD_WRITESETUP:
+                batch.write_setup_requested = True
+                return
+            # other commands (e.g. starting the card or resetting the timestamp counter) act on the settings written so
+            # far, so they are sent in order after the queued writes
+            self._flush_register_batch(batch)
+        self._write_register_to_device(spectrum_register, value, length)
+
+    def _write_register_to_device(
+        self, spectrum_register: int, value: int, length: SpectrumRegisterLength = SpectrumRegisterLength.THIRTY_TWO
+    ) -> None:
         if not SPECTRUM_DRIVERS_FOUND:
             raise SpectrumDriversNotFound(
                 "Cannot communicate with hardware. For testing on a system without drivers or connected hardware, use"
@@ -181,7 +207,8 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
 
         This method is used internally by `AbstractSpectrumDigitiser` and its subclasses to read the configuration of a
         hardware device, but can be also used to get the value of registers that are not implemented in
-        `AbstractSpectrumDigitiser` and its subclasses.
+        `AbstractSpectrumDigitiser` and its subclasses. Inside a `register_batch()` block, the value of a queued write
+        is returned.
 
         Args:
             spectrum_register (int): Identifier of the register to set. This should be a global constant imported from
@@ -193,6 +220,16 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
             value (int): Value of the register. This can be matched to a global constant imported from
                 spectrum_gmbh.py_header.regs, usually using one of the Enums defined in the settings module.
         """
+        batch = self._register_batch
+        if batch is not None:
+            queued_value = batch.queued_value(spectrum_register)
+            if queued_value is not None:
+                return queued_value
+        return self._read_register_from_device(spectrum_register, length)
+
+    def _read_register_from_device(
+        self, spectrum_register: int, length: SpectrumRegisterLength = SpectrumRegisterLength.THIRTY_TWO
+    ) -> int:
         if not SPECTRUM_DRIVERS_FOUND:
             raise SpectrumDriversNotFound(
                 "Cannot communicate with hardware. For testing on a system without drivers or connected hardware, use"
@@ -208,5 +245,58 @@ class AbstractSpectrumDevice(SpectrumDeviceInterface[AnalogChannelInterfaceType,
         else:
             raise SpectrumDeviceNotConnected("The device has been disconnected.")
 
+    @contextmanager
+    def register_batch(self) -> Iterator[None]:
+        """Queue the register writes made inside a `with` block, and write them to the device when the block exits:
+
+            with card.register_batch():
+                card.set_sample_rate_in_hz(int(40e6))
+                card.set_acquisition_length_in_samples(400)
+                ...
+
+        Only the last value written to each register is sent. Reading a register to which a write is queued returns the
+        queued value without communicating with the device, so read-modify-write operations on bitmask registers (e.g.
+        trigger masks) are carried out in memory. M2CMD_CARD_WRITESETUP is sent once, after the queued writes, if it was
+        sent at all inside the block, and before any other command. Other commands (writes to SPC_M2CMD,
+        SPC_TIMESTAMP_CMD or SPC_XIO_PULSEGEN_COMMAND) are never merged: the writes queued so far are sent first, and
+        then the command, so commands reach the device in the order in which they were written. `configure_acquisition()`, `configure_trigger()` and `configure_generation()` use a batch,
+        which saves a round trip per write on networked devices.
+
+        Because the writes are delayed, errors reported by the driver for invalid values are raised when the block
+        exits rather than by the setter, and registers whose values depend on the queued writes (e.g. the number of
+        enabled channels) are not updated until then. Blocks can be nested, in which case the writes are sent when the
+        outermost block exits. If the block raises an exception, the queued writes are discarded.
+        """
+        self._begin_register_batch()
+        try:
+            yield
+        except BaseException:
+            self._end_register_batch(commit=False)
+            raise
+        self._end_register_batch(commit=True)
+
+    def _begin_register_batch(self) -> None:
+        if self._register_batch is None:
+            self._register_batch = RegisterWriteBatch()
+        self._register_batch.depth += 1
+
+    def _end_register_batch(self, commit: bool) -> None:
+        batch = self._register_batch
+        if batch is None:
+            return
+        batch.depth -= 1
+        if batch.depth > 0:
+            return
+        self._register_batch = None
+        if commit:
+            self._flush_register_batch(batch)
+
+    def _flush_register_batch(self, batch: RegisterWriteBatch) -> None:
+        for spectrum_register, value, length in batch.take_writes():
+            self._write_register_to_device(spectrum_register, value, length)
+        if batch.write_setup_requested:
+            batch.write_setup_requested = False
+            self._write_register_to_device(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
+
     def __repr__(self) -> str:
         return str(self)
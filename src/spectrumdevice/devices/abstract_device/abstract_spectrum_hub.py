@@ -7,13 +7,14 @@ Spectrum cards)."""
 
 from abc import ABC
 from functools import reduce
-from operator import or_
-from typing import Any, List, Sequence, Tuple, TypeVar, Generic
+from operator import attrgetter, methodcaller, or_
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar, Generic
 
 from numpy import arange
 
 from spectrum_gmbh.py_header.regs import SPC_SYNC_ENABLEMASK
 from spectrumdevice.devices.abstract_device.abstract_spectrum_device import AbstractSpectrumDevice
+from spectrumdevice.devices.abstract_device.card_worker_pool import CardWorkerPool
 from spectrumdevice.devices.abstract_device.device_interface import (
     SpectrumDeviceInterface,
     IOLineInterfaceType,
@@ -34,6 +35,7 @@ from spectrumdevice.spectrum_wrapper import destroy_handle
 
 
 CardType = TypeVar("CardType", bound=SpectrumDeviceInterface)
+ResultType = TypeVar("ResultType")
 
 
 class AbstractSpectrumStarHub(
@@ -41,7 +43,11 @@ class AbstractSpectrumStarHub(
 ):
     """Composite abstract class of `AbstractSpectrumCard` implementing methods common to all StarHubs. StarHubs are
     composites of more than one Spectrum card. Acquisition and generation from the child cards of a StarHub
-    is synchronised, aggregating the channels of all child cards."""
+    is synchronised, aggregating the channels of all child cards.
+
+    Operations that apply to every child card (waiting for acquisitions and transfers, starting transfers, and most
+    setters and getters) are carried out on all the cards at once, each in a worker thread belonging to the card, so
+    that they take as long as the slowest card rather than the sum over all cards."""
 
     def __init__(self, device_number: int, child_cards: Sequence[CardType], master_card_index: int, **kwargs: Any):
         """
@@ -53,6 +59,7 @@ class AbstractSpectrumStarHub(
                 clock) is located.
         """
         self._child_cards: Sequence[CardType] = child_cards
+        self._card_pool: Optional[CardWorkerPool[CardType]] = None
         self._master_card = child_cards[master_card_index]
         self._triggering_card = child_cards[master_card_index]
         child_card_logical_indices = (2**n for n in range(len(self._child_cards)))
@@ -62,7 +69,11 @@ class AbstractSpectrumStarHub(
         self.write_to_spectrum_device_register(SPC_SYNC_ENABLEMASK, all_cards_binary_mask)
 
     def disconnect(self) -> None:
-        """Disconnects from each child card and terminates connection to the hub itself."""
+        """Disconnects from each child card and terminates connection to the hub itself. The worker threads of the child
+        cards are stopped, and restarted when next needed."""
+        if self._card_pool is not None:
+            self._card_pool.close()
+            self._card_pool = None
         if self._connected:
             destroy_handle(self._handle)
         for card in self._child_cards:
@@ -72,8 +83,26 @@ class AbstractSpectrumStarHub(
     def reconnect(self) -> None:
         """Reconnects to the hub after a `disconnect()`, and reconnects to each child card."""
         self._connect(self._visa_string)
-        for card in self._child_cards:
-            card.reconnect()
+        self._on_each_card(methodcaller("reconnect"))
+
+    def _begin_register_batch(self) -> None:
+        """A register batch on the hub also queues the register writes made to its child cards, and the writes are
+        sent to all the cards in parallel when the batch ends. See `AbstractSpectrumDevice.register_batch()`."""
+        super()._begin_register_batch()
+        self._on_each_card(lambda card: card._begin_register_batch())
+
+    def _end_register_batch(self, commit: bool) -> None:
+        try:
+            self._on_each_card(lambda card: card._end_register_batch(commit))
+        finally:
+            super()._end_register_batch(commit)
+
+    def _on_each_card(self, function: Callable[..., ResultType], *args_per_card: Sequence[Any]) -> List[ResultType]:
+        """Call `function` on every child card concurrently, in the worker thread of each card, and return the results in
+        the order of the cards. See `CardWorkerPool.run()`. The worker threads are started on first use."""
+        if self._card_pool is None:
+            self._card_pool = CardWorkerPool(self._child_cards)
+        return list(self._card_pool.run(function, *args_per_card))
 
     @property
     def status(self) -> DEVICE_STATUS_TYPE:
@@ -81,25 +110,22 @@ class AbstractSpectrumStarHub(
         Returns:
             statuses (List[List[`CardStatus`]]): A list of lists of `CardStatus` (each card has a list of statuses).
         """
-        return DEVICE_STATUS_TYPE([card.status[0] for card in self._child_cards])
+        return DEVICE_STATUS_TYPE([status[0] for status in self._on_each_card(attrgetter("status"))])
 
     def start_transfer(self) -> None:
         """Start the transfer of data between the on-device buffer of each child card and its `TransferBuffer`. See
         `AbstractSpectrumCard.start_transfer()` for more information."""
-        for card in self._child_cards:
-            card.start_transfer()
+        self._on_each_card(methodcaller("start_transfer"))
 
     def stop_transfer(self) -> None:
         """Stop the transfer of data between each card and its `TransferBuffer`. See
         `AbstractSpectrumCard.stop_transfer()` for more information."""
-        for card in self._child_cards:
-            card.stop_transfer()
+        self._on_each_card(methodcaller("stop_transfer"))
 
     def wait_for_transfer_chunk_to_complete(self) -> None:
         """Wait for all cards to stop transferring data to/from their `TransferBuffers`. See
         `AbstractSpectrumCard.wait_for_transfer_to_complete()` for more information."""
-        for card in self._child_cards:
-            card.wait_for_transfer_chunk_to_complete()
+        self._on_each_card(methodcaller("wait_for_transfer_chunk_to_complete"))
 
     @property
     def connected(self) -> bool:
@@ -145,8 +171,7 @@ class AbstractSpectrumStarHub(
         Args:
             rate (int): The desired sample rate of the child cards in Hz.
         """
-        for card in self._child_cards:
-            card.set_sample_rate_in_hz(rate)
+        self._on_each_card(methodcaller("set_sample_rate_in_hz", rate))
 
     @property
     def trigger_sources(self) -> List[TriggerSource]:
@@ -163,10 +188,13 @@ class AbstractSpectrumStarHub(
 
         Args:
             sources (List[`TriggerSource`]): The trigger sources to enable, in a list."""
-        self._triggering_card.set_trigger_sources(sources)
-        for card in self._child_cards:
-            if card is not self._triggering_card:
-                card.set_trigger_sources([TriggerSource.SPC_TMASK_NONE])
+        self._on_each_card(
+            lambda card, card_sources: card.set_trigger_sources(card_sources),
+            [
+                sources if card is self._triggering_card else [TriggerSource.SPC_TMASK_NONE]
+                for card in self._child_cards
+            ],
+        )
 
     @property
     def external_trigger_mode(self) -> ExternalTriggerMode:
@@ -227,8 +255,7 @@ class AbstractSpectrumStarHub(
     def apply_channel_enabling(self) -> None:
         """Apply the enabled channels chosen using `set_enable_channels()`. This happens automatically and does not
         usually need to be called."""
-        for d in self._child_cards:
-            d.apply_channel_enabling()
+        self._on_each_card(methodcaller("apply_channel_enabling"))
 
     @property
     def enabled_analog_channel_nums(self) -> List[int]:
@@ -240,10 +267,10 @@ class AbstractSpectrumStarHub(
         """
         enabled_channels = []
         n_channels_in_previous_card = 0
-        for card in self._child_cards:
-            enabled_channels += [
-                channel_num + n_channels_in_previous_card for channel_num in card.enabled_analog_channel_nums
-            ]
+        for card, card_channel_nums in zip(
+            self._child_cards, self._on_each_card(attrgetter("enabled_analog_channel_nums"))
+        ):
+            enabled_channels += [channel_num + n_channels_in_previous_card for channel_num in card_channel_nums]
             n_channels_in_previous_card = len(card.analog_channels)
         return enabled_channels
 
@@ -256,16 +283,22 @@ class AbstractSpectrumStarHub(
         """
         channels_nums.sort()
         channels_to_enable_all_cards = channels_nums
+        channels_to_enable_each_card = []
 
         for child_card in self._child_cards:
             n_channels_in_card = len(child_card.analog_channels)
             channels_to_enable_this_card = list(set(arange(n_channels_in_card)) & set(channels_to_enable_all_cards))
             num_channels_to_enable_this_card = len(channels_to_enable_this_card)
-            child_card.set_enabled_analog_channels(channels_to_enable_this_card)
+            channels_to_enable_each_card.append(channels_to_enable_this_card)
             channels_to_enable_all_cards = [
                 num - n_channels_in_card for num in channels_nums[num_channels_to_enable_this_card:]
             ]
 
+        self._on_each_card(
+            lambda card, channels_to_enable: card.set_enabled_analog_channels(channels_to_enable),
+            channels_to_enable_each_card,
+        )
+
     @property
     def transfer_buffers(self) -> List[TransferBuffer]:
         """The `TransferBuffer`s of all the child cards of the hub. See `AbstractSpectrumCard.transfer_buffers` for more
@@ -308,18 +341,14 @@ class AbstractSpectrumStarHub(
         Returns:
             timeout_ms (int): The currently set timeout in ms.
         """
-        timeouts = []
-        for d in self._child_cards:
-            timeouts.append(d.timeout_in_ms)
-        return check_settings_constant_across_devices(timeouts, __name__)
+        return check_settings_constant_across_devices(self._on_each_card(attrgetter("timeout_in_ms")), __name__)
 
     def set_timeout_in_ms(self, timeout_ms: int) -> None:
         """Change the timeout value for all child cards.
 
         Args:
             timeout_ms (int): The desired timeout setting in seconds."""
-        for d in self._child_cards:
-            d.set_timeout_in_ms(timeout_ms)
+        self._on_each_card(methodcaller("set_timeout_in_ms", timeout_ms))
 
     @property
     def feature_list(self) -> List[Tuple[List[CardFeature], List[AdvancedCardFeature]]]:
@@ -330,7 +359,7 @@ class AbstractSpectrumStarHub(
             features (List[Tuple[List[`CardFeature`], List[`AdvancedCardFeature`]]]): A list of tuples, one per child
                 card. Each tuple contains a list of features and a list of advanced features for that card.
         """
-        return [card.feature_list[0] for card in self._child_cards]
+        return [feature_list[0] for feature_list in self._on_each_card(attrgetter("feature_list"))]
 
     @property
     def available_io_modes(self) -> AvailableIOModes:
@@ -344,10 +373,7 @@ class AbstractSpectrumStarHub(
 
     @property
     def bytes_per_sample(self) -> int:
-        bytes_per_sample_each_card = []
-        for d in self._child_cards:
-            bytes_per_sample_each_card.append(d.bytes_per_sample)
-        return check_settings_constant_across_devices(bytes_per_sample_each_card, __name__)
+        return check_settings_constant_across_devices(self._on_each_card(attrgetter("bytes_per_sample")), __name__)
 
     def __str__(self) -> str:
         return f"StarHub {self._visa_string}"
@@ -0,0 +1,133 @@
+"""Provides a pool of long-lived threads, one per child card of a StarHub, for operating on the cards concurrently."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+import logging
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+CardType = TypeVar("CardType")
+
+logger = logging.getLogger(__name__)
+
+
+class CardWorkerPool(Generic[CardType]):
+    """Runs a function on every card of a StarHub at once, each in the card's own worker thread, and returns the results
+    in the order of the cards. The worker threads are started once and then wait for work, so each call costs two
+    thread handoffs per card instead of the creation of a thread per card. Results are written into slots allocated
+    when the pool is created:
+
+        pool = CardWorkerPool(child_cards)
+        arrays = pool.run(SpectrumDigitiserCard.get_waveform_array)
+        pool.close()
+
+    The worker threads carry out one call to `run()` at a time. If `run()` is called while the workers are busy (by
+    another thread, or by a function already running in one of the workers), the function is instead called on each card
+    in turn in the calling thread, so concurrent callers never wait for each other's operations to finish. The worker
+    threads are daemon threads, but should be stopped with `close()` once the pool is no longer needed.
+    """
+
+    def __init__(self, cards: Sequence[CardType]):
+        """
+        Args:
+            cards (Sequence): The cards to operate on. One worker thread is started per card.
+        """
+        self._cards = cards
+        self._function: Optional[Callable[..., Any]] = None
+        self._args_per_card: Tuple[Sequence[Any], ...] = ()
+        self._results: List[Any] = [None] * len(cards)
+        self._errors: List[Optional[BaseException]] = [None] * len(cards)
+        self._work_events = [Event() for _ in cards]
+        self._done_events = [Event() for _ in cards]
+        self._run_lock = Lock()
+        self._closed = False
+        self._threads = [
+            Thread(target=self._work, args=(card_index,), daemon=True, name=f"CardWorker{card_index}")
+            for card_index in range(len(cards))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def run(self, function: Callable[..., Any], *args_per_card: Sequence[Any]) -> List[Any]:
+        """Call `function` on each card concurrently and wait for all the calls to finish.
+
+        Args:
+            function (Callable): A function taking a card as its first argument.
+            *args_per_card (Sequence): Further arguments for `function`, each a sequence holding one value per card,
+                e.g. the slice of an output array into which each card should write.
+
+        Returns:
+            results (List): The value returned by `function` for each card, in the order of the cards. The list is
+                reused by the next call, so copy it if it must be kept.
+
+        Raises:
+            If `function` raised an exception for any of the cards, the exception raised for the first of them is
+            re-raised once all the calls have finished. The exceptions raised for the other cards are logged.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return [
+                function(card, *[card_args[card_index] for card_args in args_per_card])
+                for card_index, card in enumerate(self._cards)
+            ]
+        try:
+            if self._closed:
+                raise RuntimeError("The card worker pool has been closed.")
+            self._function = function
+            self._args_per_card = args_per_card
+            for done_event in self._done_events:
+                done_event.clear()
+            for work_event in self._work_events:
+                work_event.set()
+            for done_event in self._done_events:
+                done_event.wait()
+            self._function = None
+            self._args_per_card = ()
+            self._raise_errors()
+            return self._results
+        finally:
+            self._run_lock.release()
+
+    def close(self) -> None:
+        """Stop the worker threads. Waits for a call to `run()` in progress to finish first."""
+        with self._run_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for work_event in self._work_events:
+                work_event.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _raise_errors(self) -> None:
+        failed_card_indices = [card_index for card_index, error in enumerate(self._errors) if error is not None]
+        for card_index in failed_card_indices[1:]:
+            logger.error(f"{self._cards[card_index]} also raised {self._errors[card_index]!r}")
+        if failed_card_indices:
+            first_error = self._errors[failed_card_indices[0]]
+            assert first_error is not None
+            raise first_error
+
+    def _work(self, card_index: int) -> None:
+        work_event = self._work_events[card_index]
+        done_event = self._done_events[card_index]
+        while True:
+            work_event.wait()
+            work_event.clear()
+            if self._closed:
+                return
+            try:
+                assert self._function is not None
+                args = [card_args[card_index] for card_args in self._args_per_card]
+                self._results[card_index] = self._function(self._cards[card_index], *args)
+                self._errors[card_index] = None
+            except BaseException as error:
+                self._results[card_index] = None
+                self._errors[card_index] = error
+            finally:
+                done_event.set()
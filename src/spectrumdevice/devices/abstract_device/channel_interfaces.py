@@ -5,7 +5,7 @@
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Protocol
+from typing import ContextManager, TypeVar, Generic, Protocol
 
 from spectrumdevice.features.pulse_generator.interfaces import PulseGeneratorInterface
 from spectrumdevice.settings import (
@@ -44,6 +44,10 @@ class SpectrumChannelInterface(Generic[ChannelNameType], ABC):
     ) -> int:
         raise NotImplementedError()
 
+    @abstractmethod
+    def parent_device_register_batch(self) -> ContextManager[None]:
+        raise NotImplementedError()
+
 
 class GettableSettingsProtocol(Protocol):
     @abstractmethod
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Sequence, Tuple, TypeVar, Generic
+from typing import ContextManager, List, Optional, Sequence, Tuple, TypeVar, Generic
 
 from spectrumdevice.devices.abstract_device.channel_interfaces import (
     SpectrumAnalogChannelInterface,
@@ -174,6 +174,10 @@ class SpectrumDeviceInterface(Generic[AnalogChannelInterfaceType, IOLineInterfac
     def configure_channel_pairing(self, channel_pair: ChannelPair, mode: ChannelPairingMode) -> None:
         raise NotImplementedError()
 
+    @abstractmethod
+    def register_batch(self) -> ContextManager[None]:
+        raise NotImplementedError()
+
     @abstractmethod
     def write_to_spectrum_device_register(
         self,
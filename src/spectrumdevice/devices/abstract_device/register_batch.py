@@ -0,0 +1,59 @@
+"""Provides a class holding the register writes queued by `AbstractSpectrumDevice.register_batch()`."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from typing import Dict, List, Optional, Tuple
+
+from spectrum_gmbh.py_header.regs import (
+    SPC_ABA_AVAIL_CARD_LEN,
+    SPC_DATA_AVAIL_CARD_LEN,
+    SPC_M2CMD,
+    SPC_TIMESTAMP_CMD,
+    SPC_TS_AVAIL_CARD_LEN,
+    SPC_XIO_PULSEGEN_COMMAND,
+)
+from spectrumdevice.settings import SpectrumRegisterLength
+
+UNBATCHED_REGISTERS = frozenset((SPC_DATA_AVAIL_CARD_LEN, SPC_ABA_AVAIL_CARD_LEN, SPC_TS_AVAIL_CARD_LEN))
+"""Registers that are always written to the device immediately, even during a batch: writing them hands transfer
+buffer space back to the driver, which may happen in another thread while a batch is open."""
+
+COMMAND_REGISTERS = frozenset((SPC_M2CMD, SPC_TIMESTAMP_CMD, SPC_XIO_PULSEGEN_COMMAND))
+"""Registers to which commands are written, rather than settings. Each write carries out an action, so writes to these
+registers are never merged: during a batch, the writes queued so far are sent first and the command is then sent
+immediately, in the order in which it was written. The exception is M2CMD_CARD_WRITESETUP, which is sent once, just
+before the next command or at the end of the batch."""
+
+
+class RegisterWriteBatch:
+    """The register writes queued while a batch is open on a device, in the order in which they were last written. Only
+    the last value written to each register is kept."""
+
+    def __init__(self) -> None:
+        self.depth = 0
+        """The number of nested `register_batch()` blocks that are open."""
+        self.write_setup_requested = False
+        """True if M2CMD_CARD_WRITESETUP was sent during the batch, in which case it is sent once after the queued
+        writes."""
+        self._writes: Dict[int, Tuple[int, SpectrumRegisterLength]] = {}
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def queue(self, spectrum_register: int, value: int, length: SpectrumRegisterLength) -> None:
+        """Queue a write, replacing any write to the same register already queued."""
+        self._writes.pop(spectrum_register, None)
+        self._writes[spectrum_register] = (value, length)
+
+    def queued_value(self, spectrum_register: int) -> Optional[int]:
+        """The value queued for a register, or None if no write to the register is queued."""
+        write = self._writes.get(spectrum_register)
+        return write[0] if write is not None else None
+
+    def take_writes(self) -> List[Tuple[int, int, SpectrumRegisterLength]]:
+        """Remove and return the queued writes as (register, value, length) tuples, in the order to write them."""
+        writes = [(spectrum_register, value, length) for spectrum_register, (value, length) in self._writes.items()]
+        self._writes.clear()
+        return writes
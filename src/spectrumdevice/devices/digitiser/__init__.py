@@ -4,6 +4,7 @@
 # Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 
+from spectrumdevice.devices.digitiser.acquisition_plan import AcquisitionPlan
 from spectrumdevice.devices.digitiser.digitiser_card import SpectrumDigitiserCard
 from spectrumdevice.devices.digitiser.digitiser_channel import SpectrumDigitiserAnalogChannel
 from spectrumdevice.devices.digitiser.digitiser_interface import (
@@ -11,11 +12,14 @@ from spectrumdevice.devices.digitiser.digitiser_interface import (
     SpectrumDigitiserInterface,
 )
 from spectrumdevice.devices.digitiser.digitiser_star_hub import SpectrumDigitiserStarHub
+from spectrumdevice.devices.digitiser.zero_copy_frame import ZeroCopyFrame
 
 __all__ = [
+    "AcquisitionPlan",
     "SpectrumDigitiserAnalogChannelInterface",
     "SpectrumDigitiserAnalogChannel",
     "SpectrumDigitiserInterface",
     "SpectrumDigitiserCard",
     "SpectrumDigitiserStarHub",
+    "ZeroCopyFrame",
 ]
@@ -5,7 +5,12 @@
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 
 from abc import ABC
-from typing import List
+from asyncio import get_running_loop
+from time import monotonic
+from typing import AsyncIterator, Generator, List, Optional
+
+from numpy import floating
+from numpy.typing import NDArray
 
 from spectrumdevice.measurement import Measurement
 from spectrumdevice.devices.abstract_device import AbstractSpectrumDevice
@@ -16,6 +21,7 @@ from spectrumdevice.devices.digitiser.digitiser_interface import (
 )
 from spectrumdevice.exceptions import SpectrumWrongAcquisitionMode
 from spectrumdevice.settings import AcquisitionMode, AcquisitionSettings
+from spectrumdevice.settings.device_modes import AVERAGING_ACQUISITION_MODES, FIFO_ACQUISITION_MODES
 from spectrum_gmbh.py_header.regs import M2CMD_CARD_WRITESETUP, SPC_M2CMD
 
 
@@ -35,46 +41,56 @@ class AbstractSpectrumDigitiser(
         Args:
             settings (`AcquisitionSettings`): An `AcquisitionSettings` dataclass containing the setting values to apply.
         """
-        if settings.batch_size > 1 and settings.acquisition_mode == AcquisitionMode.SPC_REC_STD_SINGLE:
-            raise ValueError("In standard single mode, only 1 acquisition can be downloaded at a time.")
-        self._acquisition_mode = settings.acquisition_mode
-        self.set_batch_size(settings.batch_size)
-        self.set_acquisition_mode(settings.acquisition_mode)
-        self.set_sample_rate_in_hz(settings.sample_rate_in_hz)
-        self.set_acquisition_length_in_samples(settings.acquisition_length_in_samples)
-        self.set_post_trigger_length_in_samples(
-            settings.acquisition_length_in_samples - settings.pre_trigger_length_in_samples
-        )
-        self.set_timeout_in_ms(settings.timeout_in_ms)
-        self.set_enabled_analog_channels(settings.enabled_channels)
-
-        # Apply channel dependent settings
-        for channel_num, v_range, v_offset, impedance in zip(
-            self.enabled_analog_channel_nums,
-            settings.vertical_ranges_in_mv,
-            settings.vertical_offsets_in_percent,
-            settings.input_impedances,
+        if settings.batch_size > 1 and settings.acquisition_mode in (
+            AcquisitionMode.SPC_REC_STD_SINGLE,
+            AcquisitionMode.SPC_REC_STD_AVERAGE,
         ):
-            channel = self.analog_channels[channel_num]
-            channel.set_vertical_range_in_mv(v_range)
-            channel.set_vertical_offset_in_percent(v_offset)
-            channel.set_input_impedance(impedance)
+            raise ValueError("In standard modes, only 1 acquisition can be downloaded at a time.")
+        with self.register_batch():
+            self._acquisition_mode = settings.acquisition_mode
+            self.set_batch_size(settings.batch_size)
+            self.set_output_dtype(settings.output_dtype)
+            self.set_transfer_buffer_size_in_batches(settings.transfer_buffer_size_in_batches)
+            self.set_acquisition_mode(settings.acquisition_mode)
+            if settings.acquisition_mode in AVERAGING_ACQUISITION_MODES:
+                self.set_number_of_averages(settings.number_of_averages)
+            if settings.acquisition_mode == AcquisitionMode.SPC_REC_FIFO_ABA and settings.aba_divider is not None:
+                self.set_aba_divider(settings.aba_divider)
+            self.set_sample_rate_in_hz(settings.sample_rate_in_hz)
+            self.set_acquisition_length_in_samples(settings.acquisition_length_in_samples)
+            self.set_post_trigger_length_in_samples(
+                settings.acquisition_length_in_samples - settings.pre_trigger_length_in_samples
+            )
+            self.set_timeout_in_ms(settings.timeout_in_ms)
+            self.set_enabled_analog_channels(settings.enabled_channels)
+
+            # Apply channel dependent settings
+            for channel_num, v_range, v_offset, impedance in zip(
+                self.enabled_analog_channel_nums,
+                settings.vertical_ranges_in_mv,
+                settings.vertical_offsets_in_percent,
+                settings.input_impedances,
+            ):
+                channel = self.analog_channels[channel_num]
+                channel.set_vertical_range_in_mv(v_range)
+                channel.set_vertical_offset_in_percent(v_offset)
+                channel.set_input_impedance(impedance)
 
-        # Only some hardware has software programmable input coupling, so coupling can be None
-        if settings.input_couplings is not None:
-            for channel, coupling in zip(self.analog_channels, settings.input_couplings):
-                channel.set_input_coupling(coupling)
+            # Only some hardware has software programmable input coupling, so coupling can be None
+            if settings.input_couplings is not None:
+                for channel, coupling in zip(self.analog_channels, settings.input_couplings):
+                    channel.set_input_coupling(coupling)
 
-        # Only some hardware has software programmable input paths, so it can be None
-        if settings.input_paths is not None:
-            for channel, path in zip(self.analog_channels, settings.input_paths):
-                channel.set_input_path(path)
+            # Only some hardware has software programmable input paths, so it can be None
+            if settings.input_paths is not None:
+                for channel, path in zip(self.analog_channels, settings.input_paths):
+                    channel.set_input_path(path)
 
-        # Write the configuration to the card
-        self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
+            # Write the configuration to the card
+            self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
 
         if settings.timestamping_enabled:
-            self.enable_timestamping()
+            self.enable_timestamping(settings.timestamp_buffer_size_in_timestamps, settings.timestamp_readout_mode)
 
     def execute_standard_single_acquisition(self) -> Measurement:
         """Carry out a single measurement in standard single mode and return the acquired waveforms.
@@ -82,7 +98,7 @@ class AbstractSpectrumDigitiser(
         This method automatically carries out a standard single mode acquisition, including handling the creation
         of a `TransferBuffer` and the retrieval of the acquired waveforms. After being called, it will wait until a
         trigger event is received before carrying out the acquisition and then transferring and returning the acquired
-        waveforms. The device must be configured in SPC_REC_STD_SINGLE acquisition mode.
+        waveforms. The device must be configured in SPC_REC_STD_SINGLE or SPC_REC_STD_AVERAGE acquisition mode.
 
         Returns:
             measurement (Measurement): A Measurement object. The `.waveforms` attribute of `measurement` will be a list
@@ -90,9 +106,9 @@ class AbstractSpectrumDigitiser(
                 The Waveform object also has a timestamp attribute, which (if timestamping was enabled in acquisition
                 settings) contains the time at which the acquisition was triggered.
         """
-        if self._acquisition_mode != AcquisitionMode.SPC_REC_STD_SINGLE:
+        if self._acquisition_mode not in (AcquisitionMode.SPC_REC_STD_SINGLE, AcquisitionMode.SPC_REC_STD_AVERAGE):
             raise SpectrumWrongAcquisitionMode(
-                "Set the acquisition mode to SPC_REC_STD_SINGLE using "
+                "Set the acquisition mode to SPC_REC_STD_SINGLE or SPC_REC_STD_AVERAGE using "
                 "configure_acquisition() or set_acquisition_mode() before executing "
                 "a standard single mode acquisition."
             )
@@ -105,6 +121,35 @@ class AbstractSpectrumDigitiser(
         self.stop()  # Only strictly required for Mock devices. Should not affect hardware.
         return Measurement(waveforms=waveforms, timestamp=self.get_timestamp())
 
+    def execute_standard_multi_acquisition(self) -> List[Measurement]:
+        """Record `batch_size` trigger events into segments of on-board memory, then transfer all the segments at once
+        and return them.
+
+        The card records each segment at full speed, without waiting for any samples to be transferred, so this mode
+        suits bursts of triggers that are too fast to be streamed. All the segments are transferred in a single DMA
+        transfer, and converted to volts in a single operation. The device must be configured in SPC_REC_STD_MULTI
+        acquisition mode, with the number of segments set as the batch size.
+
+        Returns:
+            measurements (List[Measurement]): A list of `batch_size` Measurement objects, one per segment. Each
+                Measurement object has a `waveforms` attribute containing a list of 1D NumPy arrays, one per channel,
+                in channel order. To get the segments as a single (segment, channel, sample) array instead, call
+                `get_waveform_array()` after this method returns.
+        """
+        if self._acquisition_mode != AcquisitionMode.SPC_REC_STD_MULTI:
+            raise SpectrumWrongAcquisitionMode(
+                "Set the acquisition mode to SPC_REC_STD_MULTI using configure_acquisition() or set_acquisition_mode() "
+                "before executing a standard multi mode acquisition."
+            )
+        self.start()
+        self.wait_for_acquisition_to_complete()
+        self.define_transfer_buffer()
+        self.start_transfer()
+        self.wait_for_transfer_chunk_to_complete()
+        segments = self.get_waveform_array()
+        self.stop()  # Only strictly required for Mock devices. Should not affect hardware.
+        return [Measurement(waveforms=list(segment), timestamp=self.get_timestamp()) for segment in segments]
+
     def execute_finite_fifo_acquisition(self, num_measurements: int) -> List[Measurement]:
         """Carry out a finite number of FIFO mode measurements and then stop the acquisitions.
 
@@ -113,8 +158,8 @@ class AbstractSpectrumDigitiser(
         returning the acquired waveforms. After being called, it will wait for the requested number of triggers to be
         received, generating the correct number of measurements. It retrieves each measurement's waveforms from the
         `TransferBuffer` as they arrive. Once the requested number of measurements have been received, the acquisition
-        is terminated and the waveforms are returned. The device must be configured in SPC_REC_FIFO_MULTI or
-        SPC_REC_FIFO_AVERAGE acquisition mode.
+        is terminated and the waveforms are returned. The device must be configured in SPC_REC_FIFO_MULTI,
+        SPC_REC_FIFO_AVERAGE or SPC_REC_FIFO_ABA acquisition mode.
 
         Args:
             num_measurements (int): The number of measurements to carry out.
@@ -130,14 +175,61 @@ class AbstractSpectrumDigitiser(
                 "Number of measurements in a finite FIFO acquisition must be a multiple of the "
                 " batch size configured using AbstractSpectrumDigitiser.configure_acquisition()."
             )
+        return list(self.iter_measurements(max_frames=num_measurements))
+
+    def iter_measurements(
+        self, max_frames: Optional[int] = None, duration_in_s: Optional[float] = None, raw_timestamps: bool = False
+    ) -> Generator[Measurement, None, None]:
+        """Start a continuous FIFO acquisition and lazily yield its measurements as they arrive:
+
+            for measurement in card.iter_measurements(duration_in_s=60):
+                process(measurement)
+
+        Unlike `execute_finite_fifo_acquisition()`, measurements are not collected into a list, so memory use does not
+        grow with the length of the acquisition. Measurements are read from the card one batch at a time. The
+        acquisition is stopped once `max_frames` measurements have been yielded or `duration_in_s` has elapsed, or when
+        the generator is closed (e.g. by breaking out of the loop) or garbage collected. The device must be configured in
+        SPC_REC_FIFO_MULTI, SPC_REC_FIFO_AVERAGE or SPC_REC_FIFO_ABA acquisition mode.
+
+        Args:
+            max_frames (Optional[int]): The number of measurements after which to stop. If None, there is no limit.
+            duration_in_s (Optional[float]): The time after which to stop, measured from the start of the acquisition.
+                The batch being read when the time elapses is still yielded. If None, there is no limit.
+            raw_timestamps (bool): If True, the `timestamp` of each Measurement is left as None, and only its raw
+                `timestamp_in_samples` and `timestamp_reference` are set, saving the creation of a datetime per
+                acquisition. The raw timestamps of many measurements can be converted at once with
+                `TimestampReference.samples_to_ns()`.
+
+        Returns:
+            measurements (Generator[Measurement, None, None]): Each Measurement holds the waveforms of one acquisition, as in
+                `execute_finite_fifo_acquisition()`.
+        """
         self.execute_continuous_fifo_acquisition()
-        measurements = []
-        for _ in range(num_measurements // self.batch_size):
-            measurements += [
-                Measurement(waveforms=frame, timestamp=self.get_timestamp()) for frame in self.get_waveforms()
-            ]
-        self.stop()
-        return measurements
+        start_time = monotonic()
+        num_frames = 0
+        try:
+            while max_frames is None or num_frames < max_frames:
+                if duration_in_s is not None and monotonic() - start_time > duration_in_s:
+                    break
+                batch = self.get_waveforms()
+                timestamps_in_samples = self.get_batch_timestamps_in_samples()
+                reference = self.timestamp_reference
+                for acquisition_num, acquisition in enumerate(batch):
+                    if timestamps_in_samples is None or reference is None:
+                        yield Measurement(waveforms=acquisition, timestamp=None)
+                    else:
+                        timestamp_in_samples = int(timestamps_in_samples[acquisition_num])
+                        yield Measurement(
+                            waveforms=acquisition,
+                            timestamp=None if raw_timestamps else reference.samples_to_datetime(timestamp_in_samples),
+                            timestamp_in_samples=timestamp_in_samples,
+                            timestamp_reference=reference,
+                        )
+                    num_frames += 1
+                    if max_frames is not None and num_frames >= max_frames:
+                        break
+        finally:
+            self.stop()
 
     def execute_continuous_fifo_acquisition(self) -> None:
         """Start a continuous FIFO mode acquisition.
@@ -147,13 +239,64 @@ class AbstractSpectrumDigitiser(
         instantaneously. The acquired waveforms must then be read out of the transfer buffer in a loop using the
         `get_waveforms()` method. Waveforms must be read at least as fast as they are being acquired.
         The FIFO acquisition and streaming will continue until `stop_acquisition()` is called. The device
-        must be configured in SPC_REC_FIFO_MULTI or SPC_REC_FIFO_AVERAGE acquisition mode."""
-        if self._acquisition_mode not in (AcquisitionMode.SPC_REC_FIFO_MULTI, AcquisitionMode.SPC_REC_FIFO_AVERAGE):
+        must be configured in SPC_REC_FIFO_MULTI, SPC_REC_FIFO_AVERAGE or SPC_REC_FIFO_ABA acquisition mode."""
+        if self._acquisition_mode not in FIFO_ACQUISITION_MODES:
             raise SpectrumWrongAcquisitionMode(
-                "Set the acquisition mode to SPC_REC_FIFO_MULTI or SPC_REC_FIFO_AVERAGE using "
+                "Set the acquisition mode to SPC_REC_FIFO_MULTI, SPC_REC_FIFO_AVERAGE or SPC_REC_FIFO_ABA using "
                 "configure_acquisition() or set_acquisition_mode() before executing "
                 "a fifo mode acquisition."
             )
         self.define_transfer_buffer()
         self.start()
         self.start_transfer()
+
+    async def start_async(self) -> None:
+        """Awaitable counterpart of `start()`, which runs in the event loop's default executor so that register writes
+        (network round trips for networked devices) do not block the event loop."""
+        await get_running_loop().run_in_executor(None, self.start)
+
+    async def stop_async(self) -> None:
+        """Awaitable counterpart of `stop()`. See `start_async()`."""
+        await get_running_loop().run_in_executor(None, self.stop)
+
+    async def execute_continuous_fifo_acquisition_async(self) -> None:
+        """Awaitable counterpart of `execute_continuous_fifo_acquisition()`. See `start_async()`."""
+        await get_running_loop().run_in_executor(None, self.execute_continuous_fifo_acquisition)
+
+    async def wait_for_acquisition_to_complete_async(self) -> None:
+        """Awaitable counterpart of `wait_for_acquisition_to_complete()`, which waits in the event loop's default
+        executor instead of blocking the event loop."""
+        await get_running_loop().run_in_executor(None, self.wait_for_acquisition_to_complete)
+
+    async def get_waveforms_async(self) -> List[List[NDArray[floating]]]:
+        """Awaitable counterpart of `get_waveforms()`, which waits for the samples to be transferred in the event loop's
+        default executor instead of blocking the event loop. Calls should not overlap: await each call before making
+        the next one."""
+        return await get_running_loop().run_in_executor(None, self.get_waveforms)
+
+    async def get_waveform_array_async(self) -> NDArray[floating]:
+        """Awaitable counterpart of `get_waveform_array()`. See `get_waveforms_async()`."""
+        return await get_running_loop().run_in_executor(None, self.get_waveform_array)
+
+    async def stream(self, max_frames: Optional[int] = None) -> AsyncIterator[NDArray[floating]]:
+        """Start a continuous FIFO acquisition and asynchronously iterate over its frames:
+
+            async for frame in card.stream():
+                await process(frame)
+
+        Each frame is a batch of waveforms as returned by `get_waveform_array()`, with shape (batch_size,
+        num_enabled_channels, acquisition_length_in_samples). Waiting for each frame happens in the event loop's default
+        executor. The acquisition is stopped when the iteration finishes, is broken out of or is cancelled.
+
+        Args:
+            max_frames (Optional[int]): The number of frames after which to stop. If None, continue until the iteration
+                is stopped.
+        """
+        await self.execute_continuous_fifo_acquisition_async()
+        try:
+            num_frames = 0
+            while max_frames is None or num_frames < max_frames:
+                yield await self.get_waveform_array_async()
+                num_frames += 1
+        finally:
+            await self.stop_async()
@@ -0,0 +1,68 @@
+"""Provides a dataclass holding the static settings of a digitiser acquisition, frozen when the acquisition starts."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from dataclasses import dataclass
+from typing import Tuple
+
+from numpy import dtype
+
+from spectrumdevice.settings import AcquisitionMode, VoltageConversionCoefficients
+
+
+@dataclass(frozen=True, eq=False)
+class AcquisitionPlan:
+    """A snapshot of the settings of a `SpectrumDigitiserCard` that do not change while an acquisition is running. It is
+    created when the acquisition is started (or its transfer buffer defined), so that reading acquired samples does not
+    require any of these settings to be read from the card again."""
+
+    acquisition_mode: AcquisitionMode
+    """The acquisition mode of the card."""
+    acquisition_length_in_samples: int
+    """The length of each acquisition, per channel, in samples."""
+    batch_size: int
+    """The number of acquisitions returned by each call to `get_waveforms()`."""
+    enabled_channel_nums: Tuple[int, ...]
+    """The indices of the enabled channels, in the order in which the card interleaves their samples."""
+    bytes_per_sample: int
+    """The number of bytes occupied by each sample in the transfer buffer. In averaging modes, this is
+    `AVERAGED_BYTES_PER_SAMPLE`, as the card transfers the 32-bit sum of each sample."""
+    number_of_averages: int
+    """The number of acquisitions summed by the card into each transferred acquisition. 1 if not in an averaging
+    mode."""
+    timeout_in_ms: int
+    """The time to wait for new samples before timing out. 0 means wait forever."""
+    voltage_conversion: VoltageConversionCoefficients
+    """The coefficients that convert the raw ADC codes (or, in averaging modes, the sums of raw ADC codes) of each
+    enabled channel to volts."""
+    output_dtype: dtype
+    """The floating point type of the voltage waveforms returned by `get_waveforms()`."""
+    gate_length_alignment_in_samples: int = 1
+    """In SPC_REC_FIFO_GATE mode, the number of samples recorded while the gate is open is rounded up to a multiple of
+    this."""
+
+    @property
+    def num_enabled_channels(self) -> int:
+        return len(self.enabled_channel_nums)
+
+    @property
+    def sample_dtype(self) -> dtype:
+        """The integer type of the raw samples in the transfer buffer."""
+        return dtype(f"int{8 * self.bytes_per_sample}")
+
+    @property
+    def num_samples_per_acquisition(self) -> int:
+        """The number of samples in each acquisition, across all enabled channels."""
+        return self.acquisition_length_in_samples * self.num_enabled_channels
+
+    @property
+    def num_samples_per_batch(self) -> int:
+        """The number of samples in each batch of acquisitions, across all enabled channels."""
+        return self.num_samples_per_acquisition * self.batch_size
+
+    @property
+    def num_bytes_per_batch(self) -> int:
+        """The number of bytes occupied by each batch of acquisitions in the transfer buffer."""
+        return self.num_samples_per_batch * self.bytes_per_sample
@@ -5,54 +5,99 @@
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 import datetime
 import logging
-from typing import List, Optional, Sequence, cast
+from collections import deque
+from dataclasses import dataclass
+from functools import partial
+from threading import Event, Lock
+from time import monotonic
+from typing import Deque, Generator, List, Optional, Sequence, Tuple
+from weakref import WeakSet
 
-from numpy import float_, mod, squeeze, zeros
-from numpy.typing import NDArray
+from numpy import array, ascontiguousarray, copyto, dtype, empty, float64, floating, int64, mod, ndarray, uint64
+from numpy.typing import DTypeLike, NDArray
 
 from spectrum_gmbh.py_header.regs import (
     M2CMD_CARD_WAITREADY,
+    M2CMD_DATA_STARTDMA,
+    M2CMD_EXTRA_POLL,
+    SPC_ABA_AVAIL_CARD_LEN,
+    SPC_ABA_AVAIL_USER_LEN,
+    SPC_ABA_AVAIL_USER_POS,
+    SPC_ABADIVIDER,
+    SPC_AVAILABADIVIDER_MAX,
+    SPC_AVAILABADIVIDER_MIN,
+    SPC_AVAILABADIVIDER_STEP,
     SPC_AVERAGES,
     SPC_CARDMODE,
     SPC_DATA_AVAIL_CARD_LEN,
     SPC_DATA_AVAIL_USER_LEN,
     SPC_DATA_AVAIL_USER_POS,
+    SPC_GATE_LEN_ALIGNMENT,
     SPC_M2CMD,
     SPC_MEMSIZE,
     SPC_MIINST_CHPERMODULE,
     SPC_MIINST_MODULES,
     SPC_POSTTRIGGER,
+    SPC_PRETRIGGER,
     SPC_SEGMENTSIZE,
     TYP_SERIESMASK,
     TYP_M2PEXPSERIES,
 )
 from spectrumdevice.devices.abstract_device import AbstractSpectrumCard
 from spectrumdevice.devices.digitiser.abstract_spectrum_digitiser import AbstractSpectrumDigitiser
+from spectrumdevice.devices.digitiser.acquisition_plan import AcquisitionPlan
 from spectrumdevice.devices.digitiser.digitiser_interface import (
     SpectrumDigitiserAnalogChannelInterface,
     SpectrumDigitiserIOLineInterface,
 )
 from spectrumdevice.devices.digitiser.digitiser_channel import SpectrumDigitiserAnalogChannel, SpectrumDigitiserIOLine
+from spectrumdevice.devices.digitiser.zero_copy_frame import ZeroCopyFrame
 from spectrumdevice.devices.spectrum_timestamper import Timestamper
 from spectrumdevice.exceptions import (
+    SpectrumAcquisitionStopped,
     SpectrumCardIsNotADigitiser,
+    SpectrumInvalidParameterValue,
+    SpectrumNoTimestampsAvailableError,
     SpectrumNoTransferBufferDefined,
+    SpectrumTransferBufferFull,
+    SpectrumTransferTimeout,
+    SpectrumWrongAcquisitionMode,
 )
-from spectrumdevice.settings import TransferBuffer
+from spectrumdevice.settings import TransferBuffer, VoltageConversionCoefficients, validate_output_dtype
 from spectrumdevice.settings.card_dependent_properties import CardType, get_memsize_step_size
-from spectrumdevice.settings.device_modes import AcquisitionMode
+from spectrumdevice.settings.device_modes import (
+    AVERAGING_ACQUISITION_MODES,
+    FIFO_ACQUISITION_MODES,
+    GATED_ACQUISITION_MODES,
+    STANDARD_ACQUISITION_MODES,
+    AcquisitionMode,
+)
+from spectrumdevice.settings.timestamps import TimestampReadoutMode, TimestampReference
 from spectrumdevice.settings.transfer_buffer import (
     BufferDirection,
     BufferType,
+    create_aba_acquisition_transfer_buffer,
     create_samples_acquisition_transfer_buffer,
     set_transfer_buffer,
     PAGE_SIZE_IN_BYTES,
     DEFAULT_NOTIFY_SIZE_IN_PAGES,
+    DEFAULT_FIFO_BUFFER_SIZE_IN_BATCHES,
+    DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+    AVERAGED_BYTES_PER_SAMPLE,
 )
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _FIFOClaim:
+    """Bytes of the transfer buffer that have been read or handed out by the card object, but not yet released back to
+    the card."""
+
+    num_bytes: int
+    released: bool = False
+
+
 class SpectrumDigitiserCard(
     AbstractSpectrumCard[SpectrumDigitiserAnalogChannelInterface, SpectrumDigitiserIOLineInterface],
     AbstractSpectrumDigitiser,
@@ -73,7 +118,19 @@ class SpectrumDigitiserCard(
             raise SpectrumCardIsNotADigitiser(self.type)
         self._acquisition_mode = self.acquisition_mode
         self._timestamper: Optional[Timestamper] = None
+        self._timestamp_buffer_size_in_timestamps = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
+        self._timestamp_readout_mode = TimestampReadoutMode.POLL
         self._batch_size = 1
+        self._output_dtype = dtype(float64)
+        self._transfer_buffer_size_in_batches = DEFAULT_FIFO_BUFFER_SIZE_IN_BATCHES
+        self._fifo_claims: Deque[_FIFOClaim] = deque()
+        self._num_claimed_fifo_bytes = 0
+        self._fifo_claims_lock = Lock()
+        self._acquisition_stopped = Event()
+        self._unreleased_frames: "WeakSet[ZeroCopyFrame]" = WeakSet()
+        self._acquisition_plan: Optional[AcquisitionPlan] = None
+        self._aba_transfer_buffer: Optional[TransferBuffer] = None
+        self._gate_start_times_in_samples: Deque[int] = deque()
 
     def _init_analog_channels(self) -> Sequence[SpectrumDigitiserAnalogChannelInterface]:
         num_modules = self.read_spectrum_device_register(SPC_MIINST_MODULES)
@@ -89,8 +146,79 @@ class SpectrumDigitiserCard(
         else:
             raise NotImplementedError("Don't know how many IO lines other types of card have. Only M2P series.")
 
-    def enable_timestamping(self) -> None:
-        self._timestamper = Timestamper(self, self._handle)
+    def enable_timestamping(
+        self,
+        buffer_size_in_timestamps: int = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+        readout_mode: TimestampReadoutMode = TimestampReadoutMode.POLL,
+    ) -> None:
+        """Enable the timestamping of triggers, so that the time of each acquisition can be read.
+
+        Args:
+            buffer_size_in_timestamps (int): The length of the ring buffer into which the card transfers timestamps.
+                Must be a multiple of 256. At high trigger rates, or with large batches, a longer ring is needed to hold
+                the timestamps recorded between reads. If it fills up, timestamps are lost (see `timestamps_lost`).
+            readout_mode (`TimestampReadoutMode`): POLL (default) to have the driver poll the card for new timestamps,
+                or NOTIFY to transfer them by DMA along with the samples, so that reading them waits for a notification
+                instead of polling. NOTIFY is not available in SPC_REC_FIFO_ABA mode, in which the slow "A" stream is
+                polled.
+        """
+        self._timestamp_buffer_size_in_timestamps = buffer_size_in_timestamps
+        self._timestamp_readout_mode = readout_mode
+        self._timestamper = Timestamper(self, self._handle, buffer_size_in_timestamps, readout_mode)
+
+    @property
+    def timestamps_lost(self) -> bool:
+        """True if the timestamp transfer buffer has overrun since timestamping was enabled, so that some acquisitions
+        have no timestamp and the timestamps of later acquisitions are misaligned. Enable timestamping with a larger
+        buffer, or read timestamps more often, to avoid this."""
+        return self._timestamper is not None and self._timestamper.timestamps_lost
+
+    def start(self) -> None:
+        """Start the device. See `AbstractSpectrumDevice.start()`. The static settings of the acquisition are frozen into
+        the card's `acquisition_plan` first, so changes made to them after this point only take effect once the device
+        is started again. In SPC_REC_FIFO_GATE mode, timestamping is enabled if it is not already, as the lengths of
+        the acquisitions are calculated from the gate timestamps."""
+        self._prepare_to_start()
+        super().start()
+
+    def _prepare_to_start(self) -> None:
+        """Freeze the acquisition plan and bring the timestamp reference up to date. Called by `start()`, or for each
+        child card by a StarHub."""
+        self._acquisition_stopped.clear()
+        plan = self._freeze_acquisition_plan()
+        if plan.acquisition_mode in GATED_ACQUISITION_MODES and self._timestamper is None:
+            self.enable_timestamping(self._timestamp_buffer_size_in_timestamps, self._timestamp_readout_mode)
+        elif self._timestamper is not None:
+            self._timestamper.refresh_reference()
+
+    def stop(self) -> None:
+        """Stop the device. See `AbstractSpectrumDevice.stop()`. Calls to `get_waveforms()` (and the other methods that
+        read samples in FIFO mode) that are waiting for samples in other threads then raise `SpectrumAcquisitionStopped`
+        instead of waiting forever if the timeout is 0."""
+        self._abort_fifo_waits()
+        super().stop()
+
+    def _abort_fifo_waits(self) -> None:
+        """Called when the card is stopped, directly or by a StarHub."""
+        self._acquisition_stopped.set()
+
+    def start_transfer(self) -> None:
+        """See `AbstractSpectrumCard.start_transfer()`. In SPC_REC_FIFO_ABA mode, polling of the slow "A" stream into the
+        ABA transfer buffer is also started. If timestamps are read in NOTIFY mode, their transfer is also started."""
+        notify_timestamps = (
+            self._timestamper is not None and self._timestamper.readout_mode == TimestampReadoutMode.NOTIFY
+        )
+        if self.acquisition_plan.acquisition_mode == AcquisitionMode.SPC_REC_FIFO_ABA:
+            if notify_timestamps:
+                raise SpectrumWrongAcquisitionMode(
+                    "Timestamps cannot be read in NOTIFY mode in SPC_REC_FIFO_ABA mode. Enable timestamping in POLL "
+                    "mode instead."
+                )
+            self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_DATA_STARTDMA | M2CMD_EXTRA_POLL)
+        elif notify_timestamps:
+            self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_DATA_STARTDMA | TimestampReadoutMode.NOTIFY.value)
+        else:
+            super().start_transfer()
 
     def wait_for_acquisition_to_complete(self) -> None:
         """Blocks until the current acquisition has finished, or the timeout is reached.
@@ -99,13 +227,15 @@ class SpectrumDigitiserCard(
             to `wait_for_acquisition_to_complete()` returns, the newly acquired samples are in the on_device buffer and
             ready for transfer to the `TransferBuffer` using `start_transfer()`.
 
+        In Standard Multi mode (SPC_REC_STD_MULTI), this returns once all `batch_size` segments have been recorded.
+
         In FIFO mode (SPC_REC_FIFO_MULTI), the card will continue to acquire samples until
             `stop()` is called, so `wait_for_acquisition_to_complete()` should not be used.
 
         """
         self.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WAITREADY)
 
-    def get_waveforms(self) -> List[List[NDArray[float_]]]:
+    def get_waveforms(self) -> List[List[NDArray[floating]]]:
         """Get a list of the most recently transferred waveforms, in channel order.
 
         This method copies and reshapes the samples in the `TransferBuffer` into a list of lists of 1D NumPy arrays
@@ -119,73 +249,444 @@ class SpectrumDigitiserCard(
         received, so the loop will run at the same rate as the acquisition (in SPC_REC_FIFO_MULTI mode, for example,
         this would the rate at which your trigger source was running).
 
+        In gated FIFO mode (SPC_REC_FIFO_GATE), each acquisition holds the samples recorded while the gate was open,
+        plus the pre- and post-trigger samples recorded around it, so the waveforms of different acquisitions have
+        different lengths. The length of each acquisition is calculated from the timestamps of the opening and closing
+        of its gate. `get_timestamp()` returns the time at which each gate opened, one acquisition at a time.
+
         Returns:
-             waveforms (List[List[NDArray[float_]]]): A list of lists of 1D numpy arrays, one inner list per acquisition
+             waveforms (List[List[NDArray[floating]]]): A list of lists of 1D numpy arrays, one inner list per acquisition
              and one array per enabled channel, in channel order. To average the acquisitions:
                 `np.array(waveforms).mean(axis=0)`
 
         """
+        plan = self.acquisition_plan
+        if plan.acquisition_mode in GATED_ACQUISITION_MODES:
+            return [
+                list(plan.voltage_conversion.convert(raw_acquisition, plan.output_dtype))
+                for raw_acquisition in self._read_gated_raw_waveforms(plan)
+            ]
+        return [list(acquisition) for acquisition in self.get_waveform_array()]
+
+    def get_waveform_array(self, out: Optional[NDArray[floating]] = None) -> NDArray[floating]:
+        """Get the most recently transferred batch of waveforms as a single NumPy array.
+
+        This method blocks and reads samples in the same way as `get_waveforms()`, but returns the waveforms in one
+        C-contiguous array instead of a list of lists of arrays. The conversion from ADC codes to volts is carried out in
+        a single broadcast operation using the per-channel `voltage_conversion_coefficients`, rather than once per
+        channel per acquisition.
+
+        Args:
+            out (Optional[NDArray[floating]]): An array of shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples) and type `output_dtype` into which to write the waveforms, for example a
+                preallocated array reused for every batch, or a slice of an array holding the channels of several cards.
+                If not provided, a new array is created.
+
+        Returns:
+            waveforms (NDArray[floating]): Array of voltage waveforms, with shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples). Channels are in channel order.
+        """
+        plan = self.acquisition_plan
+        return plan.voltage_conversion.convert(self._read_raw_waveforms(plan), plan.output_dtype, out=out)
+
+    def get_raw_waveform_array(self, out: Optional[ndarray] = None) -> ndarray:
+        """Get the most recently transferred batch of waveforms as raw ADC codes, without converting them to volts.
+
+        This method blocks and reads samples in the same way as `get_waveform_array()`, but returns the samples in the
+        integer format in which they were transferred by the card (e.g. int16), which occupies a quarter of the memory of
+        float64 voltages. Use `voltage_conversion_coefficients` to convert the samples to volts later, if required.
+
+        Args:
+            out (Optional[ndarray]): An array of shape (batch_size, num_enabled_channels, acquisition_length_in_samples)
+                and the integer type of the raw samples into which to write them. If not provided, a new array is
+                created.
+
+        Returns:
+            raw_waveforms (ndarray): `out`, or a new C-contiguous integer array of raw samples, with shape (batch_size,
+                num_enabled_channels, acquisition_length_in_samples). Channels are in channel order.
+        """
+        raw_waveforms = self._read_raw_waveforms(self.acquisition_plan)
+        if out is None:
+            return ascontiguousarray(raw_waveforms)
+        if out.shape != raw_waveforms.shape or out.dtype != raw_waveforms.dtype:
+            raise ValueError(
+                f"Output array must have shape {raw_waveforms.shape} and type {raw_waveforms.dtype}, not {out.shape} "
+                f"and {out.dtype}."
+            )
+        copyto(out, raw_waveforms)
+        return out
+
+    def get_aba_waveform_array(self) -> NDArray[floating]:
+        """Get the samples of the slow "A" stream that have been transferred since the last call, in SPC_REC_FIFO_ABA
+        mode. The fast "B" segments acquired on each trigger are read as usual, using `get_waveforms()` or
+        `get_waveform_array()`, so the two streams can be read at different rates:
+
+            card.execute_continuous_fifo_acquisition()
+            for _ in range(100):
+                segments = card.get_waveform_array()  # blocks until the next batch of B segments has arrived
+                background = card.get_aba_waveform_array()  # returns immediately with whatever A samples have arrived
+
+        Unlike `get_waveform_array()`, this method does not block. The A stream is sampled continuously at the sample
+        rate divided by `aba_divider`, and is converted to volts using the same coefficients as the B segments.
+
+        Returns:
+            waveforms (NDArray[floating]): Array of voltage waveforms, with shape (num_enabled_channels,
+                num_available_samples). num_available_samples may be 0.
+        """
+        plan = self.acquisition_plan
+        return plan.voltage_conversion.convert(self.get_raw_aba_waveform_array(), plan.output_dtype)
+
+    def get_raw_aba_waveform_array(self) -> ndarray:
+        """Get the samples of the slow "A" stream that have been transferred since the last call as raw ADC codes. See
+        `get_aba_waveform_array()`.
+
+        Returns:
+            raw_waveforms (ndarray): C-contiguous integer array of raw samples, with shape (num_enabled_channels,
+                num_available_samples).
+        """
+        if self._aba_transfer_buffer is None:
+            raise SpectrumNoTransferBufferDefined("Cannot find an ABA transfer buffer. Is the card in ABA mode?")
+        plan = self.acquisition_plan
+        itemsize = self._aba_transfer_buffer.data_array.itemsize
+        num_bytes_per_sample_across_channels = plan.num_enabled_channels * itemsize
+        num_available_bytes = self.read_spectrum_device_register(SPC_ABA_AVAIL_USER_LEN)
+        position_of_available_bytes = self.read_spectrum_device_register(SPC_ABA_AVAIL_USER_POS)
+        # only read whole samples of every channel, leaving the rest for the next call
+        num_bytes = num_available_bytes - num_available_bytes % num_bytes_per_sample_across_channels
+        raw_samples = empty(num_bytes // itemsize, dtype=self._aba_transfer_buffer.data_array.dtype)
+        _copy_from_ring_buffer(self._aba_transfer_buffer, position_of_available_bytes, num_bytes, raw_samples)
+        if num_bytes > 0:
+            self.write_to_spectrum_device_register(SPC_ABA_AVAIL_CARD_LEN, num_bytes)
+        return ascontiguousarray(raw_samples.reshape((-1, plan.num_enabled_channels)).T)
+
+    @property
+    def voltage_conversion_coefficients(self) -> VoltageConversionCoefficients:
+        """The per-channel coefficients that convert the raw samples returned by `get_raw_waveform_array()` (or held by
+        a `ZeroCopyFrame`) to volts, as frozen in the `acquisition_plan`. In averaging modes, the raw samples are
+        32-bit sums, and the scales include the division by the number of averages.
+
+        Returns:
+            coefficients (`VoltageConversionCoefficients`): The scale and offset of each enabled channel.
+        """
+        return self.acquisition_plan.voltage_conversion
+
+    def _read_raw_waveforms(self, plan: AcquisitionPlan) -> ndarray:
+        """Read the next batch of raw samples and return them as a (batch, channel, sample) view."""
+        _raise_if_gated(plan)
+        raw_samples = self._read_raw_samples(plan)
+        return raw_samples.reshape(
+            (plan.batch_size, plan.acquisition_length_in_samples, plan.num_enabled_channels)
+        ).transpose((0, 2, 1))
+
+    def _read_raw_samples(self, plan: AcquisitionPlan) -> ndarray:
+        """Copy the next batch of raw samples out of the transfer buffer, blocking in FIFO mode until they have all been
+        transferred. Returns a 1D array of interleaved samples."""
         if self._transfer_buffer is None:
             raise SpectrumNoTransferBufferDefined("Cannot find a samples transfer buffer")
 
+        if plan.acquisition_mode in STANDARD_ACQUISITION_MODES:
+            raw_samples = self._transfer_buffer.copy_contents()
+
+        elif plan.acquisition_mode in FIFO_ACQUISITION_MODES:
+            raw_samples = self._read_fifo_samples(plan.num_samples_per_batch)
+
+        else:
+            raise ValueError("AcquisitionMode not recognised")
+
+        return raw_samples
+
+    def _read_fifo_samples(self, num_samples: int) -> ndarray:
+        """Copy the next `num_samples` raw samples out of the FIFO transfer buffer, blocking until they have all been
+        transferred. Returns a 1D array of interleaved samples."""
+        if self._transfer_buffer is None:
+            raise SpectrumNoTransferBufferDefined("Cannot find a samples transfer buffer")
+        itemsize = self._transfer_buffer.data_array.itemsize
+        buffer_length_in_bytes = self._transfer_buffer.data_array_length_in_bytes
+        num_expected_bytes = num_samples * itemsize
+        raw_samples = empty(num_samples, dtype=self._transfer_buffer.data_array.dtype)
         num_read_bytes = 0
-        num_samples_per_frame = self.acquisition_length_in_samples * len(self.enabled_analog_channel_nums)
-        num_expected_bytes_per_frame = num_samples_per_frame * self._transfer_buffer.data_array.itemsize
-        raw_samples = zeros(num_samples_per_frame * self._batch_size, dtype=self._transfer_buffer.data_array.dtype)
+        while num_read_bytes < num_expected_bytes:
+            # Wait for the rest of the samples, rather than copying them one notify chunk at a time, unless the transfer
+            # buffer is too small to hold them all at once. Don't allow reading over the end of the requested samples.
+            num_remaining_bytes = num_expected_bytes - num_read_bytes
+            position_of_available_bytes, num_available_bytes, claim = self._claim_next_fifo_bytes(
+                max_num_bytes=num_remaining_bytes, min_num_bytes=min(num_remaining_bytes, buffer_length_in_bytes)
+            )
+            try:
+                self._copy_from_transfer_buffer(
+                    position_of_available_bytes, num_available_bytes, raw_samples[num_read_bytes // itemsize :]
+                )
+            finally:
+                self._release_fifo_claim(claim)
 
-        if self.acquisition_mode in (AcquisitionMode.SPC_REC_STD_SINGLE, AcquisitionMode.SPC_REC_STD_AVERAGE):
-            raw_samples = self._transfer_buffer.copy_contents()
+            num_read_bytes += num_available_bytes
+        return raw_samples
 
-        elif self.acquisition_mode in (AcquisitionMode.SPC_REC_FIFO_MULTI, AcquisitionMode.SPC_REC_FIFO_AVERAGE):
-            self.wait_for_transfer_chunk_to_complete()
+    def _read_gated_raw_waveforms(self, plan: AcquisitionPlan) -> List[ndarray]:
+        """Read the next batch of acquisitions in SPC_REC_FIFO_GATE mode. The timestamps of the opening and closing of
+        each gate are read first, to find the number of samples in the acquisition. Returns a list of (channel, sample)
+        arrays, one per acquisition."""
+        if self._timestamper is None:
+            raise SpectrumNoTimestampsAvailableError("Timestamping must be enabled to read gated acquisitions.")
+        timeout_in_s = 1e-3 * plan.timeout_in_ms
+        alignment = plan.gate_length_alignment_in_samples
+        raw_acquisitions = []
+        for _ in range(plan.batch_size):
+            gate_start, gate_end = (int(t) for t in self._timestamper.get_timestamps_in_samples(2, timeout_in_s))
+            gate_length_in_samples = -(-(gate_end - gate_start) // alignment) * alignment
+            # acquisition_length_in_samples is the sum of the pre- and post-trigger lengths
+            length_in_samples = plan.acquisition_length_in_samples + gate_length_in_samples
+            raw_samples = self._read_fifo_samples(length_in_samples * plan.num_enabled_channels)
+            raw_acquisitions.append(raw_samples.reshape((length_in_samples, plan.num_enabled_channels)).T)
+            self._gate_start_times_in_samples.append(gate_start)
+        return raw_acquisitions
 
-            while num_read_bytes < (num_expected_bytes_per_frame * self._batch_size):
-                num_available_bytes = self.read_spectrum_device_register(SPC_DATA_AVAIL_USER_LEN)
-                position_of_available_bytes = self.read_spectrum_device_register(SPC_DATA_AVAIL_USER_POS)
+    def get_zero_copy_frame(self) -> ZeroCopyFrame:
+        """Get the oldest unread batch of acquisitions without copying it out of the `TransferBuffer`.
 
-                # Don't allow reading over the end of the transfer buffer
-                if (
-                    position_of_available_bytes + num_available_bytes
-                ) > self._transfer_buffer.data_array_length_in_bytes:
-                    num_available_bytes = self._transfer_buffer.data_array_length_in_bytes - position_of_available_bytes
+        This is an alternative to `get_waveforms()` for applications where copying and converting every sample is too
+        expensive. It blocks in the same way as `get_waveforms()`, but returns a `ZeroCopyFrame` containing a read-only
+        view of the raw samples in the transfer buffer instead of voltage waveforms. In FIFO mode, the space occupied by
+        the frame is only handed back to the card once the frame is released, either by calling
+        `ZeroCopyFrame.release()` or by using the frame as a context manager:
 
-                # Don't allow reading over the end of the current acquisition:
-                if (num_read_bytes + num_available_bytes) > (num_expected_bytes_per_frame * self._batch_size):
-                    num_available_bytes = (num_expected_bytes_per_frame * self._batch_size) - num_read_bytes
+            with card.get_zero_copy_frame() as frame:
+                process(frame.samples)
 
-                num_available_samples = num_available_bytes // self._transfer_buffer.data_array.itemsize
-                num_read_samples = num_read_bytes // self._transfer_buffer.data_array.itemsize
+        Arrays obtained from `frame.samples` alias the transfer buffer, so they must not be used after the frame has
+        been released. The card always reclaims the oldest space first, so releasing a frame out of order only hands its
+        space back once all the frames received before it have also been released. In FIFO mode, the transfer buffer
+        must be large enough to hold at least two batches, so that the card can keep writing while a frame is held. If
+        the batch wraps around the end of the transfer buffer, it is copied into a new array. Frames that are still held
+        when the transfer buffer is redefined (e.g. when a new acquisition is started) are marked as released.
 
-                raw_samples[
-                    num_read_samples : num_read_samples + num_available_samples
-                ] = self._transfer_buffer.read_chunk(position_of_available_bytes, num_available_bytes)
-                self.write_to_spectrum_device_register(SPC_DATA_AVAIL_CARD_LEN, num_available_bytes)
+        Returns:
+             frame (`ZeroCopyFrame`): The batch of raw samples, with shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples).
+        """
+        if self._transfer_buffer is None:
+            raise SpectrumNoTransferBufferDefined("Cannot find a samples transfer buffer")
 
-                num_read_bytes += num_available_bytes
+        plan = self.acquisition_plan
+        _raise_if_gated(plan)
+        num_samples_per_batch = plan.num_samples_per_batch
+        num_bytes_per_batch = num_samples_per_batch * self._transfer_buffer.data_array.itemsize
+        shape_in_columns = (plan.batch_size, plan.acquisition_length_in_samples, plan.num_enabled_channels)
 
-        waveforms_in_columns = raw_samples.reshape(
-            (self._batch_size, self.acquisition_length_in_samples, len(self.enabled_analog_channel_nums))
-        )
+        if plan.acquisition_mode in STANDARD_ACQUISITION_MODES:
+            # The card does not write to the transfer buffer again until the next acquisition, so nothing to release
+            samples_in_columns = self._transfer_buffer.data_array[:num_samples_per_batch].reshape(shape_in_columns)
+            frame = ZeroCopyFrame(samples_in_columns.transpose((0, 2, 1)), _do_nothing)
 
-        repeat_acquisitions = []
-        for n in range(self._batch_size):
-            repeat_acquisitions.append(
-                [
-                    cast(
-                        SpectrumDigitiserAnalogChannel, self.analog_channels[ch_num]
-                    ).convert_raw_waveform_to_voltage_waveform(squeeze(waveform))
-                    for ch_num, waveform in zip(self.enabled_analog_channel_nums, waveforms_in_columns[n, :, :].T)
-                ]
+        elif plan.acquisition_mode in FIFO_ACQUISITION_MODES:
+            buffer_length_in_bytes = self._transfer_buffer.data_array_length_in_bytes
+            if 2 * num_bytes_per_batch > buffer_length_in_bytes:
+                raise ValueError(
+                    f"The transfer buffer ({buffer_length_in_bytes} bytes) must be able to hold at least two batches "
+                    f"({2 * num_bytes_per_batch} bytes) for zero-copy frames to be used."
+                )
+
+            position_of_batch, _, claim = self._claim_next_fifo_bytes(
+                max_num_bytes=num_bytes_per_batch, min_num_bytes=num_bytes_per_batch
             )
+            try:
+                if position_of_batch + num_bytes_per_batch <= buffer_length_in_bytes:
+                    raw_samples = self._transfer_buffer.read_chunk(position_of_batch, num_bytes_per_batch)
+                else:
+                    # The batch wraps around the end of the buffer, so a copy is unavoidable
+                    raw_samples = empty(num_samples_per_batch, dtype=self._transfer_buffer.data_array.dtype)
+                    self._copy_from_transfer_buffer(position_of_batch, num_bytes_per_batch, raw_samples)
+                samples_in_columns = raw_samples.reshape(shape_in_columns)
+                frame = ZeroCopyFrame(samples_in_columns.transpose((0, 2, 1)), partial(self._release_fifo_claim, claim))
+            except Exception:
+                self._release_fifo_claim(claim)
+                raise
+
+        else:
+            raise ValueError("AcquisitionMode not recognised")
+
+        with self._fifo_claims_lock:
+            self._unreleased_frames.add(frame)
+        return frame
+
+    def iter_raw_chunks(self, max_chunks: Optional[int] = None) -> Generator[ndarray, None, None]:
+        """Start a continuous SPC_REC_FIFO_SINGLE acquisition and lazily yield the stream of raw samples in fixed-size
+        chunks, straight from the transfer buffer:
+
+            for chunk in card.iter_raw_chunks():
+                process(chunk)  # e.g. write to disk, or filter
+
+        Each chunk is a read-only (num_enabled_channels, batch_size * acquisition_length_in_samples) view of a
+        `ZeroCopyFrame`, so no samples are copied unless the chunk wraps around the end of the transfer buffer. The
+        space occupied by a chunk is handed back to the card when the next chunk is requested, so chunks must be copied
+        if they are needed for longer. Consecutive chunks are contiguous in time. The acquisition is stopped once
+        `max_chunks` chunks have been yielded, or when the generator is closed or garbage collected. Use
+        `voltage_conversion_coefficients` to convert the samples to volts.
+
+        Args:
+            max_chunks (Optional[int]): The number of chunks after which to stop. If None, there is no limit.
+
+        Returns:
+            chunks (Generator[ndarray, None, None]): The chunks of raw samples, in the order in which they were
+                acquired.
+        """
+        if self.acquisition_mode != AcquisitionMode.SPC_REC_FIFO_SINGLE:
+            raise SpectrumWrongAcquisitionMode(
+                "Set the acquisition mode to SPC_REC_FIFO_SINGLE using configure_acquisition() or "
+                "set_acquisition_mode() before streaming chunks."
+            )
+        self.execute_continuous_fifo_acquisition()
+        num_chunks = 0
+        try:
+            while max_chunks is None or num_chunks < max_chunks:
+                with self.get_zero_copy_frame() as frame:
+                    # (batch, channel, sample) -> (channel, batch * sample) without copying, as the acquisitions of a
+                    # batch follow each other in the transfer buffer
+                    samples = frame.samples
+                    yield samples.transpose((1, 0, 2)).reshape((samples.shape[1], -1))
+                num_chunks += 1
+        finally:
+            self.stop()
+
+    def _copy_from_transfer_buffer(self, position_in_bytes: int, num_bytes: int, destination: ndarray) -> None:
+        """Copy bytes from the FIFO transfer buffer into the start of `destination`, as two slices if they wrap around
+        the end of the buffer."""
+        if self._transfer_buffer is None:
+            raise SpectrumNoTransferBufferDefined("Cannot find a samples transfer buffer")
+        _copy_from_ring_buffer(self._transfer_buffer, position_in_bytes, num_bytes, destination)
+
+    def _claim_next_fifo_bytes(self, max_num_bytes: int, min_num_bytes: int) -> Tuple[int, int, _FIFOClaim]:
+        """Wait until at least `min_num_bytes` bytes have been filled by the card but not yet read or handed out in a
+        `ZeroCopyFrame`, then claim up to `max_num_bytes` of them. The registers are read and the claim is made while
+        holding the claims lock, so that frames released from other threads cannot change the accounting in between.
+
+        Returns:
+            position (int): The position in the transfer buffer of the claimed bytes, in bytes.
+            num_bytes (int): The number of claimed bytes.
+            claim (`_FIFOClaim`): The claim, to be passed to `_release_fifo_claim()` once the bytes have been read.
+        """
+        if self._transfer_buffer is None:
+            raise SpectrumNoTransferBufferDefined("Cannot find a samples transfer buffer")
+        buffer_length_in_bytes = self._transfer_buffer.data_array_length_in_bytes
+        timeout_in_s = 1e-3 * self.acquisition_plan.timeout_in_ms
+        time_of_last_progress = 0.0
+        num_bytes_available_at_last_progress = -1
+
+        while True:
+            with self._fifo_claims_lock:
+                num_filled_bytes = self.read_spectrum_device_register(SPC_DATA_AVAIL_USER_LEN)
+                position_of_filled_bytes = self.read_spectrum_device_register(SPC_DATA_AVAIL_USER_POS)
+                num_available_bytes = num_filled_bytes - self._num_claimed_fifo_bytes
+                position_of_available_bytes = (
+                    position_of_filled_bytes + self._num_claimed_fifo_bytes
+                ) % buffer_length_in_bytes
+
+                if num_available_bytes >= min_num_bytes:
+                    claim = _FIFOClaim(min(num_available_bytes, max_num_bytes))
+                    self._fifo_claims.append(claim)
+                    self._num_claimed_fifo_bytes += claim.num_bytes
+                    return position_of_available_bytes, claim.num_bytes, claim
+
+                if self._num_claimed_fifo_bytes + min_num_bytes > buffer_length_in_bytes:
+                    raise SpectrumTransferBufferFull(
+                        f"{self._num_claimed_fifo_bytes} of {buffer_length_in_bytes} bytes are held by unreleased "
+                        f"frames, so {min_num_bytes} more bytes can never be transferred. Release some frames first."
+                    )
 
-        return repeat_acquisitions
+            if self._acquisition_stopped.is_set():
+                raise SpectrumAcquisitionStopped(f"{num_available_bytes} of {min_num_bytes} bytes available.")
+
+            if num_available_bytes > num_bytes_available_at_last_progress:
+                num_bytes_available_at_last_progress = num_available_bytes
+                time_of_last_progress = monotonic()
+            elif timeout_in_s > 0 and (monotonic() - time_of_last_progress) > timeout_in_s:
+                raise SpectrumTransferTimeout(
+                    f"No new samples were received within the {timeout_in_s} s timeout ({num_available_bytes} of "
+                    f"{min_num_bytes} bytes available)."
+                )
+            self.wait_for_transfer_chunk_to_complete()
+
+    def _release_fifo_claim(self, claim: _FIFOClaim) -> None:
+        """The card always reclaims the oldest bytes in the buffer, so bytes are only handed back once all the claims
+        made before them have also been released."""
+        with self._fifo_claims_lock:
+            if claim.released:
+                return
+            claim.released = True
+            num_bytes_to_release = 0
+            while self._fifo_claims and self._fifo_claims[0].released:
+                num_bytes_to_release += self._fifo_claims.popleft().num_bytes
+            if num_bytes_to_release > 0:
+                self.write_to_spectrum_device_register(SPC_DATA_AVAIL_CARD_LEN, num_bytes_to_release)
+                self._num_claimed_fifo_bytes -= num_bytes_to_release
+
+    def _reset_fifo_claims(self) -> None:
+        """Forget all outstanding claims, e.g. because the transfer buffer is being redefined for a new acquisition.
+        Frames that are still held are invalidated, because the card will overwrite the space they point to."""
+        self._gate_start_times_in_samples.clear()
+        with self._fifo_claims_lock:
+            for claim in self._fifo_claims:
+                claim.released = True
+            self._fifo_claims.clear()
+            self._num_claimed_fifo_bytes = 0
+            for frame in self._unreleased_frames:
+                frame.invalidate()
+            self._unreleased_frames.clear()
 
     def get_timestamp(self) -> Optional[datetime.datetime]:
-        """Get timestamp for the last acquisition"""
-        if self._timestamper is not None:
+        """Get timestamp for the last acquisition. In SPC_REC_FIFO_GATE mode, get the time at which the gate of the
+        oldest acquisition returned by `get_waveforms()` opened, or None if the opening times of all the acquisitions
+        have already been returned."""
+        if self._timestamper is None:
+            return None
+        elif self.acquisition_plan.acquisition_mode in GATED_ACQUISITION_MODES:
+            if not self._gate_start_times_in_samples:
+                return None
+            return self._timestamper.samples_to_datetime(self._gate_start_times_in_samples.popleft())
+        else:
             return self._timestamper.get_timestamp()
+
+    def get_batch_timestamps_in_samples(self) -> Optional[NDArray[uint64]]:
+        """Get the raw timestamps of the last batch of acquisitions returned by `get_waveforms()`, reading the timestamps
+        of the whole batch from the timestamp buffer at once. The timestamps count sample clock ticks since the
+        reference time of `timestamp_reference`, so they have the full resolution of the sample clock and can be
+        converted to absolute times for many acquisitions at once with `TimestampReference.samples_to_ns()`. In
+        SPC_REC_FIFO_GATE mode, the times at which the gates opened are returned instead.
+
+        Returns:
+            timestamps_in_samples (Optional[NDArray[uint64]]): The raw timestamp of each acquisition of the batch,
+                aligned with the acquisitions returned by `get_waveforms()`. None if timestamping is not enabled.
+        """
+        if self._timestamper is None:
+            return None
+        plan = self.acquisition_plan
+        if plan.acquisition_mode in GATED_ACQUISITION_MODES:
+            num_gates = min(plan.batch_size, len(self._gate_start_times_in_samples))
+            return array([self._gate_start_times_in_samples.popleft() for _ in range(num_gates)], dtype=uint64)
         else:
+            return self._timestamper.get_trigger_timestamps_in_samples(plan.batch_size, 1e-3 * plan.timeout_in_ms)
+
+    def get_batch_timestamps_in_ns(self) -> Optional[NDArray[int64]]:
+        """Get the trigger times of the last batch of acquisitions returned by `get_waveforms()`, reading the timestamps
+        of the whole batch from the timestamp buffer at once. This is much faster than calling `get_timestamp()` once
+        per acquisition. See `get_batch_timestamps_in_samples()`.
+
+        Returns:
+            timestamps_in_ns (Optional[NDArray[int64]]): The time of each acquisition of the batch, in nanoseconds since
+                the Unix epoch, aligned with the acquisitions returned by `get_waveforms()`. None if timestamping is not
+                enabled.
+        """
+        timestamps_in_samples = self.get_batch_timestamps_in_samples()
+        if timestamps_in_samples is None or self._timestamper is None:
             return None
+        return self._timestamper.reference.samples_to_ns(timestamps_in_samples)
+
+    @property
+    def timestamp_reference(self) -> Optional[TimestampReference]:
+        """The reference time and sample rate with which raw timestamps are converted to absolute times, captured when
+        timestamping was enabled. If the sample rate has since changed, a new reference is captured when the card is
+        next started. None if timestamping is not enabled."""
+        return self._timestamper.reference if self._timestamper is not None else None
 
     @property
     def acquisition_length_in_samples(self) -> int:
@@ -193,18 +694,25 @@ class SpectrumDigitiserCard(
 
         Returns:
             length_in_samples (int): The current recording length ('acquisition length') in samples."""
-        return self.read_spectrum_device_register(SPC_MEMSIZE)
+        return self.read_spectrum_device_register(SPC_SEGMENTSIZE)
 
     def set_acquisition_length_in_samples(self, length_in_samples: int) -> None:
         """Change the recording length (per channel). In FIFO mode, it will be quantised according to the step size
-          allowed by the connected card type.
+          allowed by the connected card type. In SPC_REC_STD_MULTI mode, this is the length of each segment, and enough
+          on-board memory is reserved for `batch_size` segments.
 
         Args:
             length_in_samples (int): The desired recording length ('acquisition length'), in samples.
         """
         length_in_samples = self._coerce_num_samples_if_fifo(length_in_samples)
         self.write_to_spectrum_device_register(SPC_SEGMENTSIZE, length_in_samples)
-        self.write_to_spectrum_device_register(SPC_MEMSIZE, length_in_samples)
+        self._set_memsize(self.acquisition_mode, length_in_samples)
+
+    def _set_memsize(self, mode: AcquisitionMode, length_in_samples: int) -> None:
+        """Reserve on-board memory for one acquisition, or in SPC_REC_STD_MULTI mode for `batch_size` segments. Called
+        whenever the acquisition length, batch size or acquisition mode changes, so they can be set in any order."""
+        num_segments = self._batch_size if mode == AcquisitionMode.SPC_REC_STD_MULTI else 1
+        self.write_to_spectrum_device_register(SPC_MEMSIZE, length_in_samples * num_segments)
 
     @property
     def post_trigger_length_in_samples(self) -> int:
@@ -219,10 +727,12 @@ class SpectrumDigitiserCard(
         """Change the number of samples of the recording that will contain data received after the trigger event.
         In FIFO mode, this will be quantised according to the minimum step size allowed by the connected card.
 
+        In SPC_REC_FIFO_GATE mode, the rest of the acquisition length is recorded before each gate opens.
+
         Args:
             length_in_samples (int): The desired post trigger length in samples."""
         length_in_samples = self._coerce_num_samples_if_fifo(length_in_samples)
-        if self.acquisition_mode == AcquisitionMode.SPC_REC_FIFO_MULTI:
+        if self.acquisition_mode in (AcquisitionMode.SPC_REC_FIFO_MULTI, AcquisitionMode.SPC_REC_FIFO_ABA):
             if (self.acquisition_length_in_samples - length_in_samples) < get_memsize_step_size(self._model_number):
                 logger.warning(
                     "FIFO mode: coercing post trigger length to maximum allowed value (step-size samples less than "
@@ -230,9 +740,17 @@ class SpectrumDigitiserCard(
                 )
                 length_in_samples = self.acquisition_length_in_samples - get_memsize_step_size(self._model_number)
         self.write_to_spectrum_device_register(SPC_POSTTRIGGER, length_in_samples)
+        if self.acquisition_mode in GATED_ACQUISITION_MODES:
+            self.write_to_spectrum_device_register(
+                SPC_PRETRIGGER, self.acquisition_length_in_samples - length_in_samples
+            )
 
     def _coerce_num_samples_if_fifo(self, value: int) -> int:
-        if self.acquisition_mode == AcquisitionMode.SPC_REC_FIFO_MULTI:
+        if self.acquisition_mode in (
+            AcquisitionMode.SPC_REC_FIFO_MULTI,
+            AcquisitionMode.SPC_REC_FIFO_SINGLE,
+            AcquisitionMode.SPC_REC_FIFO_ABA,
+        ):
             if value != mod(value, get_memsize_step_size(self._model_number)):
                 logger.warning(
                     f"FIFO mode: coercing length to nearest {get_memsize_step_size(self._model_number)}" f" samples"
@@ -242,9 +760,45 @@ class SpectrumDigitiserCard(
 
     @property
     def number_of_averages(self) -> int:
+        """The number of acquisitions averaged by the card in SPC_REC_STD_AVERAGE and SPC_REC_FIFO_AVERAGE modes.
+
+        Returns:
+            num_averages (int): The number of averages.
+        """
         return self.read_spectrum_device_register(SPC_AVERAGES)
 
+    @property
+    def aba_divider(self) -> int:
+        """In SPC_REC_FIFO_ABA mode, the factor by which the sample rate is divided to sample the slow "A" stream.
+
+        Returns:
+            divider (int): The currently set ABA divider.
+        """
+        return self.read_spectrum_device_register(SPC_ABADIVIDER)
+
+    def set_aba_divider(self, divider: int) -> None:
+        """Set the factor by which the sample rate is divided to sample the slow "A" stream in SPC_REC_FIFO_ABA mode. The
+        allowed values depend on the card. A SpectrumInvalidParameterValue exception is raised if an invalid divider is
+        requested.
+
+        Args:
+            divider (int): The desired ABA divider.
+        """
+        min_divider = self.read_spectrum_device_register(SPC_AVAILABADIVIDER_MIN)
+        max_divider = self.read_spectrum_device_register(SPC_AVAILABADIVIDER_MAX)
+        step = self.read_spectrum_device_register(SPC_AVAILABADIVIDER_STEP)
+        if not (min_divider <= divider <= max_divider) or divider % step != 0:
+            raise SpectrumInvalidParameterValue("ABA divider", divider, min_divider, max_divider, step)
+        self.write_to_spectrum_device_register(SPC_ABADIVIDER, divider)
+
     def set_number_of_averages(self, num_averages: int) -> None:
+        """Set the number of acquisitions averaged by the card in averaging modes. In these modes, the card transfers
+        the 32-bit sum of each sample over `num_averages` acquisitions, which is divided by `num_averages` when
+        converting to volts. Takes effect when the next acquisition is started.
+
+        Args:
+            num_averages (int): The number of averages.
+        """
         if num_averages > 0:
             self.write_to_spectrum_device_register(SPC_AVERAGES, num_averages)
         else:
@@ -266,20 +820,122 @@ class SpectrumDigitiserCard(
         Args:
             mode (`AcquisitionMode`): The desired acquisition mode."""
         self.write_to_spectrum_device_register(SPC_CARDMODE, mode.value)
+        self._set_memsize(mode, self.acquisition_length_in_samples)
 
     @property
     def batch_size(self) -> int:
         return self._batch_size
 
     def set_batch_size(self, batch_size: int) -> None:
+        """Set the number of acquisitions returned by each call to `get_waveforms()`. In SPC_REC_STD_MULTI mode, this is
+        the number of segments recorded to on-board memory by each acquisition, and the on-board memory size is updated
+        to match."""
         self._batch_size = batch_size
+        acquisition_mode = self.acquisition_mode
+        if acquisition_mode == AcquisitionMode.SPC_REC_STD_MULTI:
+            self._set_memsize(acquisition_mode, self.acquisition_length_in_samples)
+
+    @property
+    def transfer_buffer_size_in_batches(self) -> int:
+        """The length, in batches, of the ring buffer created by `define_transfer_buffer()` in FIFO mode when no buffer
+        is provided.
+
+        Returns:
+            size_in_batches (int): The currently set transfer buffer size in batches.
+        """
+        return self._transfer_buffer_size_in_batches
+
+    def set_transfer_buffer_size_in_batches(self, size_in_batches: int) -> None:
+        """Change the length of the ring buffer created by `define_transfer_buffer()` in FIFO mode, as a multiple of the
+        batch size. The card keeps transferring into the free part of the ring while earlier batches are being read, so
+        a longer ring absorbs brief stalls of the reading thread that would otherwise cause a
+        `SpectrumFIFOModeHardwareBufferOverrun`, at the cost of memory. Takes effect when a transfer buffer is next
+        created.
+
+        Args:
+            size_in_batches (int): The number of batches the ring buffer can hold. Must be at least 1, and at least 2 if
+                `get_zero_copy_frame()` is to be used.
+        """
+        if size_in_batches < 1:
+            raise ValueError("The transfer buffer must be able to hold at least one batch.")
+        self._transfer_buffer_size_in_batches = size_in_batches
+
+    @property
+    def output_dtype(self) -> dtype:
+        """The floating point type (float32 or float64) of the voltage waveforms returned by `get_waveforms()` and
+        `get_waveform_array()`.
+
+        Returns:
+            output_dtype (dtype): The currently set output dtype.
+        """
+        return self._output_dtype
+
+    def set_output_dtype(self, output_dtype: DTypeLike) -> None:
+        """Change the floating point type of the voltage waveforms returned by `get_waveforms()` and
+        `get_waveform_array()`. float32 is precise enough for 16-bit samples and halves the memory occupied by the
+        waveforms. Takes effect when the next acquisition is started.
+
+        Args:
+            output_dtype (DTypeLike): float32 or float64.
+        """
+        self._output_dtype = validate_output_dtype(output_dtype)
+
+    @property
+    def acquisition_plan(self) -> AcquisitionPlan:
+        """The static settings of the current acquisition (acquisition mode and length, batch size, enabled channels,
+        sample size, timeout and voltage conversion coefficients), as frozen when the acquisition was started or the
+        transfer buffer was defined. `get_waveforms()` uses the plan instead of reading these settings from the card,
+        which avoids a register read (a network round trip for networked devices) per setting per call. If no plan has
+        been frozen yet, one is created from the current settings.
+
+        Returns:
+            plan (`AcquisitionPlan`): The frozen acquisition settings.
+        """
+        if self._acquisition_plan is None:
+            return self._freeze_acquisition_plan()
+        return self._acquisition_plan
+
+    def _freeze_acquisition_plan(self) -> AcquisitionPlan:
+        acquisition_mode = self.acquisition_mode
+        enabled_channel_nums = tuple(self.enabled_analog_channel_nums)
+        if acquisition_mode in AVERAGING_ACQUISITION_MODES:
+            # The card transfers 32-bit sums, so dividing by the number of averages is folded into the scales
+            bytes_per_sample = AVERAGED_BYTES_PER_SAMPLE
+            number_of_averages = self.number_of_averages
+        else:
+            bytes_per_sample = self.bytes_per_sample
+            number_of_averages = 1
+        if acquisition_mode in GATED_ACQUISITION_MODES:
+            gate_length_alignment = self.read_spectrum_device_register(SPC_GATE_LEN_ALIGNMENT)
+        else:
+            gate_length_alignment = 1
+        scales_and_offsets = []
+        for channel_num in enabled_channel_nums:
+            scale, offset = self.analog_channels[channel_num].voltage_conversion_scale_and_offset
+            scales_and_offsets.append((scale / number_of_averages, offset))
+        self._acquisition_plan = AcquisitionPlan(
+            acquisition_mode=acquisition_mode,
+            acquisition_length_in_samples=self.acquisition_length_in_samples,
+            batch_size=self._batch_size,
+            enabled_channel_nums=enabled_channel_nums,
+            bytes_per_sample=bytes_per_sample,
+            number_of_averages=number_of_averages,
+            timeout_in_ms=self.timeout_in_ms,
+            voltage_conversion=VoltageConversionCoefficients.from_scales_and_offsets(
+                enabled_channel_nums, scales_and_offsets
+            ),
+            output_dtype=self._output_dtype,
+            gate_length_alignment_in_samples=gate_length_alignment,
+        )
+        return self._acquisition_plan
 
     def define_transfer_buffer(self, buffer: Optional[Sequence[TransferBuffer]] = None) -> None:
         """Create or provide a `TransferBuffer` object for receiving acquired samples from the device.
 
         If no buffer is provided, and no buffer has previously been defined, then one will be created: in FIFO mode,
-         with a notify size of 10 pages or the size of the acquisition, whichever is smaller; in Standard Single mode,
-         one with the correct length and no notify size. A separate buffer for transferring Timestamps will also be
+         with a notify size of 10 pages or the size of the acquisition, whichever is smaller, and enough space for
+         `transfer_buffer_size_in_batches` batches of acquisitions; in Standard Single mode, one with the correct length
+         and no notify size. A separate buffer for transferring Timestamps will also be
          created using the Timestamper class.
 
         Args:
@@ -291,8 +947,12 @@ class SpectrumDigitiserCard(
         self._set_or_update_transfer_buffer_attribute(buffer)
         if self._transfer_buffer is not None:
             set_transfer_buffer(self._handle, self._transfer_buffer)
+        if self._aba_transfer_buffer is not None:
+            set_transfer_buffer(self._handle, self._aba_transfer_buffer)
 
     def _set_or_update_transfer_buffer_attribute(self, buffer: Optional[Sequence[TransferBuffer]]) -> None:
+        self._reset_fifo_claims()
+        plan = self._freeze_acquisition_plan()
         if buffer:
             self._transfer_buffer = buffer[0]
             if self._transfer_buffer.direction != BufferDirection.SPCM_DIR_CARDTOPC:
@@ -300,31 +960,69 @@ class SpectrumDigitiserCard(
             if self._transfer_buffer.type != BufferType.SPCM_BUF_DATA:
                 raise ValueError("Digitisers need a transfer buffer with type BufferDirection.SPCM_BUF_DATA")
         elif self._transfer_buffer is None:
-            if self.acquisition_mode in (AcquisitionMode.SPC_REC_FIFO_MULTI, AcquisitionMode.SPC_REC_FIFO_AVERAGE):
-                samples_per_batch = (
-                    self.acquisition_length_in_samples * len(self.enabled_analog_channel_nums) * self._batch_size
-                )
-                pages_per_batch = samples_per_batch * self.bytes_per_sample / PAGE_SIZE_IN_BYTES
+            if plan.acquisition_mode in FIFO_ACQUISITION_MODES:
+                samples_per_batch = plan.num_samples_per_batch
+                pages_per_batch = plan.num_bytes_per_batch / PAGE_SIZE_IN_BYTES
 
                 if pages_per_batch < DEFAULT_NOTIFY_SIZE_IN_PAGES:
                     notify_size = pages_per_batch
                 else:
                     notify_size = DEFAULT_NOTIFY_SIZE_IN_PAGES
 
-                # Make transfer buffer big enough to hold all samples in the batch
+                # Make the transfer buffer a ring of several batches, so that the card can keep transferring while
+                # earlier batches are being read
                 self._transfer_buffer = create_samples_acquisition_transfer_buffer(
-                    size_in_samples=samples_per_batch,
+                    size_in_samples=samples_per_batch * self._transfer_buffer_size_in_batches,
                     notify_size_in_pages=notify_size,
-                    bytes_per_sample=self.bytes_per_sample,
+                    bytes_per_sample=plan.bytes_per_sample,
                 )
-            elif self.acquisition_mode in (AcquisitionMode.SPC_REC_STD_SINGLE, AcquisitionMode.SPC_REC_STD_AVERAGE):
+            elif plan.acquisition_mode in STANDARD_ACQUISITION_MODES:
+                # In SPC_REC_STD_MULTI mode, all the segments of the batch are transferred at once
                 self._transfer_buffer = create_samples_acquisition_transfer_buffer(
-                    size_in_samples=self.acquisition_length_in_samples * len(self.enabled_analog_channel_nums),
+                    size_in_samples=plan.num_samples_per_batch,
                     notify_size_in_pages=0,
-                    bytes_per_sample=self.bytes_per_sample,
+                    bytes_per_sample=plan.bytes_per_sample,
                 )
             else:
                 raise ValueError("AcquisitionMode not recognised")
+        self._set_or_update_aba_transfer_buffer_attribute(plan)
+
+    def _set_or_update_aba_transfer_buffer_attribute(self, plan: AcquisitionPlan) -> None:
+        if plan.acquisition_mode != AcquisitionMode.SPC_REC_FIFO_ABA:
+            self._aba_transfer_buffer = None
+        elif self._aba_transfer_buffer is None:
+            # The A stream is much slower than the B segments, so a ring the size of one batch of B segments holds the
+            # A samples of many batches
+            self._aba_transfer_buffer = create_aba_acquisition_transfer_buffer(
+                size_in_samples=plan.num_samples_per_batch,
+                bytes_per_sample=plan.bytes_per_sample,
+            )
 
     def __str__(self) -> str:
         return f"Card {self._visa_string}"
+
+
+def _do_nothing() -> None:
+    pass
+
+
+def _raise_if_gated(plan: AcquisitionPlan) -> None:
+    if plan.acquisition_mode in GATED_ACQUISITION_MODES:
+        raise SpectrumWrongAcquisitionMode(
+            "Acquisitions have variable lengths in SPC_REC_FIFO_GATE mode, so they cannot be returned as a single array. "
+            "Use get_waveforms() instead."
+        )
+
+
+def _copy_from_ring_buffer(
+    buffer: TransferBuffer, position_in_bytes: int, num_bytes: int, destination: ndarray
+) -> None:
+    """Copy bytes from a transfer buffer used as a ring buffer into the start of `destination`, as two slices if they
+    wrap around the end of the buffer."""
+    itemsize = buffer.data_array.itemsize
+    num_bytes_before_end = min(num_bytes, buffer.data_array_length_in_bytes - position_in_bytes)
+    num_samples_before_end = num_bytes_before_end // itemsize
+    destination[:num_samples_before_end] = buffer.read_chunk(position_in_bytes, num_bytes_before_end)
+    if num_bytes_before_end < num_bytes:
+        num_bytes_after_wrap = num_bytes - num_bytes_before_end
+        destination[num_samples_before_end : num_bytes // itemsize] = buffer.read_chunk(0, num_bytes_after_wrap)
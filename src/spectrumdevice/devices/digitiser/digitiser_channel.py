@@ -1,5 +1,5 @@
 """Provides a concrete class for configuring the individual channels of Spectrum digitiser devices."""
-from typing import Any
+from typing import Any, Tuple
 
 # Christian Baker, King's College London
 # Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
@@ -80,10 +80,20 @@ class SpectrumDigitiserAnalogChannel(AbstractSpectrumAnalogChannel, SpectrumDigi
         )
 
     def convert_raw_waveform_to_voltage_waveform(self, raw_waveform: ndarray) -> ndarray:
-        vertical_offset_mv = 0.01 * float(self._vertical_range_mv * self._vertical_offset_in_percent)
-        return 1e-3 * (
-            float(self._vertical_range_mv) * raw_waveform / float(self._full_scale_value) + vertical_offset_mv
-        )
+        scale, offset = self.voltage_conversion_scale_and_offset
+        return raw_waveform * scale + offset
+
+    @property
+    def voltage_conversion_scale_and_offset(self) -> Tuple[float, float]:
+        """The coefficients that convert raw ADC codes acquired by the channel to volts, using the vertical range and
+        offset most recently set or read: volts = raw * scale + offset.
+
+        Returns:
+            scale_and_offset (Tuple[float, float]): The scale (volts per ADC code) and offset (volts).
+        """
+        scale = 1e-3 * float(self._vertical_range_mv) / float(self._full_scale_value)
+        offset = 1e-5 * float(self._vertical_range_mv * self._vertical_offset_in_percent)
+        return scale, offset
 
     @property
     def vertical_range_in_mv(self) -> int:
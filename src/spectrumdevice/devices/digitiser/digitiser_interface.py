@@ -6,19 +6,21 @@
 
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from numpy import float_, ndarray
-from numpy.typing import NDArray
+from numpy import dtype, floating, int64, ndarray, uint64
+from numpy.typing import DTypeLike, NDArray
 
 from spectrumdevice.devices.abstract_device.device_interface import SpectrumDeviceInterface
 from spectrumdevice.devices.abstract_device.channel_interfaces import (
     SpectrumAnalogChannelInterface,
     SpectrumIOLineInterface,
 )
-from spectrumdevice.settings import AcquisitionMode, AcquisitionSettings
+from spectrumdevice.settings import AcquisitionMode, AcquisitionSettings, VoltageConversionCoefficients
 from spectrumdevice import Measurement
 from spectrumdevice.settings.channel import InputImpedance, InputCoupling, InputPath
+from spectrumdevice.settings.timestamps import TimestampReadoutMode, TimestampReference
+from spectrumdevice.settings.transfer_buffer import DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
 
 
 class SpectrumDigitiserIOLineInterface(SpectrumIOLineInterface, ABC):
@@ -51,6 +53,11 @@ class SpectrumDigitiserAnalogChannelInterface(SpectrumAnalogChannelInterface, AB
     def convert_raw_waveform_to_voltage_waveform(self, raw_waveform: ndarray) -> ndarray:
         raise NotImplementedError()
 
+    @property
+    @abstractmethod
+    def voltage_conversion_scale_and_offset(self) -> Tuple[float, float]:
+        raise NotImplementedError()
+
     @property
     @abstractmethod
     def input_impedance(self) -> InputImpedance:
@@ -96,6 +103,10 @@ class SpectrumDigitiserInterface(SpectrumDeviceInterface, ABC):
     def execute_standard_single_acquisition(self) -> Measurement:
         raise NotImplementedError()
 
+    @abstractmethod
+    def execute_standard_multi_acquisition(self) -> List[Measurement]:
+        raise NotImplementedError()
+
     @abstractmethod
     def execute_finite_fifo_acquisition(self, num_measurements: int) -> List[Measurement]:
         raise NotImplementedError()
@@ -105,7 +116,20 @@ class SpectrumDigitiserInterface(SpectrumDeviceInterface, ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    def get_waveforms(self) -> List[List[NDArray[float_]]]:
+    def get_waveforms(self) -> List[List[NDArray[floating]]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_waveform_array(self, out: Optional[NDArray[floating]] = None) -> NDArray[floating]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_raw_waveform_array(self, out: Optional[ndarray] = None) -> ndarray:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def voltage_conversion_coefficients(self) -> VoltageConversionCoefficients:
         raise NotImplementedError()
 
     @abstractmethod
@@ -113,7 +137,29 @@ class SpectrumDigitiserInterface(SpectrumDeviceInterface, ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    def enable_timestamping(self) -> None:
+    def get_batch_timestamps_in_samples(self) -> Optional[NDArray[uint64]]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_batch_timestamps_in_ns(self) -> Optional[NDArray[int64]]:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def timestamp_reference(self) -> Optional[TimestampReference]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def enable_timestamping(
+        self,
+        buffer_size_in_timestamps: int = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+        readout_mode: TimestampReadoutMode = TimestampReadoutMode.POLL,
+    ) -> None:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def timestamps_lost(self) -> bool:
         raise NotImplementedError()
 
     @property
@@ -143,6 +189,24 @@ class SpectrumDigitiserInterface(SpectrumDeviceInterface, ABC):
     def set_acquisition_mode(self, mode: AcquisitionMode) -> None:
         raise NotImplementedError()
 
+    @property
+    @abstractmethod
+    def number_of_averages(self) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def set_number_of_averages(self, num_averages: int) -> None:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def aba_divider(self) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def set_aba_divider(self, divider: int) -> None:
+        raise NotImplementedError()
+
     @property
     @abstractmethod
     def batch_size(self) -> int:
@@ -151,3 +215,21 @@ class SpectrumDigitiserInterface(SpectrumDeviceInterface, ABC):
     @abstractmethod
     def set_batch_size(self, batch_size: int) -> None:
         raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def output_dtype(self) -> dtype:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def set_output_dtype(self, output_dtype: DTypeLike) -> None:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def transfer_buffer_size_in_batches(self) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def set_transfer_buffer_size_in_batches(self, size_in_batches: int) -> None:
+        raise NotImplementedError()
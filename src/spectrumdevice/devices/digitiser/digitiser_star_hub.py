@@ -4,11 +4,11 @@
 # Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 import datetime
-from threading import Thread
-from typing import Dict, List, Optional, Sequence
+from operator import attrgetter, methodcaller
+from typing import Callable, List, Optional, Sequence
 
-from numpy import float_
-from numpy.typing import NDArray
+from numpy import cumsum, dtype, empty, floating, int64, ndarray, uint64
+from numpy.typing import DTypeLike, NDArray
 
 from spectrumdevice.devices.abstract_device import (
     AbstractSpectrumStarHub,
@@ -18,9 +18,11 @@ from spectrumdevice.devices.digitiser import SpectrumDigitiserAnalogChannelInter
 from spectrumdevice.devices.digitiser.digitiser_card import SpectrumDigitiserCard
 from spectrumdevice.devices.digitiser.abstract_spectrum_digitiser import AbstractSpectrumDigitiser
 from spectrumdevice.devices.digitiser.digitiser_interface import SpectrumDigitiserIOLineInterface
-from spectrumdevice.settings import ModelNumber, TransferBuffer
+from spectrumdevice.settings import ModelNumber, TransferBuffer, VoltageConversionCoefficients
 from spectrumdevice.settings.card_dependent_properties import CardType
 from spectrumdevice.settings.device_modes import AcquisitionMode
+from spectrumdevice.settings.timestamps import TimestampReadoutMode, TimestampReference
+from spectrumdevice.settings.transfer_buffer import DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
 
 
 class SpectrumDigitiserStarHub(
@@ -57,60 +59,137 @@ class SpectrumDigitiserStarHub(
             according to the current number of active channels in each card and the acquisition length.
         """
         if buffer:
-            for card, buff in zip(self._child_cards, buffer):
-                card.define_transfer_buffer([buff])
+            self._on_each_card(lambda card, buff: card.define_transfer_buffer([buff]), buffer)
         else:
-            for card in self._child_cards:
-                card.define_transfer_buffer()
+            self._on_each_card(methodcaller("define_transfer_buffer"))
+
+    def start(self) -> None:
+        """Start the hub. The acquisition plan of each child card is frozen first, and its timestamp reference brought up
+        to date. See `SpectrumDigitiserCard.start()` and `SpectrumDigitiserCard.acquisition_plan` for more
+        information."""
+        self._on_each_card(methodcaller("_prepare_to_start"))
+        super().start()
+
+    def stop(self) -> None:
+        """Stop the hub. See `SpectrumDigitiserCard.stop()`."""
+        self._on_each_card(methodcaller("_abort_fifo_waits"))
+        super().stop()
 
     def wait_for_acquisition_to_complete(self) -> None:
         """Wait for each card to finish its acquisition. See `SpectrumDigitiserCard.wait_for_acquisition_to_complete()`
         for more information."""
-        for card in self._child_cards:
-            card.wait_for_acquisition_to_complete()
+        self._on_each_card(methodcaller("wait_for_acquisition_to_complete"))
 
-    def get_waveforms(self) -> List[List[NDArray[float_]]]:
+    def get_waveforms(self) -> List[List[NDArray[floating]]]:
         """Get a list of the most recently transferred waveforms.
 
         This method gets the waveforms from each child card and joins them into a new list, ordered by channel number.
         See `SpectrumDigitiserCard.get_waveforms()` for more information.
 
+        Returns:
+            waveforms (List[List[NDArray[floating]]]): A list lists of 1D numpy arrays, one inner list per acquisition,
+              and one array per enabled channel, in channel order.
+        """
+        return [list(acquisition) for acquisition in self.get_waveform_array()]
+
+    def get_waveform_array(self, out: Optional[NDArray[floating]] = None) -> NDArray[floating]:
+        """Get the most recently transferred batch of waveforms from all child cards as a single NumPy array.
+
+        The child cards are read concurrently, each converting its samples to volts directly into its slice of the
+        channel axis of one array, in the order of the child cards. See `SpectrumDigitiserCard.get_waveform_array()` for
+        more information.
+
         Args:
-            num_acquisitions (int): For FIFO mode:  the number of acquisitions (i.e. trigger events) to wait for and
-            copy. Acquiring in batches (num_acquisitions > 1) can improve performance.
+            out (Optional[NDArray[floating]]): An array of shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples) and type `output_dtype` into which to write the waveforms, e.g. to reuse
+                the same array for every batch. If not provided, a new array is created.
 
         Returns:
-            waveforms (List[List[NDArray[float_]]]): A list lists of 1D numpy arrays, one inner list per acquisition,
-              and one array per enabled channel, in channel order.
+            waveforms (NDArray[floating]): Array of voltage waveforms, with shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples), where num_enabled_channels is the total across all child cards.
         """
-        card_ids_and_waveform_sets: Dict[str, list[list[NDArray[float_]]]] = {}
+        return self._read_into_hub_array(SpectrumDigitiserCard.get_waveform_array, out, raw=False)
 
-        def _get_waveforms(digitiser_card: SpectrumDigitiserCard) -> None:
-            this_cards_waveforms = digitiser_card.get_waveforms()
-            card_ids_and_waveform_sets[str(digitiser_card)] = this_cards_waveforms
+    def get_raw_waveform_array(self, out: Optional[ndarray] = None) -> ndarray:
+        """Get the most recently transferred batch of raw samples from all child cards as a single NumPy array, without
+        converting them to volts. See `SpectrumDigitiserCard.get_raw_waveform_array()` for more information.
 
-        threads = [Thread(target=_get_waveforms, args=(card,)) for card in self._child_cards]
+        Args:
+            out (Optional[ndarray]): An array of shape (batch_size, num_enabled_channels, acquisition_length_in_samples)
+                and the integer type of the raw samples into which to write them. If not provided, a new array is
+                created.
 
-        for thread in threads:
-            thread.start()
-        for thread in threads:
-            thread.join()
+        Returns:
+            raw_waveforms (ndarray): Integer array of raw samples, with shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples), where num_enabled_channels is the total across all child cards.
+        """
+        return self._read_into_hub_array(SpectrumDigitiserCard.get_raw_waveform_array, out, raw=True)
 
-        waveform_sets_all_cards_ordered = []
-        for n in range(self.batch_size):
-            waveforms_in_this_batch = []
-            for card in self._child_cards:
-                waveforms_in_this_batch += card_ids_and_waveform_sets[str(card)][n]
-            waveform_sets_all_cards_ordered.append(waveforms_in_this_batch)
+    @property
+    def voltage_conversion_coefficients(self) -> VoltageConversionCoefficients:
+        """The coefficients that convert the raw samples of all the enabled channels of the child cards to volts, in the
+        order of the channel axis of `get_raw_waveform_array()`. See
+        `SpectrumDigitiserCard.voltage_conversion_coefficients` for more information.
 
-        return waveform_sets_all_cards_ordered
+        Returns:
+            coefficients (`VoltageConversionCoefficients`): The scale and offset of each enabled channel.
+        """
+        channel_num_offsets = cumsum([0] + [len(card.analog_channels) for card in self._child_cards[:-1]])
+        return VoltageConversionCoefficients.concatenate(
+            [card.voltage_conversion_coefficients for card in self._child_cards], channel_num_offsets.tolist()
+        )
+
+    def _read_into_hub_array(
+        self, read_into: Callable[[SpectrumDigitiserCard, ndarray], ndarray], out: Optional[ndarray], raw: bool
+    ) -> ndarray:
+        plans = [card.acquisition_plan for card in self._child_cards]
+        channel_bounds = cumsum([0] + [plan.num_enabled_channels for plan in plans]).tolist()
+        shape = (
+            check_settings_constant_across_devices([plan.batch_size for plan in plans], __name__),
+            channel_bounds[-1],
+            check_settings_constant_across_devices([plan.acquisition_length_in_samples for plan in plans], __name__),
+        )
+        if out is None:
+            array_dtypes = [plan.sample_dtype if raw else plan.output_dtype for plan in plans]
+            check_settings_constant_across_devices([d.itemsize for d in array_dtypes], __name__)
+            out = empty(shape, dtype=array_dtypes[0])
+        elif out.shape != shape:
+            raise ValueError(f"Output array must have shape {shape}, not {out.shape}.")
+        card_slices = [out[:, start:stop] for start, stop in zip(channel_bounds[:-1], channel_bounds[1:])]
+        self._on_each_card(read_into, card_slices)
+        return out
 
     def get_timestamp(self) -> Optional[datetime.datetime]:
         """Get timestamp for the last acquisition"""
         return self._triggering_card.get_timestamp()
 
-    def enable_timestamping(self) -> None:
-        self._triggering_card.enable_timestamping()
+    def get_batch_timestamps_in_samples(self) -> Optional[NDArray[uint64]]:
+        """Get the raw timestamps of the last batch of acquisitions from the triggering card. See
+        `SpectrumDigitiserCard.get_batch_timestamps_in_samples()`."""
+        return self._triggering_card.get_batch_timestamps_in_samples()
+
+    def get_batch_timestamps_in_ns(self) -> Optional[NDArray[int64]]:
+        """Get the timestamps of the last batch of acquisitions from the triggering card. See
+        `SpectrumDigitiserCard.get_batch_timestamps_in_ns()`."""
+        return self._triggering_card.get_batch_timestamps_in_ns()
+
+    @property
+    def timestamp_reference(self) -> Optional[TimestampReference]:
+        """The timestamp reference of the triggering card. See `SpectrumDigitiserCard.timestamp_reference`."""
+        return self._triggering_card.timestamp_reference
+
+    def enable_timestamping(
+        self,
+        buffer_size_in_timestamps: int = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+        readout_mode: TimestampReadoutMode = TimestampReadoutMode.POLL,
+    ) -> None:
+        """Enable timestamping on the triggering card. See `SpectrumDigitiserCard.enable_timestamping()`."""
+        self._triggering_card.enable_timestamping(buffer_size_in_timestamps, readout_mode)
+
+    @property
+    def timestamps_lost(self) -> bool:
+        """True if the triggering card has lost timestamps. See `SpectrumDigitiserCard.timestamps_lost`."""
+        return self._triggering_card.timestamps_lost
 
     @property
     def acquisition_length_in_samples(self) -> int:
@@ -120,10 +199,9 @@ class SpectrumDigitiserStarHub(
 
         Returns:
             length_in_samples: The currently set acquisition length in samples."""
-        lengths = []
-        for d in self._child_cards:
-            lengths.append(d.acquisition_length_in_samples)
-        return check_settings_constant_across_devices(lengths, __name__)
+        return check_settings_constant_across_devices(
+            self._on_each_card(attrgetter("acquisition_length_in_samples")), __name__
+        )
 
     def set_acquisition_length_in_samples(self, length_in_samples: int) -> None:
         """Set a new recording length for all child cards. See `SpectrumDigitiserCard.set_acquisition_length_in_samples()`
@@ -131,8 +209,7 @@ class SpectrumDigitiserStarHub(
 
         Args:
             length_in_samples (int): The desired acquisition length in samples."""
-        for d in self._child_cards:
-            d.set_acquisition_length_in_samples(length_in_samples)
+        self._on_each_card(methodcaller("set_acquisition_length_in_samples", length_in_samples))
 
     @property
     def post_trigger_length_in_samples(self) -> int:
@@ -143,10 +220,9 @@ class SpectrumDigitiserStarHub(
         Returns:
             length_in_samples (int): The current post trigger length in samples.
         """
-        lengths = []
-        for d in self._child_cards:
-            lengths.append(d.post_trigger_length_in_samples)
-        return check_settings_constant_across_devices(lengths, __name__)
+        return check_settings_constant_across_devices(
+            self._on_each_card(attrgetter("post_trigger_length_in_samples")), __name__
+        )
 
     def set_post_trigger_length_in_samples(self, length_in_samples: int) -> None:
         """Set a new post trigger length for all child cards. See `SpectrumDigitiserCard.set_post_trigger_length_in_samples()`
@@ -155,8 +231,7 @@ class SpectrumDigitiserStarHub(
         Args:
             length_in_samples (int): The desired post trigger length in samples.
         """
-        for d in self._child_cards:
-            d.set_post_trigger_length_in_samples(length_in_samples)
+        self._on_each_card(methodcaller("set_post_trigger_length_in_samples", length_in_samples))
 
     @property
     def acquisition_mode(self) -> AcquisitionMode:
@@ -166,9 +241,7 @@ class SpectrumDigitiserStarHub(
         Returns:
             mode (`AcquisitionMode`): The currently enabled acquisition mode.
         """
-        modes = []
-        for d in self._child_cards:
-            modes.append(d.acquisition_mode)
+        modes = self._on_each_card(attrgetter("acquisition_mode"))
         return AcquisitionMode(check_settings_constant_across_devices([m.value for m in modes], __name__))
 
     def set_acquisition_mode(self, mode: AcquisitionMode) -> None:
@@ -177,23 +250,60 @@ class SpectrumDigitiserStarHub(
 
         Args:
             mode (`AcquisitionMode`): The desired acquisition mode."""
-        for d in self._child_cards:
-            d.set_acquisition_mode(mode)
+        self._on_each_card(methodcaller("set_acquisition_mode", mode))
+
+    @property
+    def number_of_averages(self) -> int:
+        """The number of averages of each child card, which should be the same for all cards. If it's not, an exception
+        is raised. See `SpectrumDigitiserCard.number_of_averages` for more information."""
+        return check_settings_constant_across_devices(self._on_each_card(attrgetter("number_of_averages")), __name__)
+
+    def set_number_of_averages(self, num_averages: int) -> None:
+        self._on_each_card(methodcaller("set_number_of_averages", num_averages))
+
+    @property
+    def aba_divider(self) -> int:
+        """The ABA divider of each child card, which should be the same for all cards. If it's not, an exception is
+        raised. See `SpectrumDigitiserCard.aba_divider` for more information."""
+        return check_settings_constant_across_devices(self._on_each_card(attrgetter("aba_divider")), __name__)
+
+    def set_aba_divider(self, divider: int) -> None:
+        self._on_each_card(methodcaller("set_aba_divider", divider))
 
     @property
     def batch_size(self) -> int:
-        batch_sizes = []
-        for d in self._child_cards:
-            batch_sizes.append(d.batch_size)
-        return check_settings_constant_across_devices(batch_sizes, __name__)
+        return check_settings_constant_across_devices(self._on_each_card(attrgetter("batch_size")), __name__)
 
     def set_batch_size(self, batch_size: int) -> None:
-        for d in self._child_cards:
-            d.set_batch_size(batch_size)
+        self._on_each_card(methodcaller("set_batch_size", batch_size))
+
+    @property
+    def transfer_buffer_size_in_batches(self) -> int:
+        """The FIFO ring buffer length in batches, which should be the same for all child cards. If it's not, an
+        exception is raised. See `SpectrumDigitiserCard.transfer_buffer_size_in_batches` for more information."""
+        return check_settings_constant_across_devices(
+            self._on_each_card(attrgetter("transfer_buffer_size_in_batches")), __name__
+        )
+
+    def set_transfer_buffer_size_in_batches(self, size_in_batches: int) -> None:
+        """Change the FIFO ring buffer length of all child cards. See
+        `SpectrumDigitiserCard.set_transfer_buffer_size_in_batches()` for more information."""
+        self._on_each_card(methodcaller("set_transfer_buffer_size_in_batches", size_in_batches))
+
+    @property
+    def output_dtype(self) -> dtype:
+        """The floating point type of the voltage waveforms, which should be the same for all child cards. If it's not,
+        an exception is raised. See `SpectrumDigitiserCard.output_dtype` for more information."""
+        itemsizes = [output_dtype.itemsize for output_dtype in self._on_each_card(attrgetter("output_dtype"))]
+        return dtype(f"float{8 * check_settings_constant_across_devices(itemsizes, __name__)}")
+
+    def set_output_dtype(self, output_dtype: DTypeLike) -> None:
+        """Change the floating point type of the voltage waveforms of all child cards, so that the waveforms of the
+        child cards are joined without casting. See `SpectrumDigitiserCard.set_output_dtype()` for more information."""
+        self._on_each_card(methodcaller("set_output_dtype", output_dtype))
 
     def force_trigger(self) -> None:
-        for d in self._child_cards:
-            d.force_trigger()
+        self._on_each_card(methodcaller("force_trigger"))
 
     @property
     def type(self) -> CardType:
@@ -0,0 +1,83 @@
+"""Provides a class giving read-only access to acquired samples while they are still held in a `TransferBuffer`."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from types import TracebackType
+from typing import Callable, Optional, Type
+
+from numpy import ndarray
+
+from spectrumdevice.exceptions import SpectrumFrameAlreadyReleased
+
+
+class ZeroCopyFrame:
+    """A batch of acquired samples that have not been copied out of the `TransferBuffer`. Returned by
+    `SpectrumDigitiserCard.get_zero_copy_frame()`.
+
+    The samples are a read-only view into the transfer buffer, so the space they occupy is not handed back to the card
+    until `release()` is called (or the `with` block the frame was used in is exited). Frames should be released as
+    soon as they are no longer needed; in FIFO mode, the card cannot write new samples into unreleased space, so holding
+    on to frames for too long will cause a buffer overrun. Once a frame has been released, any array previously obtained
+    from its `samples` property still points into the transfer buffer, and will be overwritten by the card. Copy the
+    samples first if they are needed after the frame has been released.
+    """
+
+    def __init__(self, samples: ndarray, release_callback: Callable[[], None]):
+        """
+        Args:
+            samples (ndarray): The raw samples of the batch, with shape (batch_size, num_enabled_channels,
+                acquisition_length_in_samples). Made read-only on construction.
+            release_callback (Callable[[], None]): Called once when the frame is released. Hands the space occupied by
+                the samples back to the card.
+        """
+        samples.flags.writeable = False
+        self._samples: Optional[ndarray] = samples
+        self._release_callback = release_callback
+
+    @property
+    def samples(self) -> ndarray:
+        """The raw (ADC code) samples of the batch, as a read-only view into the transfer buffer with shape
+        (batch_size, num_enabled_channels, acquisition_length_in_samples). The view is strided, because the card
+        interleaves the samples of each channel. Use `SpectrumDigitiserCard.voltage_conversion_coefficients` to convert
+        the samples to volts.
+
+        Only access to this property is checked: it raises `SpectrumFrameAlreadyReleased` once the frame has been
+        released, but an array obtained from it before the release still aliases the transfer buffer. Its contents
+        become stale as soon as the frame is released and the card reuses the space.
+
+        Returns:
+            samples (ndarray): Read-only view of the raw samples.
+        """
+        if self._samples is None:
+            raise SpectrumFrameAlreadyReleased("Cannot access the samples of a released frame.")
+        return self._samples
+
+    @property
+    def released(self) -> bool:
+        """True if the frame has been released back to the card, in which case its samples can no longer be read."""
+        return self._samples is None
+
+    def release(self) -> None:
+        """Hand the space in the transfer buffer occupied by the frame back to the card. Has no effect if the frame has
+        already been released."""
+        if self._samples is not None:
+            self._samples = None
+            self._release_callback()
+
+    def invalidate(self) -> None:
+        """Mark the frame as released without handing its space back to the card. Called by the card when the transfer
+        buffer is reset (e.g. when a new acquisition is started), after which the samples are no longer valid."""
+        self._samples = None
+
+    def __enter__(self) -> "ZeroCopyFrame":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.release()
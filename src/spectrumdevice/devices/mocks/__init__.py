@@ -5,8 +5,9 @@
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 
 import logging
+from pathlib import Path
 from time import perf_counter, sleep
-from typing import Any, List, Optional, Sequence
+from typing import Any, List, Optional, Sequence, Union
 
 from spectrumdevice.devices.awg.awg_card import SpectrumAWGCard
 from spectrumdevice.devices.digitiser import SpectrumDigitiserCard
@@ -26,6 +27,8 @@ from spectrumdevice.exceptions import (
 from spectrumdevice.settings import AdvancedCardFeature, CardFeature, ModelNumber, TransferBuffer
 from spectrumdevice.settings.card_dependent_properties import CardType
 from spectrumdevice.settings.device_modes import AcquisitionMode
+from spectrumdevice.settings.timestamps import TimestampReadoutMode
+from spectrumdevice.settings.transfer_buffer import DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
 
 logger = logging.getLogger(__name__)
 MOCK_TRANSFER_TIMEOUT_IN_S = 10
@@ -49,6 +52,8 @@ class MockSpectrumDigitiserCard(MockAbstractSpectrumDigitiser, MockAbstractSpect
         num_channels_per_module: int,
         card_features: Optional[list[CardFeature]] = None,
         advanced_card_features: Optional[list[AdvancedCardFeature]] = None,
+        mock_source_recording: Optional[Union[str, Path]] = None,
+        mock_source_replay_at_recorded_rate: bool = True,
     ):
         """
         Args:
@@ -64,6 +69,12 @@ class MockSpectrumDigitiserCard(MockAbstractSpectrumDigitiser, MockAbstractSpect
                 real hardware, this is read from the device so does not need to be set.
             card_features (list[CardFeature]): List of available features of the mock device
             advanced_card_features (list[AdvancedCardFeature]): List of available advanced features of the mock device
+            mock_source_recording (Optional[Union[str, Path]]): A file written by `Recorder`. If provided, the frames
+                of the recording are replayed into the transfer buffer instead of noise, which must be acquired with
+                the same number of channels and acquisition length as the recording.
+            mock_source_replay_at_recorded_rate (bool): If True (default), recorded frames are replayed at the rate at
+                which they were triggered, or at mock_source_frame_rate_hz if the recording has no timestamps. If
+                False, frames are replayed as fast as they are read from the transfer buffer.
 
         """
 
@@ -71,6 +82,8 @@ class MockSpectrumDigitiserCard(MockAbstractSpectrumDigitiser, MockAbstractSpect
             device_number=device_number,
             model=model,
             mock_source_frame_rate_hz=mock_source_frame_rate_hz,
+            mock_source_recording=mock_source_recording,
+            mock_source_replay_at_recorded_rate=mock_source_replay_at_recorded_rate,
             num_modules=num_modules,
             num_channels_per_module=num_channels_per_module,
             card_type=CardType.SPCM_TYPE_AI,
@@ -82,18 +95,21 @@ class MockSpectrumDigitiserCard(MockAbstractSpectrumDigitiser, MockAbstractSpect
         self._previous_transfer_chunk_count = 0
         self._param_dict[TRANSFER_CHUNK_COUNTER] = 0
 
-    def enable_timestamping(self) -> None:
-        self._timestamper: MockTimestamper = MockTimestamper(self, self._handle)
+    def enable_timestamping(
+        self,
+        buffer_size_in_timestamps: int = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+        readout_mode: TimestampReadoutMode = TimestampReadoutMode.POLL,
+    ) -> None:
+        self._timestamp_buffer_size_in_timestamps = buffer_size_in_timestamps
+        self._timestamp_readout_mode = readout_mode
+        self._timestamper: MockTimestamper = MockTimestamper(
+            self, self._handle, buffer_size_in_timestamps, readout_mode
+        )
 
     def set_acquisition_mode(self, mode: AcquisitionMode) -> None:
         """Mock timestamper needs to be recreated if the acquisition mode is changed."""
         super().set_acquisition_mode(mode)
-        self._timestamper = MockTimestamper(self, self._handle)
-
-    def set_sample_rate_in_hz(self, rate: int) -> None:
-        """Mock timestamper needs to be recreated if the sample rate is changed."""
-        super().set_sample_rate_in_hz(rate)
-        self._timestamper = MockTimestamper(self, self._handle)
+        self.enable_timestamping(self._timestamp_buffer_size_in_timestamps, self._timestamp_readout_mode)
 
     def set_acquisition_length_in_samples(self, length_in_samples: int) -> None:
         """Set length of mock recording (per channel). In FIFO mode, this will be quantised to the nearest 8 samples.
@@ -119,6 +135,17 @@ class MockSpectrumDigitiserCard(MockAbstractSpectrumDigitiser, MockAbstractSpect
         else:
             raise SpectrumSettingsMismatchError("Not enough channels in mock device configuration.")
 
+    def start(self) -> None:
+        """See `SpectrumDigitiserCard.start()`. The acquisition plan is frozen and the timestamp reference brought up to
+        date as on hardware, and the mock waveform source is then started."""
+        self._prepare_to_start()
+        super().start()
+
+    def stop(self) -> None:
+        """See `SpectrumDigitiserCard.stop()`. Stops the mock waveform source."""
+        self._abort_fifo_waits()
+        super().stop()
+
     def define_transfer_buffer(self, buffer: Optional[Sequence[TransferBuffer]] = None) -> None:
         """Create or provide a `TransferBuffer` object for receiving acquired samples from the device.
 
@@ -136,13 +163,18 @@ class MockSpectrumDigitiserCard(MockAbstractSpectrumDigitiser, MockAbstractSpect
 
     def wait_for_transfer_chunk_to_complete(self) -> None:
         """See `SpectrumDigitiserCard.wait_for_transfer_chunk_to_complete()`. This mock implementation blocks until a
-        new mock transfer has been completed by waiting for a change to TRANSFER_CHUNK_COUNTER."""
+        new mock transfer has been completed by waiting for a change to TRANSFER_CHUNK_COUNTER. Like the hardware, it
+        returns without raising an error if the card's timeout (or MOCK_TRANSFER_TIMEOUT_IN_S if the timeout is 0) is
+        reached first, or if the acquisition is stopped."""
         if self._transfer_buffer:
+            timeout_in_s = 1e-3 * self.timeout_in_ms if self.timeout_in_ms > 0 else MOCK_TRANSFER_TIMEOUT_IN_S
             t0 = perf_counter()
             t_elapsed = 0.0
             while (
                 self._previous_transfer_chunk_count == self._param_dict[TRANSFER_CHUNK_COUNTER]
-            ) and t_elapsed < MOCK_TRANSFER_TIMEOUT_IN_S:
+                and t_elapsed < timeout_in_s
+                and not self._acquisition_stop_event.is_set()
+            ):
                 sleep(0.1)
                 t_elapsed = perf_counter() - t0
             self._previous_transfer_chunk_count = self._param_dict[TRANSFER_CHUNK_COUNTER]
@@ -8,15 +8,36 @@ from abc import ABC
 from functools import reduce
 from operator import or_
 from threading import Event, Lock, Thread
+from time import monotonic, sleep
+from pathlib import Path
 from typing import Any, Dict, Optional, Union, cast
 
 from spectrum_gmbh.py_header.regs import (
+    M2CMD_EXTRA_WAITDMA,
+    M2STAT_NONE,
     SPCM_X0_AVAILMODES,
     SPCM_X1_AVAILMODES,
     SPCM_X2_AVAILMODES,
     SPCM_X3_AVAILMODES,
     SPCM_XMODE_DISABLE,
+    SPC_AVERAGES,
     SPC_CARDMODE,
+    SPC_ABA_AVAIL_CARD_LEN,
+    SPC_ABA_AVAIL_USER_LEN,
+    SPC_ABA_AVAIL_USER_POS,
+    SPC_ABADIVIDER,
+    SPC_AVAILABADIVIDER_MAX,
+    SPC_AVAILABADIVIDER_MIN,
+    SPC_AVAILABADIVIDER_STEP,
+    SPC_DATA_AVAIL_CARD_LEN,
+    SPC_GATE_LEN_ALIGNMENT,
+    SPC_M2CMD,
+    SPC_M2STATUS,
+    SPC_TS_AVAIL_CARD_LEN,
+    SPC_TS_AVAIL_USER_LEN,
+    SPC_TS_AVAIL_USER_POS,
+    SPC_DATA_AVAIL_USER_LEN,
+    SPC_DATA_AVAIL_USER_POS,
     SPC_FNCTYPE,
     SPC_MEMSIZE,
     SPC_MIINST_BYTESPERSAMPLE,
@@ -24,6 +45,7 @@ from spectrum_gmbh.py_header.regs import (
     SPC_PCIEXTFEATURES,
     SPC_PCIFEATURES,
     SPC_PCITYP,
+    SPC_SAMPLERATE,
     SPC_SEGMENTSIZE,
     SPC_TIMEOUT,
     SPC_MIINST_MODULES,
@@ -99,17 +121,31 @@ from spectrum_gmbh.py_header.regs import (
 from spectrumdevice.devices.abstract_device import AbstractSpectrumDevice, AbstractSpectrumCard, AbstractSpectrumStarHub
 from spectrumdevice.devices.awg.abstract_spectrum_awg import AbstractSpectrumAWG
 from spectrumdevice.devices.digitiser.abstract_spectrum_digitiser import AbstractSpectrumDigitiser
-from spectrumdevice.devices.mocks.mock_waveform_source import mock_waveform_source_factory
-from spectrumdevice.exceptions import MockRegisterNotImplemented, SpectrumDeviceNotConnected
+from spectrumdevice.devices.mocks.mock_waveform_source import (
+    ABAStreamMockWaveformSource,
+    GatedFIFOModeMockWaveformSource,
+    MockWaveformSource,
+    mock_waveform_source_factory,
+)
+from spectrumdevice.devices.spectrum_timestamper import Timestamper
+from spectrumdevice.exceptions import (
+    MockRegisterNotImplemented,
+    SpectrumDeviceNotConnected,
+    SpectrumSettingsMismatchError,
+)
+from spectrumdevice.features.recorder.recording_reader import RecordingReader
 from spectrumdevice.settings import (
     AcquisitionMode,
     AdvancedCardFeature,
     CardFeature,
     ModelNumber,
     SpectrumRegisterLength,
+    TransferBuffer,
 )
 from spectrumdevice.settings.card_dependent_properties import CardType
-from spectrumdevice.settings.device_modes import GenerationMode
+from spectrumdevice.settings.device_modes import AVERAGING_ACQUISITION_MODES, GenerationMode
+
+MOCK_TIMESTAMP_WAIT_INTERVAL_IN_S = 1e-3
 
 
 class MockAbstractSpectrumDevice(AbstractSpectrumDevice, ABC):
@@ -120,7 +156,7 @@ class MockAbstractSpectrumDevice(AbstractSpectrumDevice, ABC):
             self._param_dict = param_dict
         super().__init__(**kwargs)  # required for proper MRO resolution
 
-    def write_to_spectrum_device_register(
+    def _write_register_to_device(
         self, spectrum_register: int, value: int, length: SpectrumRegisterLength = SpectrumRegisterLength.THIRTY_TWO
     ) -> None:
         """Simulates the setting of a parameter or command (register) on Spectrum hardware by storing its value
@@ -142,7 +178,7 @@ class MockAbstractSpectrumDevice(AbstractSpectrumDevice, ABC):
         else:
             raise SpectrumDeviceNotConnected("Mock device has been disconnected.")
 
-    def read_spectrum_device_register(
+    def _read_register_from_device(
         self, spectrum_register: int, length: SpectrumRegisterLength = SpectrumRegisterLength.THIRTY_TWO
     ) -> int:
         """Read the current value of a mock Spectrum register. Registers that are not set to the internal
@@ -200,6 +236,8 @@ class MockAbstractSpectrumCard(MockAbstractSpectrumDevice, AbstractSpectrumCard,
         param_dict[SPCM_X2_AVAILMODES] = SPCM_XMODE_DISABLE
         param_dict[SPCM_X3_AVAILMODES] = SPCM_XMODE_DISABLE
         param_dict[SPC_TIMEOUT] = 1000
+        param_dict[SPC_M2STATUS] = M2STAT_NONE
+        param_dict[SPC_SAMPLERATE] = 1000000
         param_dict[SPC_SEGMENTSIZE] = 1000
         param_dict[SPC_MEMSIZE] = 1000
         param_dict[SPC_PCITYP] = model.value
@@ -304,30 +342,134 @@ class MockAbstractSpectrumDigitiser(MockAbstractSpectrumDevice, AbstractSpectrum
     class cannot be constructed directly - instantiate `MockAbstractSpectrumDigitiser` and `MockSpectrumStarHub` objects instead,
     which inherit from this class."""
 
-    def __init__(self, mock_source_frame_rate_hz: float = 10.0, **kwargs: Any) -> None:
+    _aba_transfer_buffer: Optional[TransferBuffer]  # defined by SpectrumDigitiserCard
+    _timestamper: Optional[Timestamper]  # defined by SpectrumDigitiserCard
+
+    def __init__(
+        self,
+        mock_source_frame_rate_hz: float = 10.0,
+        mock_source_recording: Optional[Union[str, Path]] = None,
+        mock_source_replay_at_recorded_rate: bool = True,
+        **kwargs: Any,
+    ) -> None:
         """
         Args:
             source_frame_rate_hz (float): Frame rate at which a mock waveform source will generate waveforms.
+            mock_source_recording (Optional[Union[str, Path]]): A file written by `Recorder`. If provided, the mock
+                waveform source replays the frames of the recording instead of generating noise.
+            mock_source_replay_at_recorded_rate (bool): If True, recorded frames are replayed at the rate at which
+                they were triggered (or at `mock_source_frame_rate_hz` if the recording has no timestamps). If False,
+                they are replayed as fast as the transfer buffer is read.
         """
         # use super() to ensure init of MockAbstractSpectrumDevice is only called once in child classes with multiple
         # inheritance
         super().__init__(mode=AcquisitionMode.SPC_REC_STD_SINGLE, **kwargs)
+        self._param_dict[SPC_AVERAGES] = 1
+        self._param_dict[SPC_ABADIVIDER] = 16
+        self._param_dict[SPC_AVAILABADIVIDER_MIN] = 16
+        self._param_dict[SPC_AVAILABADIVIDER_MAX] = 16384
+        self._param_dict[SPC_AVAILABADIVIDER_STEP] = 16
+        self._param_dict[SPC_GATE_LEN_ALIGNMENT] = 8
         self._source_frame_rate_hz = mock_source_frame_rate_hz
+        self._source_recording = RecordingReader(mock_source_recording) if mock_source_recording is not None else None
+        self._source_replay_at_recorded_rate = mock_source_replay_at_recorded_rate
         self._buffer_lock = Lock()
         self._acquisition_stop_event = Event()
         self._acquisition_thread: Optional[Thread] = None
         self._timestamp_thread: Optional[Thread] = None
+        self._aba_thread: Optional[Thread] = None
         self._enabled_channels = [0]
 
+    def _write_register_to_device(
+        self, spectrum_register: int, value: int, length: SpectrumRegisterLength = SpectrumRegisterLength.THIRTY_TWO
+    ) -> None:
+        """See `MockAbstractSpectrumDevice._write_register_to_device()`. Writing to SPC_DATA_AVAIL_CARD_LEN
+        additionally releases that many bytes of the transfer buffer back to the mock waveform source, as the driver
+        would on real hardware. Writing to SPC_ABA_AVAIL_CARD_LEN or SPC_TS_AVAIL_CARD_LEN does the same for the ABA or
+        timestamp transfer buffer."""
+        if spectrum_register == SPC_DATA_AVAIL_CARD_LEN:
+            with self._buffer_lock:
+                super()._write_register_to_device(spectrum_register, value, length)
+                buffer_length_in_bytes = self.transfer_buffers[0].data_array_length_in_bytes
+                self._param_dict[SPC_DATA_AVAIL_USER_LEN] -= value
+                self._param_dict[SPC_DATA_AVAIL_USER_POS] = (
+                    self._param_dict[SPC_DATA_AVAIL_USER_POS] + value
+                ) % buffer_length_in_bytes
+        elif spectrum_register == SPC_ABA_AVAIL_CARD_LEN and self._aba_transfer_buffer is not None:
+            with self._buffer_lock:
+                super()._write_register_to_device(spectrum_register, value, length)
+                aba_buffer_length_in_bytes = self._aba_transfer_buffer.data_array_length_in_bytes
+                self._param_dict[SPC_ABA_AVAIL_USER_LEN] -= value
+                self._param_dict[SPC_ABA_AVAIL_USER_POS] = (
+                    self._param_dict[SPC_ABA_AVAIL_USER_POS] + value
+                ) % aba_buffer_length_in_bytes
+        elif spectrum_register == SPC_TS_AVAIL_CARD_LEN and self._timestamper is not None:
+            with self._buffer_lock:
+                super()._write_register_to_device(spectrum_register, value, length)
+                timestamp_buffer_length_in_bytes = self._timestamper.transfer_buffer.data_array_length_in_bytes
+                self._param_dict[SPC_TS_AVAIL_USER_LEN] -= value
+                self._param_dict[SPC_TS_AVAIL_USER_POS] = (
+                    self._param_dict[SPC_TS_AVAIL_USER_POS] + value
+                ) % timestamp_buffer_length_in_bytes
+        elif spectrum_register == SPC_M2CMD and value & M2CMD_EXTRA_WAITDMA:
+            super()._write_register_to_device(spectrum_register, value, length)
+            self._wait_for_mock_timestamps()
+        else:
+            super()._write_register_to_device(spectrum_register, value, length)
+
+    def _wait_for_mock_timestamps(self) -> None:
+        """Simulates M2CMD_EXTRA_WAITDMA, which blocks until timestamps have been transferred or the timeout is reached."""
+        timeout_in_s = 1e-3 * self._param_dict[SPC_TIMEOUT]
+        start_time = monotonic()
+        while self._param_dict.get(SPC_TS_AVAIL_USER_LEN, 0) == 0 and not self._acquisition_stop_event.is_set():
+            if timeout_in_s > 0 and monotonic() - start_time > timeout_in_s:
+                break
+            sleep(MOCK_TIMESTAMP_WAIT_INTERVAL_IN_S)
+
     def start(self) -> None:
-        """Starts a mock waveform source in a separate thread. The source generates noise samples according to the
-        number of currently enabled channels and the acquisition length, and places them in the transfer buffer.
+        """Starts a mock waveform source in a separate thread. The source generates noise samples (or replays recorded
+        frames) according to the number of currently enabled channels and the acquisition length, and places them in
+        the transfer buffer. In SPC_REC_FIFO_ABA mode, a second source writes the slow "A" stream into the ABA transfer
+        buffer, generating acquisition_length_in_samples / aba_divider samples per channel for each B segment. In
+        SPC_REC_FIFO_GATE mode, the source simulates gates of random length and writes their timestamps into the
+        timestamp transfer buffer.
         """
+        if self._source_recording is not None:
+            recorded_frame_shape = self._source_recording.metadata.frame_shape
+            if recorded_frame_shape != (self.acquisition_length_in_samples, len(self.enabled_analog_channel_nums)):
+                raise SpectrumSettingsMismatchError(
+                    f"The replayed recording has frames of {recorded_frame_shape[1]} channels and "
+                    f"{recorded_frame_shape[0]} samples, which does not match the mock device configuration."
+                )
         self.define_transfer_buffer()
         notify_size = self.transfer_buffers[0].notify_size_in_pages  # this will be 0 in STD_SINGLE_MODE
-        waveform_source = mock_waveform_source_factory(self.acquisition_mode, self._param_dict, notify_size)
+        if self.acquisition_mode == AcquisitionMode.SPC_REC_FIFO_GATE and self._timestamper is not None:
+            # the gate source also writes the gate timestamps, so it needs the timestamp transfer buffer
+            waveform_source: MockWaveformSource = GatedFIFOModeMockWaveformSource(
+                self._param_dict,
+                self._timestamper.transfer_buffer.data_array,
+                len(self.enabled_analog_channel_nums),
+                self.sample_rate_in_hz,
+                self.read_spectrum_device_register(SPC_GATE_LEN_ALIGNMENT),
+            )
+        else:
+            waveform_source = mock_waveform_source_factory(
+                self.acquisition_mode,
+                self._param_dict,
+                notify_size,
+                recording=self._source_recording,
+                replay_at_recorded_rate=self._source_replay_at_recorded_rate,
+                num_averages=self.number_of_averages if self.acquisition_mode in AVERAGING_ACQUISITION_MODES else 1,
+            )
         amplitude = self.read_spectrum_device_register(SPC_MIINST_MAXADCVALUE)
         print(f"STARTING MOCK WAVEFORMS SOURCE WITH AMPLITUDE {amplitude}")
+        with self._buffer_lock:
+            self._param_dict[SPC_DATA_AVAIL_USER_POS] = 0
+            self._param_dict[SPC_DATA_AVAIL_USER_LEN] = 0
+            self._param_dict[SPC_ABA_AVAIL_USER_POS] = 0
+            self._param_dict[SPC_ABA_AVAIL_USER_LEN] = 0
+            self._param_dict[SPC_TS_AVAIL_USER_POS] = 0
+            self._param_dict[SPC_TS_AVAIL_USER_LEN] = 0
         self._acquisition_stop_event.clear()
         self._acquisition_thread = Thread(
             target=waveform_source,
@@ -341,6 +483,21 @@ class MockAbstractSpectrumDigitiser(MockAbstractSpectrumDevice, AbstractSpectrum
             ),
         )
         self._acquisition_thread.start()
+        if self.acquisition_mode == AcquisitionMode.SPC_REC_FIFO_ABA and self._aba_transfer_buffer is not None:
+            num_channels = len(self.enabled_analog_channel_nums)
+            aba_samples_per_channel_per_frame = max(1, self.acquisition_length_in_samples // self.aba_divider)
+            self._aba_thread = Thread(
+                target=ABAStreamMockWaveformSource(self._param_dict),
+                args=(
+                    self._acquisition_stop_event,
+                    self._source_frame_rate_hz,
+                    amplitude,
+                    self._aba_transfer_buffer.data_array,
+                    aba_samples_per_channel_per_frame * num_channels,
+                    self._buffer_lock,
+                ),
+            )
+            self._aba_thread.start()
 
     def stop(self) -> None:
         """Stops the mock waveform source and timestamp threads."""
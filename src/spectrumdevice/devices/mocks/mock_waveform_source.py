@@ -7,25 +7,41 @@
 from abc import ABC, abstractmethod
 from threading import Event, Lock
 from time import monotonic, sleep
-from typing import Dict
+from typing import Dict, Optional
 
-from numpy import ndarray
-from numpy.random import uniform
+from numpy import diff, full, median, ndarray, uint64
+from numpy.random import randint, uniform
 
-from spectrum_gmbh.py_header.regs import SPC_DATA_AVAIL_USER_LEN, SPC_DATA_AVAIL_USER_POS
+from spectrum_gmbh.py_header.regs import (
+    SPC_ABA_AVAIL_USER_LEN,
+    SPC_DATA_AVAIL_USER_LEN,
+    SPC_DATA_AVAIL_USER_POS,
+    SPC_TS_AVAIL_USER_LEN,
+)
+from spectrumdevice.features.recorder.recording_reader import RecordingReader
 from spectrumdevice.settings import AcquisitionMode
 from spectrumdevice.settings.transfer_buffer import PAGE_SIZE_IN_BYTES
 
 
 TRANSFER_CHUNK_COUNTER = -1  # this is a custom key used in the _para_dict to count the number of transfers
+REPLAY_POSITION = -2  # a custom key used in the _param_dict to store the index of the next frame to replay
+BYTES_PER_GATE_TIMESTAMPS = 32  # two 16-byte timestamps, one for the opening and one for the closing of the gate
 
 
 class MockWaveformSource(ABC):
     """Interface for a mock noise waveform source. Implementations are intended to be called in their own thread.
-    When called, `MockWaveformSource` implementations will fill a provided buffer with noise samples."""
+    When called, `MockWaveformSource` implementations will fill a provided buffer with noise samples.
 
-    def __init__(self, param_dict: Dict[int, int]):
+    To simulate on-board averaging, a source can be created with `num_averages` > 1. Each sample is then the sum of
+    `num_averages` samples, as transferred by the card in averaging modes. The noise is scaled so that the averaged
+    samples span the same range as unaveraged samples."""
+
+    def __init__(self, param_dict: Dict[int, int], num_averages: int = 1):
         self._param_dict = param_dict
+        self._num_averages = num_averages
+
+    def _noise(self, amplitude: float, num_samples: int) -> ndarray:
+        return uniform(low=-1 * amplitude, high=amplitude, size=num_samples) * self._num_averages
 
     @abstractmethod
     def __call__(
@@ -50,8 +66,8 @@ class SingleModeMockWaveformSource(MockWaveformSource):
         samples_per_frame: int,
         buffer_lock: Lock,
     ) -> None:
-        """When called, this MockWaveformSource simulates SPC_REC_STD_SINGLE Mode, placing a single frames worth of
-        samples into a provided mock on_device_buffer.
+        """When called, this MockWaveformSource simulates SPC_REC_STD_SINGLE Mode (or SPC_REC_STD_AVERAGE mode),
+        placing a single frames worth of samples into a provided mock on_device_buffer.
 
         Args:
             stop_flag (Event): A threading event that will be used in the calling thread to stop the acquisition.
@@ -68,17 +84,54 @@ class SingleModeMockWaveformSource(MockWaveformSource):
             sleep(0.001)
         if not stop_flag.is_set():
             with buffer_lock:
-                transfer_buffer_data_array[:samples_per_frame] = uniform(
-                    low=-1 * amplitude, high=amplitude, size=samples_per_frame
-                )
+                transfer_buffer_data_array[:samples_per_frame] = self._noise(amplitude, samples_per_frame)
                 self._param_dict[SPC_DATA_AVAIL_USER_POS] = 0
                 self._param_dict[SPC_DATA_AVAIL_USER_LEN] = samples_per_frame * bytes_per_sample
             self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
 
 
+class MultiModeMockWaveformSource(MockWaveformSource):
+    def __call__(
+        self,
+        stop_flag: Event,
+        frame_rate: float,
+        amplitude: float,
+        transfer_buffer_data_array: ndarray,
+        samples_per_frame: int,
+        buffer_lock: Lock,
+    ) -> None:
+        """When called, this MockWaveformSource simulates SPC_REC_STD_MULTI Mode, recording one segment of noise
+        samples every 1 / frame_rate seconds until the transfer buffer, which holds one batch of segments, is full. Like
+        the card, the segments are only made available for transfer once they have all been recorded.
+
+        Args:
+            stop_flag (Event): A threading event that will be used in the calling thread to stop the acquisition.
+            frame_rate (float): The rate at which segments are recorded (Hz).
+            amplitude (float): Waveforms will contain random values in the range -amplitude to +amplitude
+            transfer_buffer_data_array (ndarray): The numpy array into which the noise samples will be written.
+            samples_per_frame (int): The number of samples (across all channels) in each segment.
+            buffer_lock (Lock): A threading lock created in the calling thread that will be used to ensure access to
+                the transfer buffer and its registers is thread safe.
+        """
+        num_segments = transfer_buffer_data_array.size // samples_per_frame
+        segments = transfer_buffer_data_array[: num_segments * samples_per_frame].reshape((num_segments, -1))
+        start_time = monotonic()
+        for segment_num in range(num_segments):
+            while not stop_flag.is_set() and ((monotonic() - start_time) < ((segment_num + 1) / frame_rate)):
+                sleep(0.001)
+            if stop_flag.is_set():
+                return
+            with buffer_lock:
+                segments[segment_num] = self._noise(amplitude, samples_per_frame)
+        with buffer_lock:
+            self._param_dict[SPC_DATA_AVAIL_USER_POS] = 0
+            self._param_dict[SPC_DATA_AVAIL_USER_LEN] = segments.nbytes
+        self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
+
+
 class MultiFIFOModeMockWaveformSource(MockWaveformSource):
-    def __init__(self, param_dict: Dict[int, int], notify_size_in_pages: float):
-        super().__init__(param_dict)
+    def __init__(self, param_dict: Dict[int, int], notify_size_in_pages: float, num_averages: int = 1):
+        super().__init__(param_dict, num_averages)
         self._notify_size_in_pages = notify_size_in_pages
 
     def __call__(
@@ -90,51 +143,323 @@ class MultiFIFOModeMockWaveformSource(MockWaveformSource):
         samples_per_frame: int,
         buffer_lock: Lock,
     ) -> None:
-        """When called, this `MockWaveformSource` simulates SPC_REC_FIFO_MULTI Mode, continuously replacing the contents
-        of on_device_buffer with new frames of noise samples.
+        """When called, this `MockWaveformSource` simulates SPC_REC_FIFO_MULTI Mode (or SPC_REC_FIFO_AVERAGE or
+        SPC_REC_FIFO_SINGLE mode), continuously writing new frames of noise samples into the transfer buffer, which is
+        treated as a ring buffer. As with real hardware, samples are only written into space that has been released by
+        the consumer (by writing to SPC_DATA_AVAIL_CARD_LEN), and SPC_DATA_AVAIL_USER_LEN is increased by one
+        notify-size chunk each time a chunk is written.
 
         Args:
             stop_flag (Event): A threading event that will be used in the calling thread to stop the acquisition.
-            frame_rate (float): The contents of the on_device_buffer will be updated at this rate (Hz).
+            frame_rate (float): New frames will be written to the transfer buffer at this rate (Hz).
             amplitude (float): Waveforms will contain random values from a uniform distribution in the range -amplitude
             to +amplitude
-            on_device_buffer (ndarray): The numpy array into which the noise samples will be written.
+            transfer_buffer_data_array (ndarray): The numpy array into which the noise samples will be written.
+            samples_per_frame (int): The number of samples (across all channels) in each frame.
             buffer_lock (Lock): A threading lock created in the calling thread that will be used to ensure access to
-                the on_device_buffer array is thread safe.
+                the transfer buffer and its registers is thread safe.
 
         """
         bytes_per_sample = transfer_buffer_data_array.itemsize
+        buffer_size_in_samples = transfer_buffer_data_array.size
         notify_size_in_samples = int(self._notify_size_in_pages * PAGE_SIZE_IN_BYTES / bytes_per_sample)
-        notify_size_in_samples = min((samples_per_frame, notify_size_in_samples))
+        notify_size_in_samples = min((samples_per_frame, notify_size_in_samples, buffer_size_in_samples))
         samples_per_second = frame_rate * samples_per_frame
         notify_sizes_per_second = samples_per_second / notify_size_in_samples
-        sample_count = 0
+        write_position = 0
         while not stop_flag.is_set():
 
-            start_sample = sample_count % samples_per_frame
-            start_sample = 0 if start_sample == 256 else start_sample
-            stop_sample = (sample_count + notify_size_in_samples) % samples_per_frame
-            stop_sample = stop_sample if stop_sample else samples_per_frame
             with buffer_lock:
-                transfer_buffer_data_array[start_sample:stop_sample] = uniform(
-                    low=-1 * amplitude, high=amplitude, size=stop_sample - start_sample
+                num_free_samples = (
+                    buffer_size_in_samples - self._param_dict[SPC_DATA_AVAIL_USER_LEN] // bytes_per_sample
                 )
-                self._param_dict[SPC_DATA_AVAIL_USER_POS] = start_sample * bytes_per_sample
-                self._param_dict[SPC_DATA_AVAIL_USER_LEN] = (stop_sample - start_sample) * bytes_per_sample
-            sample_count += notify_size_in_samples
-            self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
+
+            # Like the card, the source cannot write into space that has not been released by the consumer
+            if num_free_samples >= notify_size_in_samples:
+                write_into_ring_buffer(
+                    transfer_buffer_data_array,
+                    write_position,
+                    self._noise(amplitude, notify_size_in_samples),
+                )
+                write_position = (write_position + notify_size_in_samples) % buffer_size_in_samples
+                with buffer_lock:
+                    self._param_dict[SPC_DATA_AVAIL_USER_LEN] += notify_size_in_samples * bytes_per_sample
+                self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
 
             sleep(1 / notify_sizes_per_second)
 
 
+class ABAStreamMockWaveformSource(MockWaveformSource):
+    def __call__(
+        self,
+        stop_flag: Event,
+        frame_rate: float,
+        amplitude: float,
+        transfer_buffer_data_array: ndarray,
+        samples_per_frame: int,
+        buffer_lock: Lock,
+    ) -> None:
+        """When called, this `MockWaveformSource` simulates the slow "A" stream of SPC_REC_FIFO_ABA mode, continuously
+        writing noise samples into the ABA transfer buffer, which is treated as a ring buffer. The fast "B" segments are
+        generated by a separate `MultiFIFOModeMockWaveformSource`. As with real hardware, samples are only written into
+        space that has been released by the consumer (by writing to SPC_ABA_AVAIL_CARD_LEN), and
+        SPC_ABA_AVAIL_USER_LEN is increased each time samples are written.
+
+        Args:
+            stop_flag (Event): A threading event that will be used in the calling thread to stop the acquisition.
+            frame_rate (float): New A samples will be written to the ABA transfer buffer at this rate (Hz).
+            amplitude (float): Waveforms will contain random values from a uniform distribution in the range -amplitude
+            to +amplitude
+            transfer_buffer_data_array (ndarray): The numpy array of the ABA transfer buffer.
+            samples_per_frame (int): The number of A samples (across all channels) written each time.
+            buffer_lock (Lock): A threading lock created in the calling thread that will be used to ensure access to
+                the transfer buffer and its registers is thread safe.
+        """
+        bytes_per_sample = transfer_buffer_data_array.itemsize
+        buffer_size_in_samples = transfer_buffer_data_array.size
+        write_position = 0
+        while not stop_flag.is_set():
+            with buffer_lock:
+                num_free_samples = buffer_size_in_samples - self._param_dict[SPC_ABA_AVAIL_USER_LEN] // bytes_per_sample
+            if num_free_samples >= samples_per_frame:
+                write_into_ring_buffer(
+                    transfer_buffer_data_array, write_position, self._noise(amplitude, samples_per_frame)
+                )
+                write_position = (write_position + samples_per_frame) % buffer_size_in_samples
+                with buffer_lock:
+                    self._param_dict[SPC_ABA_AVAIL_USER_LEN] += samples_per_frame * bytes_per_sample
+            sleep(1 / frame_rate)
+
+
+class GatedFIFOModeMockWaveformSource(MockWaveformSource):
+    def __init__(
+        self,
+        param_dict: Dict[int, int],
+        timestamp_data_array: ndarray,
+        num_channels: int,
+        sample_rate_in_hz: float,
+        gate_length_alignment_in_samples: int,
+    ):
+        super().__init__(param_dict)
+        self._timestamps = timestamp_data_array.view(uint64)
+        self._num_channels = num_channels
+        self._sample_rate_in_hz = sample_rate_in_hz
+        self._gate_length_alignment = gate_length_alignment_in_samples
+
+    def __call__(
+        self,
+        stop_flag: Event,
+        frame_rate: float,
+        amplitude: float,
+        transfer_buffer_data_array: ndarray,
+        samples_per_frame: int,
+        buffer_lock: Lock,
+    ) -> None:
+        """When called, this `MockWaveformSource` simulates SPC_REC_FIFO_GATE mode. A gate of random length (up to twice
+        the acquisition length) opens every 1 / frame_rate seconds. For each gate, the pre- and post-trigger samples and
+        the samples recorded while the gate was open are written into the transfer buffer, which is treated as a ring
+        buffer, and the timestamps of the opening and closing of the gate are written into the timestamp transfer
+        buffer. As with real hardware, samples are only written into space that has been released by the consumer.
+
+        Args:
+            stop_flag (Event): A threading event that will be used in the calling thread to stop the acquisition.
+            frame_rate (float): The rate at which gates open (Hz).
+            amplitude (float): Waveforms will contain random values from a uniform distribution in the range -amplitude
+            to +amplitude
+            transfer_buffer_data_array (ndarray): The numpy array into which the noise samples will be written.
+            samples_per_frame (int): The number of pre- and post-trigger samples (across all channels) recorded around
+                each gate.
+            buffer_lock (Lock): A threading lock created in the calling thread that will be used to ensure access to
+                the transfer buffers and their registers is thread safe.
+        """
+        bytes_per_sample = transfer_buffer_data_array.itemsize
+        buffer_size_in_samples = transfer_buffer_data_array.size
+        samples_per_channel_around_gate = samples_per_frame // self._num_channels
+        write_position = 0
+        timestamp_position = 0
+        start_time = monotonic()
+        gate_num = 0
+        while not stop_flag.is_set():
+            gate_num += 1
+            while not stop_flag.is_set() and (monotonic() - start_time) < (gate_num / frame_rate):
+                sleep(0.001)
+            gate_start = int((monotonic() - start_time) * self._sample_rate_in_hz)
+            gate_end = gate_start + randint(1, 2 * samples_per_channel_around_gate + 1)
+            aligned_gate_length = (
+                -(-(gate_end - gate_start) // self._gate_length_alignment) * self._gate_length_alignment
+            )
+            num_samples = (samples_per_channel_around_gate + aligned_gate_length) * self._num_channels
+            samples = self._noise(amplitude, num_samples)
+
+            # Like the card, the timestamps of the gate are written as soon as it closes, before its samples have been
+            # transferred. Each timestamp occupies two 64-bit elements of the timestamp buffer. Only the first holds
+            # the time.
+            while not stop_flag.is_set():
+                with buffer_lock:
+                    num_free_timestamp_bytes = self._timestamps.nbytes - self._param_dict[SPC_TS_AVAIL_USER_LEN]
+                if num_free_timestamp_bytes >= BYTES_PER_GATE_TIMESTAMPS:
+                    break
+                sleep(0.001)
+            if stop_flag.is_set():
+                return
+            for timestamp in (gate_start, gate_end):
+                self._timestamps[timestamp_position] = timestamp
+                timestamp_position = (timestamp_position + 2) % self._timestamps.size
+            with buffer_lock:
+                self._param_dict[SPC_TS_AVAIL_USER_LEN] += BYTES_PER_GATE_TIMESTAMPS
+
+            # Like the card, the source cannot write into space that has not been released by the consumer
+            num_written_samples = 0
+            while not stop_flag.is_set() and num_written_samples < num_samples:
+                with buffer_lock:
+                    num_free_samples = (
+                        buffer_size_in_samples - self._param_dict[SPC_DATA_AVAIL_USER_LEN] // bytes_per_sample
+                    )
+                num_samples_to_write = min(num_free_samples, num_samples - num_written_samples)
+                if num_samples_to_write > 0:
+                    write_into_ring_buffer(
+                        transfer_buffer_data_array,
+                        write_position,
+                        samples[num_written_samples : num_written_samples + num_samples_to_write],
+                    )
+                    write_position = (write_position + num_samples_to_write) % buffer_size_in_samples
+                    num_written_samples += num_samples_to_write
+                    with buffer_lock:
+                        self._param_dict[SPC_DATA_AVAIL_USER_LEN] += num_samples_to_write * bytes_per_sample
+                    self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
+                else:
+                    sleep(0.001)
+
+
+class ReplayMockWaveformSource(MockWaveformSource):
+    def __init__(
+        self,
+        param_dict: Dict[int, int],
+        acquisition_mode: AcquisitionMode,
+        recording: RecordingReader,
+        replay_at_recorded_rate: bool = True,
+    ):
+        super().__init__(param_dict)
+        self._acquisition_mode = acquisition_mode
+        self._recording = recording
+        self._replay_at_recorded_rate = replay_at_recorded_rate
+
+    def __call__(
+        self,
+        stop_flag: Event,
+        frame_rate: float,
+        amplitude: float,
+        transfer_buffer_data_array: ndarray,
+        samples_per_frame: int,
+        buffer_lock: Lock,
+    ) -> None:
+        """When called, this `MockWaveformSource` replays the raw frames of a recording made with `Recorder`, copying
+        them from the memory-mapped file into the transfer buffer. In SPC_REC_STD_SINGLE mode, one frame is replayed
+        per acquisition. In FIFO modes, frames are replayed continuously into the transfer buffer, which is treated as
+        a ring buffer, returning to the first frame when the end of the recording is reached. The position in the
+        recording is kept between acquisitions.
+
+        Args:
+            stop_flag (Event): A threading event that will be used in the calling thread to stop the acquisition.
+            frame_rate (float): The frame rate to replay at if the recording has no timestamps.
+            amplitude (float): Not used. The replayed samples are those of the recording.
+            transfer_buffer_data_array (ndarray): The numpy array into which the replayed samples will be written.
+            samples_per_frame (int): The number of samples (across all channels) in each frame. Must match the
+                frames of the recording.
+            buffer_lock (Lock): A threading lock created in the calling thread that will be used to ensure access to
+                the transfer buffer and its registers is thread safe.
+        """
+        # frames are stored interleaved, exactly as the card transfers them
+        frames = self._recording.raw_frames.transpose((0, 2, 1)).reshape((len(self._recording), samples_per_frame))
+        intervals_in_s = self._frame_intervals_in_s(frame_rate)
+        bytes_per_frame = samples_per_frame * transfer_buffer_data_array.itemsize
+        buffer_size_in_samples = transfer_buffer_data_array.size
+        write_position = 0
+        next_frame_time = monotonic()
+        while not stop_flag.is_set():
+            frame_num = self._param_dict.get(REPLAY_POSITION, 0) % len(frames)
+            next_frame_time += intervals_in_s[frame_num] if self._replay_at_recorded_rate else 0.0
+            while not stop_flag.is_set() and monotonic() < next_frame_time:
+                sleep(min(0.001, next_frame_time - monotonic()))
+
+            if self._acquisition_mode == AcquisitionMode.SPC_REC_STD_SINGLE:
+                if not stop_flag.is_set():
+                    with buffer_lock:
+                        transfer_buffer_data_array[:samples_per_frame] = frames[frame_num]
+                        self._param_dict[SPC_DATA_AVAIL_USER_POS] = 0
+                        self._param_dict[SPC_DATA_AVAIL_USER_LEN] = bytes_per_frame
+                    self._param_dict[REPLAY_POSITION] = frame_num + 1
+                    self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
+                return
+
+            # Like the card, the source cannot write into space that has not been released by the consumer
+            while not stop_flag.is_set():
+                with buffer_lock:
+                    num_free_bytes = (
+                        buffer_size_in_samples * transfer_buffer_data_array.itemsize
+                        - self._param_dict[SPC_DATA_AVAIL_USER_LEN]
+                    )
+                if num_free_bytes >= bytes_per_frame:
+                    break
+                sleep(0.001)
+            if stop_flag.is_set():
+                return
+            write_into_ring_buffer(transfer_buffer_data_array, write_position, frames[frame_num])
+            write_position = (write_position + samples_per_frame) % buffer_size_in_samples
+            with buffer_lock:
+                self._param_dict[SPC_DATA_AVAIL_USER_LEN] += bytes_per_frame
+            self._param_dict[REPLAY_POSITION] = frame_num + 1
+            self._param_dict[TRANSFER_CHUNK_COUNTER] += 1
+
+    def _frame_intervals_in_s(self, frame_rate: float) -> ndarray:
+        """The time to wait before replaying each frame: the interval between its trigger and the previous trigger in
+        the recording, or 1 / frame_rate if the recording has no timestamps. The first frame is replayed after the
+        median interval."""
+        intervals_in_s = full(len(self._recording), 1 / frame_rate)
+        timestamps_in_ns = self._recording.timestamps_in_ns
+        if len(timestamps_in_ns) > 1 and (timestamps_in_ns >= 0).all():
+            intervals_in_s[1:] = diff(timestamps_in_ns) * 1e-9
+            intervals_in_s[0] = median(intervals_in_s[1:])
+        return intervals_in_s
+
+
+def write_into_ring_buffer(ring_buffer: ndarray, position: int, samples: ndarray) -> None:
+    """Write samples into a 1D array starting at position, wrapping around to the start of the array if the end is
+    reached."""
+    num_samples_before_end = min(len(samples), ring_buffer.size - position)
+    ring_buffer[position : position + num_samples_before_end] = samples[:num_samples_before_end]
+    ring_buffer[: len(samples) - num_samples_before_end] = samples[num_samples_before_end:]
+
+
 def mock_waveform_source_factory(
     acquisition_mode: AcquisitionMode,
     param_dict: Dict[int, int],
     notify_size_in_pages: float = 0,
+    recording: Optional[RecordingReader] = None,
+    replay_at_recorded_rate: bool = True,
+    num_averages: int = 1,
 ) -> MockWaveformSource:
-    if acquisition_mode in (AcquisitionMode.SPC_REC_FIFO_MULTI, AcquisitionMode.SPC_REC_FIFO_AVERAGE):
+    """Create the mock waveform source for an acquisition mode. If a recording is provided, its frames are replayed
+    (see `ReplayMockWaveformSource`). Otherwise, noise is generated. In averaging modes, `num_averages` is the number of
+    acquisitions summed into each transferred acquisition."""
+    if recording is not None:
+        if acquisition_mode not in (AcquisitionMode.SPC_REC_FIFO_MULTI, AcquisitionMode.SPC_REC_STD_SINGLE):
+            raise NotImplementedError(f"Replay not yet implemented for {acquisition_mode} acquisition mode.")
+        return ReplayMockWaveformSource(param_dict, acquisition_mode, recording, replay_at_recorded_rate)
+    elif acquisition_mode in (
+        AcquisitionMode.SPC_REC_FIFO_MULTI,
+        AcquisitionMode.SPC_REC_FIFO_SINGLE,
+        AcquisitionMode.SPC_REC_FIFO_ABA,
+    ):
+        # In ABA mode, this source generates the B segments. See `ABAStreamMockWaveformSource` for the A stream.
         return MultiFIFOModeMockWaveformSource(param_dict, notify_size_in_pages)
+    elif acquisition_mode == AcquisitionMode.SPC_REC_FIFO_AVERAGE:
+        return MultiFIFOModeMockWaveformSource(param_dict, notify_size_in_pages, num_averages)
     elif acquisition_mode == AcquisitionMode.SPC_REC_STD_SINGLE:
         return SingleModeMockWaveformSource(param_dict)
+    elif acquisition_mode == AcquisitionMode.SPC_REC_STD_AVERAGE:
+        return SingleModeMockWaveformSource(param_dict, num_averages)
+    elif acquisition_mode == AcquisitionMode.SPC_REC_STD_MULTI:
+        return MultiModeMockWaveformSource(param_dict)
     else:
         raise NotImplementedError(f"Mock waveform source not yet implemented for {acquisition_mode} acquisition mode.")
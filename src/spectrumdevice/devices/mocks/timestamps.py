@@ -6,11 +6,10 @@
 
 import datetime
 
-from numpy import uint64
+from numpy import full, uint64
+from numpy.typing import NDArray
 
-from spectrum_gmbh.py_header.regs import SPC_TIMESTAMP_CMD
 from spectrumdevice.devices.spectrum_timestamper import Timestamper
-from spectrumdevice.settings.timestamps import TimestampMode
 from spectrumdevice.spectrum_wrapper import DEVICE_HANDLE_TYPE
 
 BYTES_PER_TIMESTAMP = 16
@@ -22,11 +21,13 @@ ON_BOARD_TIMESTAMP_MEMORY_SIZE_BYTES = 16384
 class MockTimestamper(Timestamper):
     def _configure_parent_device(self, handle: DEVICE_HANDLE_TYPE) -> None:
         """This is a mock class, so don't need to set transfer buffer on hardware. Replaces method in Timestamper."""
-        # Enable standard timestamp mode (timestamps are in seconds relative to the reference time)
-        self._parent_device.write_to_spectrum_device_register(SPC_TIMESTAMP_CMD, TimestampMode.STANDARD.value)
+        self._enable_timestamp_mode()
 
     def _read_ref_time_from_device(self) -> datetime.datetime:
         return datetime.datetime.now()
 
     def get_timestamp(self) -> datetime.datetime:
         return datetime.datetime.now()
+
+    def get_trigger_timestamps_in_samples(self, num_timestamps: int, timeout_in_s: float = 0) -> NDArray[uint64]:
+        return full(num_timestamps, self._current_time_in_samples(), dtype=uint64)
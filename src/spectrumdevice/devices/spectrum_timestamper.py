@@ -4,12 +4,17 @@
 # Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
 # Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
 
+import logging
 import struct
 from abc import ABC
 from copy import copy
-from datetime import datetime, timedelta
+from datetime import datetime
+from time import monotonic, sleep, time_ns
 from typing import Tuple, Optional
 
+from numpy import concatenate, empty, frombuffer, full, int64, uint64
+from numpy.typing import NDArray
+
 from spectrum_gmbh.py_header.regs import (
     SPC_TIMESTAMP_CMD,
     SPC_TS_RESET,
@@ -19,24 +24,34 @@ from spectrum_gmbh.py_header.regs import (
     M2CMD_EXTRA_POLL,
     SPC_TS_AVAIL_USER_POS,
     M2CMD_CARD_WRITESETUP,
+    M2CMD_EXTRA_WAITDMA,
+    SPC_M2STATUS,
+    M2STAT_EXTRA_OVERRUN,
 )
 from spectrumdevice.devices.digitiser.digitiser_interface import SpectrumDigitiserInterface
 from spectrumdevice.exceptions import (
     SpectrumTimestampsPollingTimeout,
 )
 from spectrumdevice.settings import TriggerSource
-from spectrumdevice.settings.timestamps import TimestampMode
+from spectrumdevice.settings.timestamps import TimestampMode, TimestampReadoutMode, TimestampReference
 from spectrumdevice.settings.transfer_buffer import (
+    BYTES_PER_TIMESTAMP,
+    DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+    PAGE_SIZE_IN_BYTES,
     BufferDirection,
     BufferType,
+    TransferBuffer,
     set_transfer_buffer,
     transfer_buffer_factory,
 )
 from spectrumdevice.spectrum_wrapper import DEVICE_HANDLE_TYPE
 
+logger = logging.getLogger(__name__)
+
 MAX_POLL_COUNT = 50
-BYTES_PER_TIMESTAMP = 16
 REF_TIME_PRECISION_IN_SEC = 10e-3
+TIMESTAMP_POLL_INTERVAL_IN_S = 1e-3
+TIMESTAMP_NOTIFY_SIZE_IN_PAGES = BYTES_PER_TIMESTAMP / PAGE_SIZE_IN_BYTES  # notify as each timestamp arrives
 
 
 class Timestamper(ABC):
@@ -44,32 +59,95 @@ class Timestamper(ABC):
         self,
         parent_device: SpectrumDigitiserInterface,
         parent_device_handle: DEVICE_HANDLE_TYPE,
+        buffer_size_in_timestamps: int = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
+        readout_mode: TimestampReadoutMode = TimestampReadoutMode.POLL,
     ):
+        """
+        Args:
+            parent_device (`SpectrumDigitiserInterface`): The card whose triggers are timestamped.
+            parent_device_handle (DEVICE_HANDLE_TYPE): The handle of the card.
+            buffer_size_in_timestamps (int): The number of timestamps the timestamp transfer buffer can hold. Must be a
+                multiple of 256. If timestamps are not read as quickly as triggers arrive, a larger buffer delays the
+                point at which timestamps are lost.
+            readout_mode (`TimestampReadoutMode`): Whether the driver polls the card for timestamps (default), or
+                transfers them by DMA along with the samples.
+        """
         self._parent_device = parent_device
+        self._readout_mode = readout_mode
         self._transfer_buffer = transfer_buffer_factory(
             buffer_type=BufferType.SPCM_BUF_TIMESTAMP,
             direction=BufferDirection.SPCM_DIR_CARDTOPC,
             bytes_per_sample=parent_device.bytes_per_sample,
+            size_in_timestamps=buffer_size_in_timestamps,
+            notify_size_in_pages=TIMESTAMP_NOTIFY_SIZE_IN_PAGES if readout_mode == TimestampReadoutMode.NOTIFY else 1,
         )
         self._expected_timestamp_bytes_per_frame = BYTES_PER_TIMESTAMP
+        self._timestamps_lost = False
 
-        self._ref_time: Optional[datetime] = None
+        self._reference: Optional[TimestampReference] = None
         self._configure_parent_device(parent_device_handle)
 
+    @property
+    def transfer_buffer(self) -> TransferBuffer:
+        """The ring buffer into which the card transfers timestamps."""
+        return self._transfer_buffer
+
+    @property
+    def buffer_size_in_timestamps(self) -> int:
+        """The number of timestamps the timestamp transfer buffer can hold."""
+        return self._transfer_buffer.data_array_length_in_bytes // BYTES_PER_TIMESTAMP
+
+    @property
+    def readout_mode(self) -> TimestampReadoutMode:
+        """Whether timestamps are polled or transferred by DMA along with the samples."""
+        return self._readout_mode
+
+    @property
+    def timestamps_lost(self) -> bool:
+        """True if the timestamp buffer has overrun since timestamping was enabled, so that some triggers have no
+        timestamp and later timestamps no longer line up with their acquisitions. Overruns are detected when reading
+        timestamps with `get_timestamps_in_samples()` or `get_timestamps_in_ns()`."""
+        return self._timestamps_lost
+
+    @property
+    def reference(self) -> TimestampReference:
+        """The time at which the timestamp counter was reset and the rate at which it counts, captured when timestamping
+        was enabled and again when an acquisition starts at a different sample rate. Use it to convert raw timestamps to
+        absolute times."""
+        if self._reference is None:
+            raise IOError("No timestamp reference time has been set.")
+        return self._reference
+
     def _configure_parent_device(self, handle: DEVICE_HANDLE_TYPE) -> None:
         set_transfer_buffer(handle, self._transfer_buffer)
+        self._enable_timestamp_mode()
+
+    def _enable_timestamp_mode(self) -> None:
         # Enable standard timestamp mode (timestamps are in seconds relative to the reference time)
         self._parent_device.write_to_spectrum_device_register(SPC_TIMESTAMP_CMD, TimestampMode.STANDARD.value)
 
         # Write the configuration to the card
         self._parent_device.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
 
-        # Set the local PC time to the reference time register on the card
-        self._ref_time = datetime.now()
-        self._parent_device.write_to_spectrum_device_register(SPC_TIMESTAMP_CMD, SPC_TS_RESET)
+        self._reset_counter(self._parent_device.sample_rate_in_hz)
 
-        # Enable polling mode so we can get the timestamps without waiting for a notification
-        self._parent_device.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_EXTRA_POLL)
+        if self._readout_mode == TimestampReadoutMode.POLL:
+            # Enable polling mode so we can get the timestamps without waiting for a notification. In NOTIFY mode, the
+            # transfer is instead started along with the transfer of samples (see SpectrumDigitiserCard.start_transfer)
+            self._parent_device.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_EXTRA_POLL)
+
+    def refresh_reference(self) -> None:
+        """Called when an acquisition starts. The timestamp counter counts sample clock ticks, so if the sample rate has
+        changed since the reference was captured, the counter is reset and a new reference is captured."""
+        sample_rate_in_hz = self._parent_device.sample_rate_in_hz
+        if self._reference is None or self._reference.sample_rate_in_hz != sample_rate_in_hz:
+            self._reset_counter(sample_rate_in_hz)
+
+    def _reset_counter(self, sample_rate_in_hz: int) -> None:
+        # Set the local PC time to the reference time register on the card. The sample rate is read once, rather than
+        # every time a timestamp is converted
+        self._reference = TimestampReference(time_ns(), sample_rate_in_hz)
+        self._parent_device.write_to_spectrum_device_register(SPC_TIMESTAMP_CMD, SPC_TS_RESET)
 
     def _transfer_timestamps_to_transfer_buffer(self) -> Tuple[int, int]:
         num_available_bytes = self._parent_device.read_spectrum_device_register(SPC_TS_AVAIL_USER_LEN)
@@ -117,13 +195,110 @@ class Timestamper(ABC):
             raise SpectrumTimestampsPollingTimeout()
 
         timestamp_in_samples = struct.unpack("<2Q", struct.pack(f"<{len(kept_bytes)}B", *kept_bytes))[0]
-        timestamp_in_seconds_since_ref = timedelta(
-            seconds=float(timestamp_in_samples) / self._parent_device.sample_rate_in_hz
-        )
+        return self.samples_to_datetime(timestamp_in_samples)
+
+    def get_timestamps_in_samples(self, num_timestamps: int, timeout_in_s: float = 0) -> NDArray[uint64]:
+        """Wait for the next `num_timestamps` timestamps to be transferred and return them in samples since the
+        reference time, without converting them to datetimes. All the timestamps available in the timestamp buffer are
+        read at once, rather than one at a time, including any that wrap around the end of the ring buffer. In
+        SPC_REC_FIFO_GATE mode, the card writes two timestamps for each gate: one when the gate opens and one when it
+        closes. If the timestamp buffer is found to have overrun, a warning is logged and `timestamps_lost` is set.
 
-        if self._ref_time is not None:
-            timestamp_in_datetime = self._ref_time + timestamp_in_seconds_since_ref
+        Args:
+            num_timestamps (int): The number of timestamps to read.
+            timeout_in_s (float): The time to wait for new timestamps to arrive. 0 (default) means wait forever.
+
+        Returns:
+            timestamps_in_samples (NDArray[uint64]): The raw timestamps, in the order in which they were recorded.
+        """
+        buffer_length_in_bytes = self._transfer_buffer.data_array_length_in_bytes
+        timestamps_in_samples = empty(num_timestamps, dtype=uint64)
+        num_read_timestamps = 0
+        time_of_last_progress = monotonic()
+        while num_read_timestamps < num_timestamps:
+            num_available_bytes = self._parent_device.read_spectrum_device_register(SPC_TS_AVAIL_USER_LEN)
+            if num_available_bytes >= buffer_length_in_bytes:
+                self._check_for_lost_timestamps()
+            num_bytes = min(num_available_bytes, (num_timestamps - num_read_timestamps) * BYTES_PER_TIMESTAMP)
+            num_bytes -= num_bytes % BYTES_PER_TIMESTAMP
+            if num_bytes == 0:
+                if timeout_in_s > 0 and (monotonic() - time_of_last_progress) > timeout_in_s:
+                    raise SpectrumTimestampsPollingTimeout()
+                self._wait_for_timestamps()
+                continue
+            start_pos_in_bytes = self._parent_device.read_spectrum_device_register(SPC_TS_AVAIL_USER_POS)
+            new_timestamps = self._decode_timestamps(start_pos_in_bytes % buffer_length_in_bytes, num_bytes)
+            timestamps_in_samples[num_read_timestamps : num_read_timestamps + len(new_timestamps)] = new_timestamps
+            num_read_timestamps += len(new_timestamps)
+            self._mark_transfer_buffer_elements_as_free(num_bytes)
+            time_of_last_progress = monotonic()
+        return timestamps_in_samples
+
+    def get_trigger_timestamps_in_samples(self, num_timestamps: int, timeout_in_s: float = 0) -> NDArray[uint64]:
+        """Wait for the timestamps of the next `num_timestamps` triggers and return them as raw sample clock ticks since
+        the reference time. As in `get_timestamp()`, if the card is only triggered by software, the current time is
+        used instead. See `get_timestamps_in_samples()`.
+
+        Args:
+            num_timestamps (int): The number of timestamps to read.
+            timeout_in_s (float): The time to wait for new timestamps to arrive. 0 (default) means wait forever.
+
+        Returns:
+            timestamps_in_samples (NDArray[uint64]): The raw timestamps, in the order in which they were recorded.
+                Convert them to absolute times with `reference`.
+        """
+        trigger_source = self._parent_device.trigger_sources
+        if len(trigger_source) == 1 and trigger_source[0] == TriggerSource.SPC_TMASK_SOFTWARE:
+            return full(num_timestamps, self._current_time_in_samples(), dtype=uint64)
+        return self.get_timestamps_in_samples(num_timestamps, timeout_in_s)
+
+    def get_timestamps_in_ns(self, num_timestamps: int, timeout_in_s: float = 0) -> NDArray[int64]:
+        """Wait for the timestamps of the next `num_timestamps` triggers and return them as times in nanoseconds since
+        the Unix epoch. See `get_trigger_timestamps_in_samples()`.
+
+        Args:
+            num_timestamps (int): The number of timestamps to read.
+            timeout_in_s (float): The time to wait for new timestamps to arrive. 0 (default) means wait forever.
+
+        Returns:
+            timestamps_in_ns (NDArray[int64]): The timestamps, in the order in which they were recorded.
+        """
+        return self.reference.samples_to_ns(self.get_trigger_timestamps_in_samples(num_timestamps, timeout_in_s))
+
+    def _current_time_in_samples(self) -> int:
+        return (time_ns() - self.reference.ref_time_in_ns) * self.reference.sample_rate_in_hz // 1_000_000_000
+
+    def _wait_for_timestamps(self) -> None:
+        if self._readout_mode == TimestampReadoutMode.NOTIFY:
+            # blocks until the next notify-sized block of timestamps has been transferred, or the card times out
+            self._parent_device.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_EXTRA_WAITDMA)
         else:
-            raise IOError("No timestamp reference time has been set.")
+            sleep(TIMESTAMP_POLL_INTERVAL_IN_S)
+
+    def _check_for_lost_timestamps(self) -> None:
+        """Called when the timestamp buffer is full. The card then keeps new timestamps in its on-board memory, and only
+        discards them, setting the M2STAT_EXTRA_OVERRUN status flag, once that is full too."""
+        if self._timestamps_lost:
+            return
+        if self._parent_device.read_spectrum_device_register(SPC_M2STATUS) & M2STAT_EXTRA_OVERRUN:
+            self._timestamps_lost = True
+            logger.warning(
+                f"The timestamp buffer ({self.buffer_size_in_timestamps} timestamps) overran, so some timestamps were "
+                f"lost. Read timestamps more often or enable timestamping with a larger buffer."
+            )
+
+    def _decode_timestamps(self, start_pos_in_bytes: int, num_bytes: int) -> NDArray[uint64]:
+        """Decode timestamps from the timestamp buffer, as two slices if they wrap around its end. Each timestamp
+        occupies 16 bytes, but only the first 8 hold the time. The buffer is a whole number of timestamps long, so a
+        single timestamp never wraps around its end."""
+        data = self._transfer_buffer.data_array
+        num_bytes_before_end = min(num_bytes, len(data) - start_pos_in_bytes)
+        timestamps = frombuffer(data[start_pos_in_bytes : start_pos_in_bytes + num_bytes_before_end], dtype="<u8")[::2]
+        if num_bytes_before_end < num_bytes:
+            timestamps_after_wrap = frombuffer(data[: num_bytes - num_bytes_before_end], dtype="<u8")[::2]
+            timestamps = concatenate((timestamps, timestamps_after_wrap))
+        return timestamps.astype(uint64)
 
-        return timestamp_in_datetime
+    def samples_to_datetime(self, timestamp_in_samples: int) -> datetime:
+        """Convert a timestamp in samples since the reference time to a datetime. See `TimestampReference`."""
+        return self.reference.samples_to_datetime(timestamp_in_samples)
@@ -34,6 +34,26 @@ class SpectrumNoTransferBufferDefined(IOError):
         super().__init__(f"No transfer buffer has been defined: {msg}")
 
 
+class SpectrumFrameAlreadyReleased(IOError):
+    def __init__(self, msg: str) -> None:
+        super().__init__(f"Frame has already been released back to the card: {msg}")
+
+
+class SpectrumTransferTimeout(IOError):
+    def __init__(self, msg: str) -> None:
+        super().__init__(f"Timed out waiting for samples to be transferred: {msg}")
+
+
+class SpectrumAcquisitionStopped(IOError):
+    def __init__(self, msg: str) -> None:
+        super().__init__(f"The acquisition was stopped while waiting for samples: {msg}")
+
+
+class SpectrumTransferBufferFull(IOError):
+    def __init__(self, msg: str) -> None:
+        super().__init__(f"The transfer buffer is full of unreleased samples: {msg}")
+
+
 class SpectrumTriggerOperationNotImplemented(NotImplementedError):
     def __init__(self, msg: str) -> None:
         super().__init__(f"Operation is not implemented for the requested trigger channel: {msg}")
@@ -0,0 +1,193 @@
+"""Provides a class that services the FIFO transfers of a digitiser on a background thread."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+import logging
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from types import TracebackType
+from typing import Optional, Type
+
+from numpy import ndarray
+
+from spectrumdevice.devices.digitiser.digitiser_interface import SpectrumDigitiserInterface
+from spectrumdevice.settings import FrameDropPolicy
+
+logger = logging.getLogger(__name__)
+QUEUE_POLL_INTERVAL_IN_S = 0.1
+
+
+class AcquisitionEngine:
+    """Runs a continuous FIFO acquisition on a digitiser (a card or a StarHub), reading each batch of waveforms on a
+    dedicated thread and placing it in a bounded queue. Reading from the card then overlaps with the processing of
+    earlier frames by the consumer, and a consumer that is briefly too slow does not stop the card's transfer buffer
+    from being serviced:
+
+        with AcquisitionEngine(card, max_queue_size=32, drop_policy=FrameDropPolicy.DROP_OLDEST) as engine:
+            for _ in range(1000):
+                process(engine.get_frame())
+
+    Each frame is the array returned by `get_waveform_array()` (or `get_raw_waveform_array()` if `raw` is True), with
+    shape (batch_size, num_enabled_channels, acquisition_length_in_samples). The digitiser must already be configured
+    in a FIFO acquisition mode.
+    """
+
+    def __init__(
+        self,
+        digitiser: SpectrumDigitiserInterface,
+        max_queue_size: int = 16,
+        drop_policy: FrameDropPolicy = FrameDropPolicy.BLOCK,
+        raw: bool = False,
+    ):
+        """
+        Args:
+            digitiser (`SpectrumDigitiserInterface`): The card or StarHub to acquire from.
+            max_queue_size (int): The number of frames that can wait in the queue for the consumer.
+            drop_policy (`FrameDropPolicy`): What to do with a new frame when the queue is full.
+            raw (bool): If True, queue raw ADC codes instead of voltages. Use the `voltage_conversion_coefficients` of
+                the digitiser to convert them.
+        """
+        if max_queue_size < 1:
+            raise ValueError("The frame queue must be able to hold at least one frame.")
+        self._digitiser = digitiser
+        self._drop_policy = drop_policy
+        self._raw = raw
+        self._queue: Queue[ndarray] = Queue(maxsize=max_queue_size)
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+        self._error: Optional[Exception] = None
+        self._num_frames_acquired = 0
+        self._num_frames_dropped = 0
+
+    @property
+    def num_frames_acquired(self) -> int:
+        """The number of frames read from the digitiser since the engine was started, including dropped frames."""
+        return self._num_frames_acquired
+
+    @property
+    def num_frames_dropped(self) -> int:
+        """The number of frames discarded because the queue was full, since the engine was started."""
+        return self._num_frames_dropped
+
+    @property
+    def num_frames_queued(self) -> int:
+        """The number of frames currently waiting in the queue."""
+        return self._queue.qsize()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start a continuous FIFO acquisition on the digitiser, and start reading frames into the queue."""
+        if self._thread is not None:
+            raise RuntimeError("The acquisition engine has already been started.")
+        self._stop_event.clear()
+        self._error = None
+        self._num_frames_acquired = 0
+        self._num_frames_dropped = 0
+        self._digitiser.execute_continuous_fifo_acquisition()
+        self._thread = Thread(target=self._acquire_frames, name="AcquisitionEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the acquisition and wait for the acquisition thread to finish. Frames already in the queue can still be
+        retrieved with `get_frame()`. The thread may take up to the timeout of the digitiser to finish if it is waiting
+        for samples when the acquisition is stopped."""
+        self._stop_event.set()
+        self._digitiser.stop()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_frame(self, timeout_in_s: Optional[float] = None) -> ndarray:
+        """Take the oldest frame from the queue, waiting for one to be acquired if the queue is empty.
+
+        Args:
+            timeout_in_s (Optional[float]): The maximum time to wait for a frame. If None, wait until a frame arrives or
+                the acquisition thread stops.
+
+        Returns:
+            frame (ndarray): The frame, with shape (batch_size, num_enabled_channels, acquisition_length_in_samples).
+
+        Raises:
+            queue.Empty: If no frame arrived within the timeout, or the acquisition has stopped and the queue is empty.
+            Exception: Any error raised on the acquisition thread is re-raised once the queue is empty.
+        """
+        try:
+            return self._queue.get_nowait()
+        except Empty:
+            pass
+        waited_in_s = 0.0
+        while timeout_in_s is None or waited_in_s < timeout_in_s:
+            if not self.is_running:
+                break
+            poll_interval_in_s = QUEUE_POLL_INTERVAL_IN_S
+            if timeout_in_s is not None:
+                poll_interval_in_s = min(poll_interval_in_s, timeout_in_s - waited_in_s)
+            try:
+                return self._queue.get(timeout=poll_interval_in_s)
+            except Empty:
+                waited_in_s += poll_interval_in_s
+        try:
+            return self._queue.get_nowait()
+        except Empty:
+            if self._error is not None:
+                raise self._error
+            raise
+
+    def _acquire_frames(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                if self._raw:
+                    frame = self._digitiser.get_raw_waveform_array()
+                else:
+                    frame = self._digitiser.get_waveform_array()
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    logger.error(f"Acquisition engine stopped by error: {e}")
+                    self._error = e
+                return
+            self._num_frames_acquired += 1
+            self._enqueue(frame)
+
+    def _enqueue(self, frame: ndarray) -> None:
+        if self._drop_policy == FrameDropPolicy.BLOCK:
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(frame, timeout=QUEUE_POLL_INTERVAL_IN_S)
+                    return
+                except Full:
+                    pass
+        elif self._drop_policy == FrameDropPolicy.DROP_NEWEST:
+            try:
+                self._queue.put_nowait(frame)
+            except Full:
+                self._num_frames_dropped += 1
+        elif self._drop_policy == FrameDropPolicy.DROP_OLDEST:
+            while True:
+                try:
+                    self._queue.put_nowait(frame)
+                    return
+                except Full:
+                    try:
+                        self._queue.get_nowait()
+                        self._num_frames_dropped += 1
+                    except Empty:
+                        pass
+        else:
+            raise ValueError(f"Frame drop policy {self._drop_policy} not recognised")
+
+    def __enter__(self) -> "AcquisitionEngine":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.stop()
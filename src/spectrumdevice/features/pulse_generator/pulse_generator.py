@@ -74,26 +74,28 @@ class PulseGenerator(PulseGeneratorInterface):
     ) -> PulseGeneratorOutputSettings:
         """Configure all pulse generator output settings at once. By default, all values are coerced to the
         nearest values allowed by the hardware, and the coerced values are returned."""
-        self.set_output_inversion(settings.output_inversion)
-        coerced_settings = PulseGeneratorOutputSettings(
-            period_in_seconds=self.set_period_in_seconds(settings.period_in_seconds, coerce=coerce),
-            duty_cycle=self.set_duty_cycle(settings.duty_cycle, coerce=coerce),
-            num_pulses=self.set_num_pulses(settings.num_pulses, coerce=coerce),
-            delay_in_seconds=self.set_delay_in_seconds(settings.delay_in_seconds, coerce=coerce),
-            output_inversion=settings.output_inversion,
-        )
-        self.write_to_parent_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
+        with self._parent_io_line.parent_device_register_batch():
+            self.set_output_inversion(settings.output_inversion)
+            coerced_settings = PulseGeneratorOutputSettings(
+                period_in_seconds=self.set_period_in_seconds(settings.period_in_seconds, coerce=coerce),
+                duty_cycle=self.set_duty_cycle(settings.duty_cycle, coerce=coerce),
+                num_pulses=self.set_num_pulses(settings.num_pulses, coerce=coerce),
+                delay_in_seconds=self.set_delay_in_seconds(settings.delay_in_seconds, coerce=coerce),
+                output_inversion=settings.output_inversion,
+            )
+            self.write_to_parent_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
         return coerced_settings
 
     def configure_trigger(self, settings: PulseGeneratorTriggerSettings) -> None:
         """Configure all pulse generator trigger settings at once."""
-        self.set_trigger_mode(settings.trigger_mode)
-        self.set_trigger_detection_mode(settings.trigger_detection_mode)
-        self.multiplexer_1.set_trigger_source(settings.multiplexer_1_source)
-        self.multiplexer_2.set_trigger_source(settings.multiplexer_2_source)
-        self.multiplexer_1.set_output_inversion(settings.multiplexer_1_output_inversion)
-        self.multiplexer_2.set_output_inversion(settings.multiplexer_2_output_inversion)
-        self.write_to_parent_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
+        with self._parent_io_line.parent_device_register_batch():
+            self.set_trigger_mode(settings.trigger_mode)
+            self.set_trigger_detection_mode(settings.trigger_detection_mode)
+            self.multiplexer_1.set_trigger_source(settings.multiplexer_1_source)
+            self.multiplexer_2.set_trigger_source(settings.multiplexer_2_source)
+            self.multiplexer_1.set_output_inversion(settings.multiplexer_1_output_inversion)
+            self.multiplexer_2.set_output_inversion(settings.multiplexer_2_output_inversion)
+            self.write_to_parent_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
 
     def force_trigger(self) -> None:
         """Generates a pulse when the pulse generator trigger source (mux 2) is set to 'software'."""
@@ -0,0 +1,302 @@
+"""Provides a class for streaming the raw samples acquired by a digitiser directly to disk."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from pathlib import Path
+from queue import Queue
+from struct import pack
+from threading import Thread
+from time import monotonic
+from types import TracebackType
+from typing import Dict, Optional, Tuple, Type, Union
+
+from numpy import (
+    arange,
+    ascontiguousarray,
+    dtype,
+    empty,
+    full,
+    int8,
+    int16,
+    int32,
+    int64,
+    ndarray,
+    uint8,
+)
+
+from spectrumdevice.devices.digitiser.digitiser_card import SpectrumDigitiserCard
+from spectrumdevice.devices.digitiser.digitiser_interface import SpectrumDigitiserInterface
+from spectrumdevice.features.recorder.recording_format import (
+    FRAME_INDEX_DTYPE,
+    INDEX_OFFSET_OFFSET_IN_BYTES,
+    NUM_FRAMES_OFFSET_IN_BYTES,
+    UNKNOWN_TIMESTAMP,
+    RecordingMetadata,
+    encode_recording_header,
+    frame_index_path,
+)
+from spectrumdevice.settings import AcquisitionSettings
+from spectrumdevice.settings.device_modes import AVERAGING_ACQUISITION_MODES
+from spectrumdevice.settings.transfer_buffer import AVERAGED_BYTES_PER_SAMPLE, PAGE_SIZE_IN_BYTES
+
+DEFAULT_WRITE_BLOCK_SIZE_IN_BYTES = 8 * 1024 * 1024
+SAMPLE_DTYPES: Dict[int, dtype] = {1: dtype(int8), 2: dtype(int16), AVERAGED_BYTES_PER_SAMPLE: dtype(int32)}
+
+
+class Recorder:
+    """Streams the raw samples acquired by a digitiser (a card or a StarHub) to a file, in the format documented in
+    `spectrumdevice.features.recorder.recording_format`. The file header stores the acquisition settings, sample rate
+    and voltage conversion coefficients, so the raw samples can be converted to volts when the file is read.
+
+    Samples are copied into one of two page-aligned blocks in memory. When a block is full, it is handed to a writer
+    thread, which writes it to disk in one call while the other block is being filled. Memory use is therefore fixed,
+    however long the recording. If the disk cannot keep up, `write()` blocks until the writer thread has finished with
+    the other block.
+
+        with Recorder("run.spcm", card, acquisition_settings) as recorder:
+            recorder.record(duration_in_s=3600)
+
+    A frame index holding the byte offset, trigger time and trigger counter of every frame (24 bytes per frame) is
+    written to a separate file as frames are recorded (see `frame_index_path()`), and is flushed to disk each time a block
+    of samples is. When the recording is closed, the index is appended to the recording and the separate file deleted.
+    Use `RecordingReader` to read the file.
+
+    The digitiser must already be configured with `acquisition_settings`.
+    """
+
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        digitiser: SpectrumDigitiserInterface,
+        acquisition_settings: AcquisitionSettings,
+        write_block_size_in_bytes: int = DEFAULT_WRITE_BLOCK_SIZE_IN_BYTES,
+    ):
+        """
+        Args:
+            file_path (Union[str, Path]): The file to create. An existing file is overwritten.
+            digitiser (`SpectrumDigitiserInterface`): The configured card or StarHub to record from.
+            acquisition_settings (`AcquisitionSettings`): The settings the digitiser was configured with, to be stored
+                in the file header.
+            write_block_size_in_bytes (int): The size of each write to disk. Rounded up to a whole number of pages.
+        """
+        self._digitiser = digitiser
+        coefficients = digitiser.voltage_conversion_coefficients
+        if acquisition_settings.acquisition_mode in AVERAGING_ACQUISITION_MODES:
+            bytes_per_sample = AVERAGED_BYTES_PER_SAMPLE
+        else:
+            bytes_per_sample = digitiser.bytes_per_sample
+        self._metadata = RecordingMetadata(
+            acquisition_settings=acquisition_settings,
+            sample_rate_in_hz=digitiser.sample_rate_in_hz,
+            sample_dtype=SAMPLE_DTYPES[bytes_per_sample],
+            num_channels=len(coefficients.channel_nums),
+            acquisition_length_in_samples=digitiser.acquisition_length_in_samples,
+            voltage_conversion=coefficients,
+        )
+        block_size = -(-write_block_size_in_bytes // PAGE_SIZE_IN_BYTES) * PAGE_SIZE_IN_BYTES
+        self._free_blocks: Queue[ndarray] = Queue()
+        for _ in range(2):
+            self._free_blocks.put(_create_page_aligned_array(block_size))
+        self._full_blocks: Queue[Optional[Tuple[ndarray, int]]] = Queue()
+        self._active_block = self._free_blocks.get()
+        self._num_bytes_in_active_block = 0
+        self._num_frames = 0
+        self._next_trigger_counter = 0
+        self._writer_error: Optional[Exception] = None
+
+        self._file = open(file_path, "wb", buffering=0)
+        self._index_file_path = frame_index_path(file_path)
+        self._index_file = open(self._index_file_path, "w+b")
+        header = encode_recording_header(self._metadata)
+        self._data_offset = len(header)
+        self._write_all(header)
+        self._writer_thread = Thread(target=self._write_blocks, name="RecorderWriter", daemon=True)
+        self._writer_thread.start()
+
+    @property
+    def metadata(self) -> RecordingMetadata:
+        """The metadata written to the file header."""
+        return self._metadata
+
+    @property
+    def num_frames(self) -> int:
+        """The number of frames (acquisitions) recorded so far."""
+        return self._num_frames
+
+    def record(self, max_frames: Optional[int] = None, duration_in_s: Optional[float] = None) -> None:
+        """Start a continuous FIFO acquisition and record it until `max_frames` frames have been recorded or
+        `duration_in_s` has elapsed, then stop the acquisition. For single cards, samples are copied to the write blocks
+        straight from the transfer buffer using `SpectrumDigitiserCard.get_zero_copy_frame()`.
+
+        Args:
+            max_frames (Optional[int]): The number of frames (acquisitions) after which to stop. If None, no limit.
+            duration_in_s (Optional[float]): The time after which to stop. If None, no limit.
+        """
+        if max_frames is None and duration_in_s is None:
+            raise ValueError("Provide max_frames or duration_in_s, or both.")
+        num_frames_at_start = self._num_frames
+        self._digitiser.execute_continuous_fifo_acquisition()
+        start_time = monotonic()
+        try:
+            while max_frames is None or self._num_frames - num_frames_at_start < max_frames:
+                if duration_in_s is not None and monotonic() - start_time > duration_in_s:
+                    break
+                num_frames_wanted = None if max_frames is None else max_frames - self._num_frames + num_frames_at_start
+                if isinstance(self._digitiser, SpectrumDigitiserCard):
+                    with self._digitiser.get_zero_copy_frame() as frame:
+                        raw_waveforms = frame.samples[:num_frames_wanted]
+                        self.write(raw_waveforms, self._read_timestamps(len(raw_waveforms)))
+                else:
+                    raw_waveforms = self._digitiser.get_raw_waveform_array()[:num_frames_wanted]
+                    self.write(raw_waveforms, self._read_timestamps(len(raw_waveforms)))
+        finally:
+            self._digitiser.stop()
+
+    def write(
+        self,
+        raw_waveforms: ndarray,
+        timestamps_in_ns: Optional[ndarray] = None,
+        trigger_counters: Optional[ndarray] = None,
+    ) -> None:
+        """Append a batch of raw frames to the recording. The samples are copied before this method returns.
+
+        Args:
+            raw_waveforms (ndarray): Raw samples with shape (num_frames, num_channels, acquisition_length_in_samples),
+                as returned by `get_raw_waveform_array()` or held by a `ZeroCopyFrame`.
+            timestamps_in_ns (Optional[ndarray]): The trigger time of each frame, in nanoseconds since the Unix epoch.
+                If None, the timestamps are recorded as unknown.
+            trigger_counters (Optional[ndarray]): The trigger counter of each frame. If None, frames are assumed to
+                follow on from the previously written frames without any missing triggers.
+        """
+        self._raise_writer_error()
+        num_frames, num_channels, acquisition_length = raw_waveforms.shape
+        if (acquisition_length, num_channels) != self._metadata.frame_shape:
+            raise ValueError(
+                f"Expected frames of {self._metadata.num_channels} channels and "
+                f"{self._metadata.acquisition_length_in_samples} samples, got {num_channels} and {acquisition_length}."
+            )
+        if raw_waveforms.dtype != self._metadata.sample_dtype:
+            raise ValueError(f"Expected {self._metadata.sample_dtype} samples, got {raw_waveforms.dtype}.")
+
+        # The index is written first, so that the index file always covers the samples written to disk
+        index = empty(num_frames, dtype=FRAME_INDEX_DTYPE)
+        index["byte_offset"] = (
+            self._data_offset + (self._num_frames + arange(num_frames)) * self._metadata.num_bytes_per_frame
+        )
+        index["timestamp_in_ns"] = UNKNOWN_TIMESTAMP if timestamps_in_ns is None else timestamps_in_ns
+        if trigger_counters is None:
+            index["trigger_counter"] = self._next_trigger_counter + arange(num_frames)
+        else:
+            index["trigger_counter"] = trigger_counters
+        if num_frames > 0:
+            self._next_trigger_counter = int(index["trigger_counter"][-1]) + 1
+        self._index_file.write(index.tobytes())
+
+        # Frames are stored interleaved, as transferred by the card. For frames that are views of the transfer buffer,
+        # transposing back is free and the samples are copied only once, into the write block.
+        samples_as_bytes = ascontiguousarray(raw_waveforms.transpose((0, 2, 1))).reshape(-1).view(uint8)
+        num_written_bytes = 0
+        while num_written_bytes < len(samples_as_bytes):
+            num_bytes = min(
+                len(samples_as_bytes) - num_written_bytes, len(self._active_block) - self._num_bytes_in_active_block
+            )
+            self._active_block[
+                self._num_bytes_in_active_block : self._num_bytes_in_active_block + num_bytes
+            ] = samples_as_bytes[num_written_bytes : num_written_bytes + num_bytes]
+            self._num_bytes_in_active_block += num_bytes
+            num_written_bytes += num_bytes
+            if self._num_bytes_in_active_block == len(self._active_block):
+                self._swap_blocks()
+        self._num_frames += num_frames
+
+    def _read_timestamps(self, num_frames: int) -> Optional[ndarray]:
+        if not self._metadata.acquisition_settings.timestamping_enabled:
+            return None
+        timestamps_in_ns = self._digitiser.get_batch_timestamps_in_ns()
+        if timestamps_in_ns is None:
+            return full(num_frames, UNKNOWN_TIMESTAMP, dtype=int64)
+        return timestamps_in_ns[:num_frames]
+
+    def close(self) -> None:
+        """Write any samples still in memory, copy the frame index to the end of the file, record the number of frames
+        and the position of the index in the file header, and close the file. The separate index file is then
+        deleted."""
+        if self._file.closed:
+            return
+        try:
+            if self._num_bytes_in_active_block > 0:
+                self._full_blocks.put((self._active_block, self._num_bytes_in_active_block))
+                self._num_bytes_in_active_block = 0
+            self._full_blocks.put(None)
+            self._writer_thread.join()
+            self._raise_writer_error()
+            index_offset = self._data_offset + self._num_frames * self._metadata.num_bytes_per_frame
+            self._file.seek(index_offset)
+            self._copy_index_to_file()
+            self._file.seek(NUM_FRAMES_OFFSET_IN_BYTES)
+            self._write_all(pack("<Q", self._num_frames))
+            self._file.seek(INDEX_OFFSET_OFFSET_IN_BYTES)
+            self._write_all(pack("<Q", index_offset))
+        finally:
+            self._file.close()
+            self._index_file.close()
+        self._index_file_path.unlink()
+
+    def _copy_index_to_file(self) -> None:
+        """Copy the index file to the recording, through the (now free) active write block."""
+        self._index_file.seek(0)
+        while True:
+            num_bytes = self._index_file.readinto(memoryview(self._active_block))
+            if not num_bytes:
+                return
+            self._write_all(self._active_block[:num_bytes])
+
+    def _swap_blocks(self) -> None:
+        self._index_file.flush()
+        self._full_blocks.put((self._active_block, self._num_bytes_in_active_block))
+        self._active_block = self._free_blocks.get()
+        self._num_bytes_in_active_block = 0
+        self._raise_writer_error()
+
+    def _write_blocks(self) -> None:
+        while True:
+            full_block = self._full_blocks.get()
+            if full_block is None:
+                return
+            block, num_bytes = full_block
+            try:
+                if self._writer_error is None:
+                    self._write_all(block[:num_bytes])
+            except Exception as e:
+                self._writer_error = e
+            finally:
+                self._free_blocks.put(block)
+
+    def _write_all(self, data: Union[bytes, ndarray]) -> None:
+        view = memoryview(data).cast("B")
+        while len(view) > 0:
+            num_written_bytes = self._file.write(view)
+            view = view[num_written_bytes:]
+
+    def _raise_writer_error(self) -> None:
+        if self._writer_error is not None:
+            raise IOError(f"Writing the recording to disk failed: {self._writer_error}")
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _create_page_aligned_array(size_in_bytes: int) -> ndarray:
+    unaligned = empty(size_in_bytes + PAGE_SIZE_IN_BYTES, dtype=uint8)
+    offset = -unaligned.ctypes.data % PAGE_SIZE_IN_BYTES
+    return unaligned[offset : offset + size_in_bytes]
@@ -0,0 +1,199 @@
+"""Defines the file format written by `Recorder`.
+
+A recording file consists of a header, the raw samples of every recorded acquisition ("frame") and a frame index:
+
+| Offset (bytes)   | Length (bytes)  | Content                                                                    |
+|------------------|-----------------|----------------------------------------------------------------------------|
+| 0                | 8               | Magic bytes `b"SPCMREC\\0"`                                                 |
+| 8                | 4               | Format version (little-endian uint32), currently 2                         |
+| 12               | 4               | Length of the JSON metadata in bytes (little-endian uint32)                |
+| 16               | 8               | Number of frames in the file (little-endian uint64), written when closed   |
+| 24               | 8               | Offset of the first frame, in bytes (little-endian uint64)                 |
+| 32               | 8               | Offset of the frame index, in bytes (little-endian uint64), written when   |
+|                  |                 | closed. 0 if the file was not closed.                                      |
+| 40               | metadata length | UTF-8 JSON metadata (see below)                                            |
+| data offset      | n_frames * size | Raw samples, frame after frame                                             |
+| index offset     | n_frames * 24   | Frame index: one record per frame (see below)                              |
+
+The data offset is a multiple of the page size (4096 bytes), so the samples can be written in page-aligned blocks. The
+JSON metadata contains:
+
+* `"acquisition_settings"`: the `AcquisitionSettings` of the recording, with enums stored by name.
+* `"sample_rate_in_hz"`: the sample rate reported by the digitiser, which may differ from the requested rate.
+* `"sample_dtype"`: the NumPy dtype string of the raw samples, e.g. `"<i2"`.
+* `"num_channels"` and `"acquisition_length_in_samples"`: the dimensions of each frame.
+* `"channel_nums"`, `"voltage_scales"` and `"voltage_offsets"`: the coefficients for converting the raw samples of
+  each channel to volts (`volts = raw * scale + offset`). See `VoltageConversionCoefficients`.
+
+Each frame holds the samples of one acquisition exactly as the card transfers them: interleaved by channel, i.e. an
+array of shape (acquisition_length_in_samples, num_channels) in C order.
+
+Each record of the frame index (`FRAME_INDEX_DTYPE`) holds three little-endian 64-bit integers: the byte offset of the
+frame in the file, the time at which it was triggered in nanoseconds since the Unix epoch (-1 if unknown), and its
+trigger counter (the number of triggers received before it since the acquisition started).
+
+While recording, the frame index is written to a separate file next to the recording (see `frame_index_path()`), and
+only copied to the end of the recording and deleted when the recording is closed. If the recording was not closed, the
+index can therefore still be read from that file.
+
+Version 1 files have no frame index, and their fixed header ends after the offset of the first frame, at byte 32.
+"""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+import json
+from dataclasses import dataclass, fields
+from enum import Enum
+from pathlib import Path
+from struct import Struct
+from typing import Any, Dict, Tuple, Type, Union
+
+from numpy import array, dtype, float64
+
+from spectrumdevice.settings import (
+    AcquisitionMode,
+    AcquisitionSettings,
+    TimestampReadoutMode,
+    VoltageConversionCoefficients,
+)
+from spectrumdevice.settings.channel import InputCoupling, InputImpedance, InputPath
+from spectrumdevice.settings.transfer_buffer import PAGE_SIZE_IN_BYTES
+
+RECORDING_MAGIC = b"SPCMREC\0"
+RECORDING_FORMAT_VERSION = 2
+RECORDING_HEADER_STRUCTS = {1: Struct("<8sIIQQ"), 2: Struct("<8sIIQQQ")}
+RECORDING_HEADER_STRUCT = RECORDING_HEADER_STRUCTS[RECORDING_FORMAT_VERSION]
+RECORDING_VERSION_STRUCT = Struct("<8sI")
+NUM_FRAMES_OFFSET_IN_BYTES = 16
+INDEX_OFFSET_OFFSET_IN_BYTES = 32
+FRAME_INDEX_DTYPE = dtype([("byte_offset", "<u8"), ("timestamp_in_ns", "<i8"), ("trigger_counter", "<u8")])
+FRAME_INDEX_FILE_SUFFIX = ".index"
+UNKNOWN_TIMESTAMP = -1
+
+_ENUM_SETTINGS: Dict[str, Type[Enum]] = {
+    "acquisition_mode": AcquisitionMode,
+    "input_impedances": InputImpedance,
+    "input_couplings": InputCoupling,
+    "input_paths": InputPath,
+    "timestamp_readout_mode": TimestampReadoutMode,
+}
+
+
+@dataclass
+class RecordingMetadata:
+    """The contents of the header of a recording file. See the module documentation for the file format."""
+
+    acquisition_settings: AcquisitionSettings
+    """The settings with which the recording was acquired."""
+    sample_rate_in_hz: int
+    """The sample rate reported by the digitiser."""
+    sample_dtype: dtype
+    """The type of the raw samples."""
+    num_channels: int
+    """The number of channels in each frame."""
+    acquisition_length_in_samples: int
+    """The number of samples per channel in each frame."""
+    voltage_conversion: VoltageConversionCoefficients
+    """The coefficients for converting the raw samples of each channel to volts."""
+
+    @property
+    def frame_shape(self) -> Tuple[int, int]:
+        """The shape of each frame as stored in the file: (acquisition_length_in_samples, num_channels)."""
+        return self.acquisition_length_in_samples, self.num_channels
+
+    @property
+    def num_bytes_per_frame(self) -> int:
+        return self.acquisition_length_in_samples * self.num_channels * self.sample_dtype.itemsize
+
+
+def frame_index_path(file_path: Union[str, Path]) -> Path:
+    """The file to which the frame index of a recording is written until the recording is closed."""
+    return Path(str(file_path) + FRAME_INDEX_FILE_SUFFIX)
+
+
+def encode_recording_header(metadata: RecordingMetadata, num_frames: int = 0) -> bytes:
+    """Encode the header of a recording file, padded to a whole number of pages."""
+    metadata_bytes = json.dumps(_metadata_to_dict(metadata)).encode("utf-8")
+    unpadded_length = RECORDING_HEADER_STRUCT.size + len(metadata_bytes)
+    data_offset = -(-unpadded_length // PAGE_SIZE_IN_BYTES) * PAGE_SIZE_IN_BYTES
+    fixed_header = RECORDING_HEADER_STRUCT.pack(
+        RECORDING_MAGIC, RECORDING_FORMAT_VERSION, len(metadata_bytes), num_frames, data_offset, 0
+    )
+    return (fixed_header + metadata_bytes).ljust(data_offset, b"\0")
+
+
+def decode_recording_header(header: bytes) -> Tuple[RecordingMetadata, int, int, int]:
+    """Decode the header at the start of a recording file.
+
+    Args:
+        header (bytes): The start of the file, including at least the fixed-size header and the JSON metadata.
+
+    Returns:
+        metadata (`RecordingMetadata`): The decoded metadata.
+        num_frames (int): The number of frames in the file.
+        data_offset (int): The offset of the first frame, in bytes.
+        index_offset (int): The offset of the frame index, in bytes, or 0 if the file has no index.
+    """
+    magic, version = RECORDING_VERSION_STRUCT.unpack_from(header)
+    if magic != RECORDING_MAGIC:
+        raise ValueError("Not a spectrumdevice recording file.")
+    if version not in RECORDING_HEADER_STRUCTS:
+        raise ValueError(f"Unsupported recording format version {version}.")
+    header_struct = RECORDING_HEADER_STRUCTS[version]
+    if version == 1:
+        _, _, metadata_length, num_frames, data_offset = header_struct.unpack_from(header)
+        index_offset = 0
+    else:
+        _, _, metadata_length, num_frames, data_offset, index_offset = header_struct.unpack_from(header)
+    metadata_start = header_struct.size
+    metadata_dict = json.loads(header[metadata_start : metadata_start + metadata_length].decode("utf-8"))
+    return _metadata_from_dict(metadata_dict), num_frames, data_offset, index_offset
+
+
+def _metadata_to_dict(metadata: RecordingMetadata) -> Dict[str, Any]:
+    settings_dict: Dict[str, Any] = {}
+    for field in fields(metadata.acquisition_settings):
+        value = getattr(metadata.acquisition_settings, field.name)
+        if isinstance(value, Enum):
+            value = value.name
+        elif isinstance(value, list):
+            value = [v.name if isinstance(v, Enum) else v for v in value]
+        elif field.name == "output_dtype":
+            value = dtype(value).str
+        settings_dict[field.name] = value
+    return {
+        "acquisition_settings": settings_dict,
+        "sample_rate_in_hz": metadata.sample_rate_in_hz,
+        "sample_dtype": metadata.sample_dtype.str,
+        "num_channels": metadata.num_channels,
+        "acquisition_length_in_samples": metadata.acquisition_length_in_samples,
+        "channel_nums": list(metadata.voltage_conversion.channel_nums),
+        "voltage_scales": metadata.voltage_conversion.scales.tolist(),
+        "voltage_offsets": metadata.voltage_conversion.offsets.tolist(),
+    }
+
+
+def _metadata_from_dict(metadata_dict: Dict[str, Any]) -> RecordingMetadata:
+    settings_dict = dict(metadata_dict["acquisition_settings"])
+    for name, enum_type in _ENUM_SETTINGS.items():
+        value = settings_dict.get(name)
+        if isinstance(value, list):
+            settings_dict[name] = [enum_type[v] for v in value]
+        elif value is not None:
+            settings_dict[name] = enum_type[value]
+    if "output_dtype" in settings_dict:
+        settings_dict["output_dtype"] = dtype(settings_dict["output_dtype"])
+    return RecordingMetadata(
+        acquisition_settings=AcquisitionSettings(**settings_dict),
+        sample_rate_in_hz=metadata_dict["sample_rate_in_hz"],
+        sample_dtype=dtype(metadata_dict["sample_dtype"]),
+        num_channels=metadata_dict["num_channels"],
+        acquisition_length_in_samples=metadata_dict["acquisition_length_in_samples"],
+        voltage_conversion=VoltageConversionCoefficients(
+            channel_nums=tuple(metadata_dict["channel_nums"]),
+            scales=array(metadata_dict["voltage_scales"], dtype=float64),
+            offsets=array(metadata_dict["voltage_offsets"], dtype=float64),
+        ),
+    )
@@ -0,0 +1,144 @@
+"""Provides a class for random access to the frames of a file written by `Recorder`."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from pathlib import Path
+from types import TracebackType
+from typing import Optional, Type, Union
+
+from numpy import arange, empty, floating, fromfile, memmap, ndarray
+from numpy.typing import NDArray
+
+from spectrumdevice.features.recorder.recording_format import (
+    FRAME_INDEX_DTYPE,
+    RECORDING_HEADER_STRUCT,
+    UNKNOWN_TIMESTAMP,
+    RecordingMetadata,
+    decode_recording_header,
+    frame_index_path,
+)
+
+
+class RecordingReader:
+    """Memory-maps a file written by `Recorder`, so that any frame can be read without loading the rest of the file.
+    Frames are only read from disk when they are accessed, and only converted to volts when indexed:
+
+        with RecordingReader("run.spcm") as recording:
+            print(len(recording), recording.timestamps_in_ns[1000])
+            waveforms = recording[1000]  # (channel, sample) voltage waveforms of frame 1000
+            raw_channel_0 = recording.raw_frames[:, 0]  # lazy (frame, sample) view of the raw samples of channel 0
+
+    If the file was not closed properly (e.g. the recording process crashed), the frames are found from the file size,
+    and the frame index is read from the separate file written during the recording (see `frame_index_path()`). If that
+    file is missing, or in version 1 files, which have no frame index, the timestamps of the frames are unknown.
+    """
+
+    def __init__(self, file_path: Union[str, Path]):
+        """
+        Args:
+            file_path (Union[str, Path]): The recording file to read.
+        """
+        with open(file_path, "rb") as file:
+            fixed_header = file.read(RECORDING_HEADER_STRUCT.size)
+            data_offset = RECORDING_HEADER_STRUCT.unpack(fixed_header)[4]  # at the same position in all versions
+            file.seek(0)
+            metadata, num_frames, data_offset, index_offset = decode_recording_header(file.read(data_offset))
+            file_size = file.seek(0, 2)
+        self._metadata = metadata
+        frame_shape = metadata.frame_shape
+
+        if index_offset == 0:
+            if num_frames == 0:  # not closed, or a version 1 file that was not closed
+                num_frames = (file_size - data_offset) // metadata.num_bytes_per_frame
+            index = empty(num_frames, dtype=FRAME_INDEX_DTYPE)
+            index["byte_offset"] = data_offset + arange(num_frames) * metadata.num_bytes_per_frame
+            index["timestamp_in_ns"] = UNKNOWN_TIMESTAMP
+            index["trigger_counter"] = arange(num_frames)
+            index_file_path = frame_index_path(file_path)
+            if index_file_path.exists():
+                num_indexed_frames = min(num_frames, index_file_path.stat().st_size // FRAME_INDEX_DTYPE.itemsize)
+                index[:num_indexed_frames] = fromfile(
+                    index_file_path, dtype=FRAME_INDEX_DTYPE, count=num_indexed_frames
+                )
+            self._index: ndarray = index
+        elif num_frames > 0:
+            self._index = memmap(file_path, dtype=FRAME_INDEX_DTYPE, mode="r", offset=index_offset, shape=(num_frames,))
+        else:
+            self._index = empty(0, dtype=FRAME_INDEX_DTYPE)
+
+        if num_frames > 0:
+            self._samples: ndarray = memmap(
+                file_path, dtype=metadata.sample_dtype, mode="r", offset=data_offset, shape=(num_frames, *frame_shape)
+            )
+        else:
+            self._samples = empty((0, *frame_shape), dtype=metadata.sample_dtype)
+
+    @property
+    def metadata(self) -> RecordingMetadata:
+        """The acquisition settings, sample rate and voltage conversion coefficients stored in the file header."""
+        return self._metadata
+
+    @property
+    def raw_frames(self) -> ndarray:
+        """A read-only, lazily loaded view of the raw samples of all frames, with shape (num_frames, num_channels,
+        acquisition_length_in_samples). The view is strided, because the samples of each channel are interleaved in the
+        file."""
+        return self._samples.transpose((0, 2, 1))
+
+    @property
+    def index(self) -> ndarray:
+        """The frame index: a structured array with fields `byte_offset`, `timestamp_in_ns` and `trigger_counter`. See
+        `FRAME_INDEX_DTYPE`."""
+        return self._index
+
+    @property
+    def byte_offsets(self) -> ndarray:
+        """The position of each frame in the file, in bytes."""
+        return self._index["byte_offset"]
+
+    @property
+    def timestamps_in_ns(self) -> ndarray:
+        """The trigger time of each frame, in nanoseconds since the Unix epoch, or -1 where unknown."""
+        return self._index["timestamp_in_ns"]
+
+    @property
+    def trigger_counters(self) -> ndarray:
+        """The trigger counter of each frame. Gaps indicate triggers that were not recorded."""
+        return self._index["trigger_counter"]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def __getitem__(self, frames: Union[int, slice, ndarray]) -> NDArray[floating]:
+        """Read frames from disk and convert them to volts using the stored coefficients, in the output dtype of the
+        stored acquisition settings.
+
+        Args:
+            frames (Union[int, slice, ndarray]): The index, slice or array of indices of the frames to read.
+
+        Returns:
+            waveforms (NDArray[floating]): Voltage waveforms with shape (num_channels, acquisition_length_in_samples) for
+                a single frame, or (num_frames, num_channels, acquisition_length_in_samples) otherwise.
+        """
+        return self._metadata.voltage_conversion.convert(
+            self.raw_frames[frames], self._metadata.acquisition_settings.output_dtype
+        )
+
+    def close(self) -> None:
+        """Release the memory maps. Arrays previously obtained from `raw_frames` keep the file mapped until they are
+        deleted."""
+        self._samples = empty((0, *self._metadata.frame_shape), dtype=self._metadata.sample_dtype)
+        self._index = empty(0, dtype=FRAME_INDEX_DTYPE)
+
+    def __enter__(self) -> "RecordingReader":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,148 @@
+"""Provides a class for averaging the acquisitions of a digitiser card in software, using integer accumulators."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from typing import Optional
+
+from numpy import add, dtype, empty_like, floating, floor_divide, iinfo, int32, int64, ndarray, subtract
+from numpy.typing import NDArray
+
+from spectrumdevice.devices.digitiser.digitiser_card import SpectrumDigitiserCard
+from spectrumdevice.exceptions import SpectrumWrongAcquisitionMode
+from spectrumdevice.settings import AcquisitionMode, SoftwareAveragingMode
+
+
+class SoftwareAverager:
+    """Averages the acquisitions of a digitiser card in software, for cards without the on-board averaging firmware.
+    Raw ADC codes are summed straight from the transfer buffer (using `SpectrumDigitiserCard.get_zero_copy_frame()`)
+    into an integer accumulator, and converted to volts only once per average, so each acquisition costs one update of
+    the accumulator instead of a floating point conversion: one integer addition per sample in BLOCK mode, and a few
+    integer operations per sample, into preallocated arrays, in EXPONENTIAL mode:
+
+        card.execute_continuous_fifo_acquisition()
+        averager = SoftwareAverager(card, num_averages=1000)
+        for _ in range(10):
+            process(averager.get_average())
+        card.stop()
+
+    The accumulator is int32 if it cannot overflow (i.e. for up to 65536 averages of 16-bit samples), or int64
+    otherwise. The card must be in SPC_REC_FIFO_MULTI mode. In BLOCK mode, acquisitions left over from a batch once an
+    average is complete are copied and used in the next average.
+    """
+
+    def __init__(
+        self,
+        card: SpectrumDigitiserCard,
+        num_averages: int,
+        mode: SoftwareAveragingMode = SoftwareAveragingMode.BLOCK,
+    ):
+        """
+        Args:
+            card (`SpectrumDigitiserCard`): The card to read acquisitions from.
+            num_averages (int): In BLOCK mode, the number of acquisitions in each average. In EXPONENTIAL mode, the
+                reciprocal of the weight of each new acquisition.
+            mode (`SoftwareAveragingMode`): Whether to compute block averages (default) or a running exponential
+                average.
+        """
+        if num_averages < 1:
+            raise ValueError("Number of averages must be greater than 0.")
+        if card.acquisition_mode != AcquisitionMode.SPC_REC_FIFO_MULTI:
+            raise SpectrumWrongAcquisitionMode(
+                f"Software averaging requires SPC_REC_FIFO_MULTI mode, but the card is in {card.acquisition_mode.name}."
+            )
+        self._card = card
+        self._num_averages = num_averages
+        self._mode = mode
+        # the most negative raw sample has the largest magnitude, as does the most negative int32
+        min_sample = -(2 ** (8 * card.bytes_per_sample - 1))
+        self._accumulator_dtype = dtype(int32 if num_averages * min_sample >= iinfo(int32).min else int64)
+        self._leftover_acquisitions: Optional[ndarray] = None
+        self._running_sum: Optional[ndarray] = None
+        self._decay: Optional[ndarray] = None
+
+    @property
+    def num_averages(self) -> int:
+        return self._num_averages
+
+    @property
+    def mode(self) -> SoftwareAveragingMode:
+        return self._mode
+
+    @property
+    def accumulator_dtype(self) -> dtype:
+        """The integer type in which raw samples are summed: int32 or int64."""
+        return self._accumulator_dtype
+
+    def reset(self) -> None:
+        """Discard any left over acquisitions and restart the running average."""
+        self._leftover_acquisitions = None
+        self._running_sum = None
+        self._decay = None
+
+    def get_average(self) -> NDArray[floating]:
+        """In BLOCK mode, read the next `num_averages` acquisitions and return their mean. In EXPONENTIAL mode, update
+        the running average with the next batch of acquisitions and return it. Blocks until enough acquisitions have
+        been transferred.
+
+        Returns:
+            average (NDArray[floating]): The average voltage waveforms, with shape (num_enabled_channels,
+                acquisition_length_in_samples), in the output dtype of the card.
+        """
+        if self._mode == SoftwareAveragingMode.BLOCK:
+            summed_acquisitions = self._sum_next_acquisitions()
+        elif self._mode == SoftwareAveragingMode.EXPONENTIAL:
+            summed_acquisitions = self._update_running_sum()
+        else:
+            raise ValueError(f"Software averaging mode {self._mode} not recognised")
+        plan = self._card.acquisition_plan
+        return plan.voltage_conversion.convert_sums(summed_acquisitions, self._num_averages, plan.output_dtype)
+
+    def _sum_next_acquisitions(self) -> ndarray:
+        accumulator: Optional[ndarray] = None
+        num_summed = 0
+        while num_summed < self._num_averages:
+            num_wanted = self._num_averages - num_summed
+            if self._leftover_acquisitions is not None:
+                acquisitions = self._leftover_acquisitions[:num_wanted]
+                accumulator = self._add_acquisitions(accumulator, acquisitions)
+                self._leftover_acquisitions = self._leftover_acquisitions[num_wanted:]
+                if len(self._leftover_acquisitions) == 0:
+                    self._leftover_acquisitions = None
+            else:
+                with self._card.get_zero_copy_frame() as frame:
+                    acquisitions = frame.samples[:num_wanted]
+                    accumulator = self._add_acquisitions(accumulator, acquisitions)
+                    if len(frame.samples) > num_wanted:
+                        self._leftover_acquisitions = frame.samples[num_wanted:].copy()
+            num_summed += len(acquisitions)
+        assert accumulator is not None
+        return accumulator
+
+    def _add_acquisitions(self, accumulator: Optional[ndarray], acquisitions: ndarray) -> ndarray:
+        summed_acquisitions: ndarray = acquisitions.sum(axis=0, dtype=self._accumulator_dtype)
+        if accumulator is None:
+            return summed_acquisitions
+        add(accumulator, summed_acquisitions, out=accumulator)
+        return accumulator
+
+    def _update_running_sum(self) -> ndarray:
+        """The running sum holds num_averages times the running average, so that it can be updated with integer
+        arithmetic: sum = sum - round(sum / num_averages) + new_acquisition. The rounded quotient is computed in a scratch
+        array allocated along with the running sum, so updating the sum allocates no memory."""
+        with self._card.get_zero_copy_frame() as frame:
+            self._update_running_sum_with(frame.samples)
+        assert self._running_sum is not None
+        return self._running_sum
+
+    def _update_running_sum_with(self, acquisitions: ndarray) -> None:
+        for acquisition in acquisitions:
+            if self._running_sum is None or self._decay is None:
+                self._running_sum = acquisition.astype(self._accumulator_dtype) * self._num_averages
+                self._decay = empty_like(self._running_sum)
+                continue
+            add(self._running_sum, self._num_averages // 2, out=self._decay)
+            floor_divide(self._decay, self._num_averages, out=self._decay)
+            subtract(self._running_sum, self._decay, out=self._running_sum)
+            add(self._running_sum, acquisition, out=self._running_sum)
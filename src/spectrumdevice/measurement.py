@@ -2,15 +2,23 @@ from datetime import datetime
 from dataclasses import dataclass
 from typing import List, Optional
 
-from numpy import float_
+from numpy import floating
 from numpy.typing import NDArray
 
+from spectrumdevice.settings.timestamps import TimestampReference
+
 
 @dataclass
 class Measurement:
     """Measurement is a dataclass for storing a set of waveforms generated by a single acquisition, with a timestamp."""
 
-    waveforms: List[NDArray[float_]]
-    """Contains the acquired waveforms as a list of 1D NumPy arrays"""
+    waveforms: List[NDArray[floating]]
+    """Contains the acquired waveforms as a list of 1D NumPy arrays of float64 or float32 voltages (see
+    `AcquisitionSettings.output_dtype`)"""
     timestamp: Optional[datetime]
     """The time at which the acquisition was triggered, as a datetime.datetime object"""
+    timestamp_in_samples: Optional[int] = None
+    """The raw timestamp of the trigger, in sample clock ticks since `timestamp_reference`, if available. Unlike
+    `timestamp`, it has the full resolution of the sample clock."""
+    timestamp_reference: Optional[TimestampReference] = None
+    """The reference time and sample rate with which `timestamp_in_samples` can be converted to an absolute time."""
@@ -7,11 +7,13 @@ hardware and interpreting responses received from hardware."""
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
-from numpy import int16
-from numpy.typing import NDArray
+from numpy import add, array, concatenate, dtype, empty, float32, float64, floating, int16, multiply, ndarray, newaxis
+from numpy.typing import DTypeLike, NDArray
 
+from spectrumdevice.settings.acquisition_engine import FrameDropPolicy
+from spectrumdevice.settings.software_averaging import SoftwareAveragingMode
 from spectrumdevice.settings.card_dependent_properties import ModelNumber
 from spectrumdevice.settings.card_features import CardFeature, AdvancedCardFeature
 from spectrumdevice.settings.channel import (
@@ -23,8 +25,11 @@ from spectrumdevice.settings.channel import (
 )
 from spectrumdevice.settings.device_modes import AcquisitionMode, ClockMode, GenerationMode
 from spectrumdevice.settings.io_lines import IOLineMode, AvailableIOModes
+from spectrumdevice.settings.timestamps import TimestampReadoutMode
 from spectrumdevice.settings.transfer_buffer import (
     TransferBuffer,
+    DEFAULT_FIFO_BUFFER_SIZE_IN_BATCHES,
+    DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
 )
 from spectrumdevice.settings.triggering import TriggerSource, ExternalTriggerMode
 from spectrumdevice.settings.status import CARD_STATUS_TYPE, DEVICE_STATUS_TYPE, StatusCode
@@ -40,6 +45,7 @@ from spectrumdevice.settings.pulse_generator import (
 
 __all__ = [
     "AcquisitionSettings",
+    "VoltageConversionCoefficients",
     "TriggerSettings",
     "AcquisitionMode",
     "ClockMode",
@@ -65,6 +71,9 @@ __all__ = [
     "PulseGeneratorMultiplexer1TriggerSource",
     "PulseGeneratorMultiplexer2TriggerSource",
     "PulseGeneratorOutputSettings",
+    "FrameDropPolicy",
+    "SoftwareAveragingMode",
+    "TimestampReadoutMode",
 ]
 
 
@@ -117,6 +126,126 @@ class AcquisitionSettings:
     """The coupling (AC or DC) to apply to each channel. Only available on some hardware, so default is None."""
     input_paths: Optional[List[InputPath]] = None
     """The input path (HF or Buffered) to apply to each channel. Only available on some hardware, so default is None."""
+    transfer_buffer_size_in_batches: int = DEFAULT_FIFO_BUFFER_SIZE_IN_BATCHES
+    """In FIFO mode, the length of the ring buffer into which the card transfers samples, as a multiple of the batch
+    size. A longer ring absorbs brief stalls in reading waveforms, at the cost of memory."""
+    output_dtype: DTypeLike = float64
+    """The floating point type (float32 or float64) of the voltage waveforms returned by get_waveforms(). float32 is
+    precise enough for the samples of a 16-bit ADC and halves the memory occupied by the waveforms."""
+    aba_divider: Optional[int] = None
+    """In SPC_REC_FIFO_ABA mode, the factor by which the sample rate is divided for the slow "A" stream. The allowed
+    values depend on the card. If None, the divider currently set on the card is used."""
+    timestamp_buffer_size_in_timestamps: int = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
+    """If timestamping is enabled, the length of the ring buffer into which the card transfers timestamps. Must be a
+    multiple of 256. If it fills up between reads, timestamps are lost."""
+    timestamp_readout_mode: TimestampReadoutMode = TimestampReadoutMode.POLL
+    """If timestamping is enabled, whether timestamps are polled or transferred by DMA along with the samples."""
+
+
+@dataclass(frozen=True, eq=False)
+class VoltageConversionCoefficients:
+    """A dataclass holding the per-channel coefficients that convert raw ADC codes to volts, so that raw samples can be
+    stored and converted later. For each channel, `volts = raw * scale + offset`."""
+
+    channel_nums: Tuple[int, ...]
+    """The indices of the channels the coefficients apply to, in the order of the channel axis of raw sample arrays."""
+    scales: NDArray[float64]
+    """For each channel, the factor that converts raw ADC codes to volts."""
+    offsets: NDArray[float64]
+    """For each channel, the offset in volts added after scaling the raw ADC codes."""
+
+    def __post_init__(self) -> None:
+        self.scales.flags.writeable = False
+        self.offsets.flags.writeable = False
+
+    @classmethod
+    def from_scales_and_offsets(
+        cls, channel_nums: Sequence[int], scales_and_offsets: Sequence[Tuple[float, float]]
+    ) -> "VoltageConversionCoefficients":
+        return cls(
+            channel_nums=tuple(channel_nums),
+            scales=array([scale for scale, _ in scales_and_offsets], dtype=float64),
+            offsets=array([offset for _, offset in scales_and_offsets], dtype=float64),
+        )
+
+    @classmethod
+    def concatenate(
+        cls, coefficients: Sequence["VoltageConversionCoefficients"], channel_num_offsets: Sequence[int]
+    ) -> "VoltageConversionCoefficients":
+        """Join the coefficients of several devices (e.g. the child cards of a StarHub) along the channel axis. The
+        channel indices of each device are shifted by the corresponding offset, e.g. the number of channels of the
+        preceding cards of a StarHub."""
+        return cls(
+            channel_nums=tuple(
+                channel_num + offset
+                for c, offset in zip(coefficients, channel_num_offsets)
+                for channel_num in c.channel_nums
+            ),
+            scales=concatenate([c.scales for c in coefficients]),
+            offsets=concatenate([c.offsets for c in coefficients]),
+        )
+
+    def convert(
+        self, raw_waveforms: ndarray, output_dtype: DTypeLike = float64, out: Optional[NDArray[floating]] = None
+    ) -> NDArray[floating]:
+        """Convert an array of raw samples to volts in a single broadcast operation.
+
+        Args:
+            raw_waveforms (ndarray): Raw ADC codes, with shape (..., num_channels, num_samples).
+            output_dtype (DTypeLike): The floating point type of the voltage waveforms: float32 or float64 (default).
+                The conversion is computed in this precision.
+            out (Optional[NDArray[floating]]): An array with the same shape as `raw_waveforms` and of type
+                `output_dtype` into which to write the voltage waveforms, for example a slice of a larger array. If not
+                provided, a new array is created.
+
+        Returns:
+            waveforms (NDArray[floating]): `out`, or a new C-contiguous array of voltage waveforms with the same shape
+                as `raw_waveforms`.
+        """
+        output_dtype = validate_output_dtype(output_dtype)
+        if out is None:
+            waveforms = empty(raw_waveforms.shape, dtype=output_dtype)
+        elif out.shape != raw_waveforms.shape or out.dtype != output_dtype:
+            raise ValueError(
+                f"Output array must have shape {raw_waveforms.shape} and type {output_dtype}, not {out.shape} and "
+                f"{out.dtype}."
+            )
+        else:
+            waveforms = out
+        multiply(raw_waveforms, self.scales[:, newaxis], out=waveforms, dtype=output_dtype)
+        add(waveforms, self.offsets[:, newaxis], out=waveforms, dtype=output_dtype)
+        return waveforms
+
+    def convert_sums(
+        self, summed_raw_waveforms: ndarray, num_summed: int, output_dtype: DTypeLike = float64
+    ) -> NDArray[floating]:
+        """Convert sums of raw samples (e.g. accumulated over several acquisitions) to the mean in volts, in a single
+        broadcast operation. Dividing by the number of summed acquisitions is folded into the scale of each channel.
+
+        Args:
+            summed_raw_waveforms (ndarray): Sums of raw ADC codes, with shape (..., num_channels, num_samples).
+            num_summed (int): The number of acquisitions that were summed.
+            output_dtype (DTypeLike): The floating point type of the voltage waveforms: float32 or float64 (default).
+
+        Returns:
+            waveforms (NDArray[floating]): A new C-contiguous array of mean voltage waveforms, with the same shape.
+        """
+        output_dtype = validate_output_dtype(output_dtype)
+        waveforms = empty(summed_raw_waveforms.shape, dtype=output_dtype)
+        multiply(summed_raw_waveforms, (self.scales / num_summed)[:, newaxis], out=waveforms, dtype=output_dtype)
+        add(waveforms, self.offsets[:, newaxis], out=waveforms, dtype=output_dtype)
+        return waveforms
+
+
+VALID_OUTPUT_DTYPES = (dtype(float32), dtype(float64))
+
+
+def validate_output_dtype(output_dtype: DTypeLike) -> dtype:
+    """Check that a requested output dtype of voltage waveforms is float32 or float64, and return it as a `numpy.dtype`."""
+    output_dtype = dtype(output_dtype)
+    if output_dtype not in VALID_OUTPUT_DTYPES:
+        raise ValueError(f"Voltage waveforms can only be output as float32 or float64, not {output_dtype}.")
+    return output_dtype
 
 
 @dataclass
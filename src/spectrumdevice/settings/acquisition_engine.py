@@ -0,0 +1,22 @@
+"""Provides an Enum defining how an `AcquisitionEngine` behaves when its frame queue is full."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from enum import Enum
+
+
+class FrameDropPolicy(Enum):
+    """Enum defining what an `AcquisitionEngine` does with a newly acquired frame when its frame queue is full."""
+
+    BLOCK = 0
+    """Wait for the consumer to take a frame from the queue. No frames are dropped, but if the consumer is too slow the
+    card's transfer buffer will eventually overrun."""
+    DROP_OLDEST = 1
+    """Discard the oldest frame in the queue to make room for the new frame."""
+    DROP_NEWEST = 2
+    """Discard the new frame, keeping the frames already in the queue."""
+
+    def __repr__(self) -> str:
+        return self.name
@@ -10,7 +10,11 @@ from spectrum_gmbh.py_header.regs import (
     SPC_REC_FIFO_AVERAGE,
     SPC_REC_STD_AVERAGE,
     SPC_REC_STD_SINGLE,
+    SPC_REC_STD_MULTI,
     SPC_REC_FIFO_MULTI,
+    SPC_REC_FIFO_SINGLE,
+    SPC_REC_FIFO_ABA,
+    SPC_REC_FIFO_GATE,
     SPC_CM_INTPLL,
     SPC_CM_EXTERNAL,
     SPC_CM_EXTREFCLOCK,
@@ -27,10 +31,43 @@ class AcquisitionMode(Enum):
     """Data acquisition to on-board memory for one single trigger event."""
     SPC_REC_FIFO_MULTI = SPC_REC_FIFO_MULTI
     """Continuous data acquisition for multiple trigger events."""
+    SPC_REC_FIFO_SINGLE = SPC_REC_FIFO_SINGLE
+    """Continuous data acquisition after a single trigger event, without segmentation. The stream is read in chunks of
+    `acquisition_length_in_samples` samples per channel."""
+    SPC_REC_STD_MULTI = SPC_REC_STD_MULTI
+    """Data acquisition to on-board memory for multiple trigger events. Each trigger event fills one segment of the
+    memory, and all segments are transferred together once the acquisition is complete."""
     SPC_REC_STD_AVERAGE = SPC_REC_STD_AVERAGE
     """Data acquisition to on-board memory for the average of multiple trigger events."""
     SPC_REC_FIFO_AVERAGE = SPC_REC_FIFO_AVERAGE
     """Continuous data acquisition for multiple trigger events, with on-board averaging."""
+    SPC_REC_FIFO_ABA = SPC_REC_FIFO_ABA
+    """Continuous data acquisition for multiple trigger events ("B" segments), together with a slow continuous "A"
+    stream sampled at the sample rate divided by the ABA divider."""
+    SPC_REC_FIFO_GATE = SPC_REC_FIFO_GATE
+    """Continuous data acquisition while an external gate signal is high. Each gate produces one acquisition, of
+    variable length, which also includes the pre- and post-trigger samples recorded around the gate."""
+
+
+STANDARD_ACQUISITION_MODES = (
+    AcquisitionMode.SPC_REC_STD_SINGLE,
+    AcquisitionMode.SPC_REC_STD_MULTI,
+    AcquisitionMode.SPC_REC_STD_AVERAGE,
+)
+"""The acquisition modes in which the card records to on-board memory, and the samples are transferred afterwards."""
+FIFO_ACQUISITION_MODES = (
+    AcquisitionMode.SPC_REC_FIFO_MULTI,
+    AcquisitionMode.SPC_REC_FIFO_SINGLE,
+    AcquisitionMode.SPC_REC_FIFO_AVERAGE,
+    AcquisitionMode.SPC_REC_FIFO_ABA,
+    AcquisitionMode.SPC_REC_FIFO_GATE,
+)
+"""The acquisition modes in which samples are transferred continuously while the card is acquiring."""
+GATED_ACQUISITION_MODES = (AcquisitionMode.SPC_REC_FIFO_GATE,)
+"""The acquisition modes in which the length of each acquisition is set by an external gate signal, so the lengths are
+only known once the gate timestamps have been read."""
+AVERAGING_ACQUISITION_MODES = (AcquisitionMode.SPC_REC_STD_AVERAGE, AcquisitionMode.SPC_REC_FIFO_AVERAGE)
+"""The acquisition modes in which the card transfers the sums of several acquisitions, as 32-bit samples."""
 
 
 class GenerationMode(Enum):
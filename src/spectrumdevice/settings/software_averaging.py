@@ -0,0 +1,20 @@
+"""Provides an Enum defining the kinds of average computed by a `SoftwareAverager`."""
+
+# Christian Baker, King's College London
+# Copyright (c) 2021 School of Biomedical Engineering & Imaging Sciences, King's College London
+# Licensed under the MIT. You may obtain a copy at https://opensource.org/licenses/MIT.
+
+from enum import Enum
+
+
+class SoftwareAveragingMode(Enum):
+    """Enum defining how a `SoftwareAverager` averages the acquisitions of a digitiser."""
+
+    BLOCK = 0
+    """Each average is the mean of the next N acquisitions. No acquisition contributes to more than one average."""
+    EXPONENTIAL = 1
+    """A running average, updated with every acquisition. Each new acquisition has a weight of 1 / N, and the weight of
+    older acquisitions decays exponentially."""
+
+    def __repr__(self) -> str:
+        return self.name
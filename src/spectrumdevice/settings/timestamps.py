@@ -1,7 +1,14 @@
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from typing import Union
+
+from numpy import asarray, int64, uint64
+from numpy.typing import ArrayLike, NDArray
 
 from spectrum_gmbh.py_header.regs import (
+    M2CMD_EXTRA_POLL,
+    M2CMD_EXTRA_STARTDMA,
     SPC_TSMODE_STANDARD,
     SPC_TSMODE_STARTRESET,
     SPC_TSCNT_REFCLOCKPOS,
@@ -25,6 +32,43 @@ class TimestampMode(Enum):
     """Timestamps are provided relative to the falling edge of an external trigger signal"""
 
 
+class TimestampReadoutMode(Enum):
+    """How timestamps are transferred from the card into the timestamp transfer buffer. The value of each mode is the
+    command that starts the transfer."""
+
+    POLL = M2CMD_EXTRA_POLL
+    """The driver continuously polls the card for new timestamps, which can be read as soon as they are recorded."""
+    NOTIFY = M2CMD_EXTRA_STARTDMA
+    """Timestamps are transferred by DMA in blocks of the notify size of the timestamp transfer buffer, started along
+    with the transfer of samples. Readers wait for each block instead of polling."""
+
+
+@dataclass(frozen=True)
+class TimestampReference:
+    """The wall-clock time and sample rate needed to convert the raw timestamps of a card, which count sample clock
+    ticks since the timestamp counter was reset, into absolute times. Captured once when timestamping is enabled, so
+    that converting timestamps reads no registers and can be done for a whole array of timestamps at once."""
+
+    ref_time_in_ns: int
+    """The time at which the timestamp counter was reset, in nanoseconds since the Unix epoch."""
+    sample_rate_in_hz: int
+    """The rate at which the timestamp counter is incremented."""
+
+    def samples_to_ns(self, timestamps_in_samples: Union[int, ArrayLike]) -> NDArray[int64]:
+        """Convert raw timestamps to nanoseconds since the Unix epoch, using integer arithmetic so that no precision is
+        lost however long the card has been running."""
+        samples = asarray(timestamps_in_samples, dtype=uint64)
+        rate = uint64(self.sample_rate_in_hz)
+        whole_seconds, remainder = samples // rate, samples % rate
+        ns_since_ref = whole_seconds * uint64(1_000_000_000) + remainder * uint64(1_000_000_000) // rate
+        return ns_since_ref.astype(int64) + self.ref_time_in_ns
+
+    def samples_to_datetime(self, timestamp_in_samples: int) -> datetime:
+        """Convert a single raw timestamp to a datetime. Datetimes have a resolution of one microsecond."""
+        seconds, microseconds = divmod(int(self.samples_to_ns(timestamp_in_samples)) // 1000, 1_000_000)
+        return datetime.fromtimestamp(seconds).replace(microsecond=microseconds)
+
+
 def spectrum_ref_time_to_datetime(ref_time_int: int, ref_date_int: int) -> datetime:
 
     hour = ref_time_int >> 16 & 0b1111111
@@ -13,7 +13,7 @@ from enum import Enum
 from functools import partial
 from typing import Optional
 
-from numpy import ndarray, zeros, int16, uint8, int8
+from numpy import ndarray, zeros, int16, int32, uint8, int8
 
 from spectrumdevice.spectrum_wrapper import DEVICE_HANDLE_TYPE
 from spectrumdevice.spectrum_wrapper.error_handler import error_handler
@@ -123,15 +123,48 @@ class SamplesTransferBuffer(TransferBuffer):
         return copy(self.data_array)
 
 
+class ABATransferBuffer(SamplesTransferBuffer):
+    """Receives the slow, continuous "A" stream of samples acquired in ABA mode. The fast "B" segments are transferred
+    into a `SamplesTransferBuffer` as usual. Like timestamps, the A samples are read by polling."""
+
+    def __init__(
+        self,
+        direction: BufferDirection,
+        board_memory_offset_bytes: int,
+        data_array: ndarray,
+        notify_size_in_pages: float = 1,
+    ) -> None:
+        TransferBuffer.__init__(
+            self, BufferType.SPCM_BUF_ABA, direction, board_memory_offset_bytes, data_array, notify_size_in_pages
+        )
+
+
 class TimestampsTransferBuffer(TransferBuffer):
-    def __init__(self, direction: BufferDirection, board_memory_offset_bytes: int) -> None:
-        # Timestamp buffer uses polling mode which requires the (ignored) notify size to be set to the page size
+    """A ring buffer into which the card transfers 16-byte timestamps, either by polling or, like samples, in blocks of
+    the notify size. Its length must be a whole number of pages, i.e. a multiple of 256 timestamps."""
+
+    def __init__(
+        self,
+        direction: BufferDirection,
+        board_memory_offset_bytes: int,
+        size_in_timestamps: Optional[int] = None,
+        notify_size_in_pages: float = 1,
+    ) -> None:
+        if size_in_timestamps is None:
+            size_in_timestamps = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
+        size_in_bytes = size_in_timestamps * BYTES_PER_TIMESTAMP
+        if size_in_bytes <= 0 or size_in_bytes % PAGE_SIZE_IN_BYTES != 0:
+            raise ValueError(
+                f"The timestamp buffer must hold a positive multiple of {PAGE_SIZE_IN_BYTES // BYTES_PER_TIMESTAMP} "
+                f"timestamps."
+            )
+        # In polling mode, the notify size is ignored but must still be valid, so the page size is used by default
         super().__init__(
             BufferType.SPCM_BUF_TIMESTAMP,
             direction,
             board_memory_offset_bytes,
-            zeros(PAGE_SIZE_IN_BYTES, dtype=uint8),
-            PAGE_SIZE_IN_BYTES,
+            zeros(size_in_bytes, dtype=uint8),
+            notify_size_in_pages,
         )
 
     def read_chunk(self, chunk_position_in_bytes: int, chunk_size_in_bytes: int) -> ndarray:
@@ -148,20 +181,25 @@ def transfer_buffer_factory(
     size_in_samples: Optional[int] = None,
     board_memory_offset_bytes: int = 0,
     notify_size_in_pages: float = 1,
+    size_in_timestamps: Optional[int] = None,
 ) -> "TransferBuffer":
     """
     Args:
         buffer_type (BufferType): Specifies whether the buffer is to be used to transfer samples, timestamps or A/B data.
         direction (BufferDirection): Specifies whether the buffer is to be used to transfer data from the card to the
             PC, or the PC to the card.
-        bytes_per_sample: The number of bytes per sample used by the card. Can be read using card.bytes_per_sample.
-        size_in_samples (int): The size of the array into which samples will be written, in samples. Currently only
-            required for BufferType.SPCM_BUF_DATA as SPCM_BUF_TIMESTAMP buffers are always 4096 uint8 long.
+        bytes_per_sample: The number of bytes per sample used by the card. Can be read using card.bytes_per_sample. In
+            averaging acquisition modes, the card transfers 32-bit sums, so this should be AVERAGED_BYTES_PER_SAMPLE.
+        size_in_samples (int): The size of the array into which samples will be written, in samples. Required for
+            BufferType.SPCM_BUF_DATA and BufferType.SPCM_BUF_ABA. Ignored for SPCM_BUF_TIMESTAMP.
         board_memory_offset_bytes (int): Sets the offset for transfer in board memory. Default 0. See Spectrum
             documentation for more information.
-        notify_size_in_pages (int): For BufferType.SPCM_BUF_DATA. The number of transferred pages (i.e. 4096 bytes)
+        notify_size_in_pages (int): For BufferType.SPCM_BUF_DATA and SPCM_BUF_ABA. The number of transferred pages (i.e. 4096 bytes)
         after which a notification of transfer is sent from the device, and therefore a chunk of samples is downloaded.
-        See the Spectrum documentation for more information. Ignored for BufferType.SPCM_BUF_TIMESTAMP.
+        See the Spectrum documentation for more information. For BufferType.SPCM_BUF_TIMESTAMP, only used if the
+        timestamps are transferred in notify mode rather than polled.
+        size_in_timestamps (Optional[int]): For BufferType.SPCM_BUF_TIMESTAMP, the number of 16-byte timestamps the
+        buffer can hold. Must be a multiple of 256. Default 256 (one page).
     """
 
     # _check_notify_size_validity(notify_size_in_pages)
@@ -170,8 +208,10 @@ def transfer_buffer_factory(
         sample_data_type: type = int8
     elif bytes_per_sample == 2:
         sample_data_type = int16
+    elif bytes_per_sample == AVERAGED_BYTES_PER_SAMPLE:
+        sample_data_type = int32
     else:
-        raise ValueError("Invalid number of bytes per sample. Should be 1 or 2.")
+        raise ValueError(f"Invalid number of bytes per sample. Should be 1, 2 or {AVERAGED_BYTES_PER_SAMPLE}.")
 
     if buffer_type == BufferType.SPCM_BUF_DATA:
         if size_in_samples is not None:
@@ -180,8 +220,15 @@ def transfer_buffer_factory(
             )
         else:
             raise ValueError("You must provide a buffer size_in_samples to create a BufferType.SPCM_BUF_DATA buffer.")
+    elif buffer_type == BufferType.SPCM_BUF_ABA:
+        if size_in_samples is not None:
+            return ABATransferBuffer(
+                direction, board_memory_offset_bytes, zeros(size_in_samples, sample_data_type), notify_size_in_pages
+            )
+        else:
+            raise ValueError("You must provide a buffer size_in_samples to create a BufferType.SPCM_BUF_ABA buffer.")
     elif buffer_type == BufferType.SPCM_BUF_TIMESTAMP:
-        return TimestampsTransferBuffer(direction, board_memory_offset_bytes)
+        return TimestampsTransferBuffer(direction, board_memory_offset_bytes, size_in_timestamps, notify_size_in_pages)
     else:
         raise NotImplementedError(f"TransferBuffer type {buffer_type} not yet supported.")
 
@@ -210,6 +257,10 @@ create_samples_acquisition_transfer_buffer = partial(
     transfer_buffer_factory, buffer_type=BufferType.SPCM_BUF_DATA, direction=BufferDirection.SPCM_DIR_CARDTOPC
 )
 
+create_aba_acquisition_transfer_buffer = partial(
+    transfer_buffer_factory, buffer_type=BufferType.SPCM_BUF_ABA, direction=BufferDirection.SPCM_DIR_CARDTOPC
+)
+
 create_timestamp_acquisition_transfer_buffer = partial(
     transfer_buffer_factory, buffer_type=BufferType.SPCM_BUF_TIMESTAMP, direction=BufferDirection.SPCM_DIR_CARDTOPC
 )
@@ -230,5 +281,11 @@ def set_transfer_buffer(device_handle: DEVICE_HANDLE_TYPE, buffer: TransferBuffe
 
 
 DEFAULT_NOTIFY_SIZE_IN_PAGES = 10
+# Two batches, so that the card can keep filling one batch while the other is read or held in a ZeroCopyFrame. With one
+# batch, the card stalls until each batch has been read, and zero-copy frames cannot be used at all.
+DEFAULT_FIFO_BUFFER_SIZE_IN_BATCHES = 2
+AVERAGED_BYTES_PER_SAMPLE = 4  # in averaging modes, the card transfers the sum of each sample as an int32
 PAGE_SIZE_IN_BYTES = 4096
+BYTES_PER_TIMESTAMP = 16
+DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS = PAGE_SIZE_IN_BYTES // BYTES_PER_TIMESTAMP
 ALLOWED_FRACTIONAL_NOTIFY_SIZES_IN_PAGES = [1 / 2, 1 / 4, 1 / 8, 1 / 16, 1 / 32, 1 / 64, 1 / 128, 1 / 256]
@@ -0,0 +1,82 @@
+from queue import Empty
+from time import monotonic, sleep
+from unittest import TestCase
+
+from numpy import int16
+
+from spectrumdevice import AcquisitionEngine
+from spectrumdevice.devices.mocks import MOCK_TRANSFER_TIMEOUT_IN_S
+from spectrumdevice.settings import AcquisitionMode, AcquisitionSettings, FrameDropPolicy, InputImpedance
+from tests.configuration import ACQUISITION_LENGTH, MOCK_DEVICE_TEST_FRAME_RATE_HZ
+from tests.device_factories import create_digitiser_card_for_testing
+
+NUM_FRAMES_TO_OVERFILL_QUEUE = 4
+
+
+class AcquisitionEngineTest(TestCase):
+    def setUp(self) -> None:
+        self._device = create_digitiser_card_for_testing()
+        self._device.configure_acquisition(
+            AcquisitionSettings(
+                acquisition_mode=AcquisitionMode.SPC_REC_FIFO_MULTI,
+                sample_rate_in_hz=int(4e6),
+                acquisition_length_in_samples=ACQUISITION_LENGTH,
+                pre_trigger_length_in_samples=0,
+                timeout_in_ms=1000,
+                enabled_channels=[0, 1],
+                vertical_ranges_in_mv=[200, 200],
+                vertical_offsets_in_percent=[0, 0],
+                input_impedances=[InputImpedance.ONE_MEGA_OHM, InputImpedance.ONE_MEGA_OHM],
+                timestamping_enabled=False,
+                transfer_buffer_size_in_batches=8,
+            )
+        )
+
+    def tearDown(self) -> None:
+        self._device.disconnect()
+
+    def _wait_for_queue_to_overfill(self) -> None:
+        sleep((1 + NUM_FRAMES_TO_OVERFILL_QUEUE) / MOCK_DEVICE_TEST_FRAME_RATE_HZ)
+
+    def test_get_frame(self) -> None:
+        with AcquisitionEngine(self._device) as engine:
+            frame = engine.get_frame(timeout_in_s=1.0)
+            self.assertEqual((1, 2, ACQUISITION_LENGTH), frame.shape)
+        self.assertFalse(engine.is_running)
+        self.assertEqual(0, engine.num_frames_dropped)
+
+    def test_stop_without_timeout(self) -> None:
+        self._device.set_timeout_in_ms(0)  # wait forever for samples
+        engine = AcquisitionEngine(self._device)
+        engine.start()
+        engine.get_frame(timeout_in_s=1.0)
+        time_before_stop = monotonic()
+        engine.stop()
+        self.assertFalse(engine.is_running)
+        self.assertLess(monotonic() - time_before_stop, MOCK_TRANSFER_TIMEOUT_IN_S)
+
+    def test_raw_frames(self) -> None:
+        with AcquisitionEngine(self._device, raw=True) as engine:
+            self.assertEqual(int16, engine.get_frame(timeout_in_s=1.0).dtype)
+
+    def test_drop_newest(self) -> None:
+        with AcquisitionEngine(self._device, max_queue_size=1, drop_policy=FrameDropPolicy.DROP_NEWEST) as engine:
+            self._wait_for_queue_to_overfill()
+        self.assertEqual(1, engine.num_frames_queued)
+        self.assertEqual(engine.num_frames_acquired - 1, engine.num_frames_dropped)
+        self.assertGreater(engine.num_frames_dropped, 0)
+
+    def test_drop_oldest(self) -> None:
+        with AcquisitionEngine(self._device, max_queue_size=1, drop_policy=FrameDropPolicy.DROP_OLDEST) as engine:
+            self._wait_for_queue_to_overfill()
+        self.assertEqual(1, engine.num_frames_queued)
+        self.assertEqual(engine.num_frames_acquired - 1, engine.num_frames_dropped)
+        self.assertGreater(engine.num_frames_dropped, 0)
+
+    def test_block(self) -> None:
+        with AcquisitionEngine(self._device, max_queue_size=1, drop_policy=FrameDropPolicy.BLOCK) as engine:
+            self._wait_for_queue_to_overfill()
+        self.assertEqual(0, engine.num_frames_dropped)
+        engine.get_frame()
+        with self.assertRaises(Empty):
+            engine.get_frame()
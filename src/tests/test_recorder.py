@@ -0,0 +1,229 @@
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from numpy import arange, array, concatenate, fromfile, int16, int64, ndarray, newaxis, zeros
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from spectrumdevice import MockSpectrumDigitiserCard, Recorder, RecordingReader
+from spectrumdevice.exceptions import SpectrumSettingsMismatchError
+from spectrumdevice.features.recorder.recording_format import (
+    FRAME_INDEX_DTYPE,
+    INDEX_OFFSET_OFFSET_IN_BYTES,
+    NUM_FRAMES_OFFSET_IN_BYTES,
+    RECORDING_HEADER_STRUCT,
+    RECORDING_HEADER_STRUCTS,
+    RECORDING_MAGIC,
+    UNKNOWN_TIMESTAMP,
+    decode_recording_header,
+    frame_index_path,
+)
+from spectrumdevice.settings import AcquisitionMode, AcquisitionSettings, InputImpedance, ModelNumber
+from spectrumdevice.settings.transfer_buffer import PAGE_SIZE_IN_BYTES
+from tests.configuration import (
+    ACQUISITION_LENGTH,
+    MOCK_DEVICE_TEST_FRAME_RATE_HZ,
+    NUM_CHANNELS_PER_DIGITISER_MODULE,
+    NUM_MODULES_PER_DIGITISER,
+)
+from tests.device_factories import create_digitiser_card_for_testing
+
+
+class RecorderTest(TestCase):
+    def setUp(self) -> None:
+        self._device = create_digitiser_card_for_testing()
+        self._settings = AcquisitionSettings(
+            acquisition_mode=AcquisitionMode.SPC_REC_FIFO_MULTI,
+            sample_rate_in_hz=int(4e6),
+            acquisition_length_in_samples=ACQUISITION_LENGTH,
+            pre_trigger_length_in_samples=0,
+            timeout_in_ms=1000,
+            enabled_channels=[0, 1],
+            vertical_ranges_in_mv=[200, 1000],
+            vertical_offsets_in_percent=[0, 10],
+            input_impedances=[InputImpedance.ONE_MEGA_OHM, InputImpedance.FIFTY_OHM],
+            timestamping_enabled=False,
+            batch_size=2,
+        )
+        self._device.configure_acquisition(self._settings)
+        self._temp_dir = TemporaryDirectory()
+        self._file_path = Path(self._temp_dir.name) / "recording.spcm"
+
+    def tearDown(self) -> None:
+        self._device.disconnect()
+        self._temp_dir.cleanup()
+
+    def test_header(self) -> None:
+        with Recorder(self._file_path, self._device, self._settings):
+            pass
+        metadata, num_frames, data_offset, _ = decode_recording_header(self._file_path.read_bytes())
+        self.assertEqual(0, num_frames)
+        self.assertEqual(0, data_offset % PAGE_SIZE_IN_BYTES)
+        self.assertEqual(self._settings, metadata.acquisition_settings)
+        self.assertEqual(self._device.sample_rate_in_hz, metadata.sample_rate_in_hz)
+        self.assertEqual((ACQUISITION_LENGTH, 2), metadata.frame_shape)
+        coefficients = self._device.voltage_conversion_coefficients
+        assert_array_equal(coefficients.scales, metadata.voltage_conversion.scales)
+        assert_array_equal(coefficients.offsets, metadata.voltage_conversion.offsets)
+
+    def test_write_across_blocks(self) -> None:
+        frames = arange(3 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((3, 2, ACQUISITION_LENGTH))
+        with Recorder(self._file_path, self._device, self._settings, write_block_size_in_bytes=1) as recorder:
+            recorder.write(frames[:2])
+            recorder.write(frames[2:])
+        _, num_frames, data_offset, _ = decode_recording_header(self._file_path.read_bytes())
+        self.assertEqual(3, num_frames)
+        recorded = fromfile(self._file_path, dtype=int16, offset=data_offset, count=frames.size)
+        assert_array_equal(frames.transpose((0, 2, 1)).reshape(-1), recorded)
+
+    def test_write_wrong_shape(self) -> None:
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            with self.assertRaises(ValueError):
+                recorder.write(arange(ACQUISITION_LENGTH, dtype=int16).reshape((1, 1, ACQUISITION_LENGTH)))
+
+    def test_record(self) -> None:
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            recorder.record(max_frames=3)
+        metadata, num_frames, data_offset, _ = decode_recording_header(self._file_path.read_bytes())
+        self.assertEqual(3, num_frames)
+        with RecordingReader(self._file_path) as recording:
+            self.assertEqual(3, len(recording))
+            self.assertEqual((3, 2, ACQUISITION_LENGTH), recording.raw_frames.shape)
+            assert_array_equal([0, 1, 2], recording.trigger_counters)
+
+    def test_read_frames(self) -> None:
+        frames = arange(3 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((3, 2, ACQUISITION_LENGTH))
+        timestamps = array([10, 20, 30], dtype=int64)
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            recorder.write(frames, timestamps_in_ns=timestamps, trigger_counters=array([0, 1, 5]))
+        coefficients = self._device.voltage_conversion_coefficients
+        with RecordingReader(self._file_path) as recording:
+            self.assertEqual(3, len(recording))
+            assert_array_equal(frames, recording.raw_frames)
+            assert_array_equal(timestamps, recording.timestamps_in_ns)
+            assert_array_equal([0, 1, 5], recording.trigger_counters)
+            self.assertEqual(recording.byte_offsets[1] - recording.byte_offsets[0], 2 * ACQUISITION_LENGTH * 2)
+            assert_array_almost_equal(coefficients.convert(frames[1]), recording[1])
+            assert_array_almost_equal(coefficients.convert(frames[1:]), recording[1:])
+
+    def test_read_unclosed_recording(self) -> None:
+        frames = arange(2 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((2, 2, ACQUISITION_LENGTH))
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            recorder.write(frames)
+        _, _, data_offset, _ = decode_recording_header(self._file_path.read_bytes())
+        # Remove the index, and the frame count and index offset written on closing
+        with open(self._file_path, "r+b") as file:
+            file.truncate(data_offset + frames.nbytes)
+            file.seek(NUM_FRAMES_OFFSET_IN_BYTES)
+            file.write(bytes(8))
+            file.seek(INDEX_OFFSET_OFFSET_IN_BYTES)
+            file.write(bytes(8))
+        with RecordingReader(self._file_path) as recording:
+            self.assertEqual(2, len(recording))
+            assert_array_equal(frames, recording.raw_frames)
+            assert_array_equal([UNKNOWN_TIMESTAMP] * 2, recording.timestamps_in_ns)
+
+    def test_read_unclosed_recording_with_index_file(self) -> None:
+        frames = arange(2 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((2, 2, ACQUISITION_LENGTH))
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            recorder.write(frames)
+        metadata, _, data_offset, _ = decode_recording_header(self._file_path.read_bytes())
+        with open(self._file_path, "r+b") as file:
+            file.truncate(data_offset + frames.nbytes)
+            file.seek(NUM_FRAMES_OFFSET_IN_BYTES)
+            file.write(bytes(8))
+            file.seek(INDEX_OFFSET_OFFSET_IN_BYTES)
+            file.write(bytes(8))
+        # The index file also holds the record of a third frame whose samples never reached the disk
+        index = zeros(3, dtype=FRAME_INDEX_DTYPE)
+        index["byte_offset"] = data_offset + arange(3) * metadata.num_bytes_per_frame
+        index["timestamp_in_ns"] = [10, 20, 30]
+        index["trigger_counter"] = [0, 2, 3]
+        index.tofile(frame_index_path(self._file_path))
+        with RecordingReader(self._file_path) as recording:
+            self.assertEqual(2, len(recording))
+            assert_array_equal([10, 20], recording.timestamps_in_ns)
+            assert_array_equal([0, 2], recording.trigger_counters)
+
+    def test_index_written_during_recording(self) -> None:
+        frames = arange(3 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((3, 2, ACQUISITION_LENGTH))
+        timestamps = array([10, 20, 30], dtype=int64)
+        index_file_path = frame_index_path(self._file_path)
+        with Recorder(self._file_path, self._device, self._settings, write_block_size_in_bytes=1) as recorder:
+            recorder.write(frames, timestamps_in_ns=timestamps)  # fills a block, so the index is flushed
+            assert_array_equal(timestamps, fromfile(index_file_path, dtype=FRAME_INDEX_DTYPE)["timestamp_in_ns"])
+        self.assertFalse(index_file_path.exists())
+        with RecordingReader(self._file_path) as recording:
+            assert_array_equal(timestamps, recording.timestamps_in_ns)
+
+    def test_read_version_1_recording(self) -> None:
+        frames = arange(2 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((2, 2, ACQUISITION_LENGTH))
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            recorder.write(frames)
+        contents = self._file_path.read_bytes()
+        _, _, metadata_length, num_frames, data_offset, _ = RECORDING_HEADER_STRUCT.unpack_from(contents)
+        metadata_bytes = contents[RECORDING_HEADER_STRUCT.size : RECORDING_HEADER_STRUCT.size + metadata_length]
+        version_1_header = RECORDING_HEADER_STRUCTS[1].pack(
+            RECORDING_MAGIC, 1, metadata_length, num_frames, data_offset
+        )
+        self._file_path.write_bytes(
+            (version_1_header + metadata_bytes).ljust(data_offset, b"\0") + frames.transpose((0, 2, 1)).tobytes()
+        )
+        with RecordingReader(self._file_path) as recording:
+            self.assertEqual(2, len(recording))
+            assert_array_equal(frames, recording.raw_frames)
+            assert_array_equal([UNKNOWN_TIMESTAMP] * 2, recording.timestamps_in_ns)
+
+    def test_unsupported_version(self) -> None:
+        with Recorder(self._file_path, self._device, self._settings):
+            pass
+        contents = bytearray(self._file_path.read_bytes())
+        contents[len(RECORDING_MAGIC) : len(RECORDING_MAGIC) + 4] = (99).to_bytes(4, "little")
+        self._file_path.write_bytes(contents)
+        with self.assertRaises(ValueError):
+            RecordingReader(self._file_path)
+
+    def _create_replay_card(self, frames: ndarray, replay_at_recorded_rate: bool) -> MockSpectrumDigitiserCard:
+        with Recorder(self._file_path, self._device, self._settings) as recorder:
+            recorder.write(frames)
+        return MockSpectrumDigitiserCard(
+            device_number=0,
+            model=ModelNumber.TYP_M2P5966_X4,
+            mock_source_frame_rate_hz=MOCK_DEVICE_TEST_FRAME_RATE_HZ,
+            num_modules=NUM_MODULES_PER_DIGITISER,
+            num_channels_per_module=NUM_CHANNELS_PER_DIGITISER_MODULE,
+            mock_source_recording=self._file_path,
+            mock_source_replay_at_recorded_rate=replay_at_recorded_rate,
+        )
+
+    def test_replay_fifo(self) -> None:
+        frames = arange(3 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((3, 2, ACQUISITION_LENGTH))
+        card = self._create_replay_card(frames, replay_at_recorded_rate=False)
+        card.configure_acquisition(self._settings)
+        card.execute_continuous_fifo_acquisition()
+        try:
+            replayed = concatenate([card.get_raw_waveform_array() for _ in range(3)])
+        finally:
+            card.stop()
+            card.disconnect()
+        assert_array_equal(frames[[0, 1, 2, 0, 1, 2]], replayed)
+
+    def test_replay_standard_single(self) -> None:
+        frames = arange(2 * 2 * ACQUISITION_LENGTH, dtype=int16).reshape((2, 2, ACQUISITION_LENGTH))
+        card = self._create_replay_card(frames, replay_at_recorded_rate=True)
+        card.configure_acquisition(
+            replace(self._settings, acquisition_mode=AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        )
+        for frame in frames:
+            card.execute_standard_single_acquisition()
+            assert_array_equal(frame[newaxis], card.get_raw_waveform_array())
+        card.disconnect()
+
+    def test_replay_wrong_shape(self) -> None:
+        frames = arange(2 * ACQUISITION_LENGTH, dtype=int16).reshape((1, 2, ACQUISITION_LENGTH))
+        card = self._create_replay_card(frames, replay_at_recorded_rate=False)
+        card.configure_acquisition(replace(self._settings, enabled_channels=[0]))
+        with self.assertRaises(SpectrumSettingsMismatchError):
+            card.execute_continuous_fifo_acquisition()
+        card.disconnect()
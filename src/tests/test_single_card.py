@@ -1,39 +1,87 @@
+import asyncio
+from ctypes import c_void_p
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import Any, Generic, List, Optional, Tuple, TypeVar, cast
 from unittest import TestCase
 
-from numpy import array, iinfo, int16, zeros
-from numpy.testing import assert_array_equal
-
-from spectrum_gmbh.py_header.regs import SPC_CHENABLE
-from spectrumdevice import SpectrumDigitiserAnalogChannel
+from numpy import (
+    arange,
+    array,
+    concatenate,
+    diff,
+    float32,
+    floating,
+    iinfo,
+    int16,
+    int32,
+    int64,
+    shares_memory,
+    uint64,
+    zeros,
+)
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+from numpy.typing import NDArray
+
+from spectrum_gmbh.py_header.regs import (
+    M2CMD_CARD_FORCETRIGGER,
+    M2CMD_CARD_WRITESETUP,
+    M2CMD_EXTRA_POLL,
+    M2STAT_EXTRA_OVERRUN,
+    SPC_CHENABLE,
+    SPC_DATA_AVAIL_USER_POS,
+    SPC_M2CMD,
+    SPC_M2STATUS,
+    SPC_MEMSIZE,
+    SPC_TIMEOUT,
+    SPC_TIMESTAMP_CMD,
+    SPC_TS_RESET,
+    SPC_TS_AVAIL_USER_LEN,
+    SPC_TS_AVAIL_USER_POS,
+)
+from spectrumdevice import MockSpectrumDigitiserCard, SpectrumDigitiserAnalogChannel, SpectrumDigitiserCard
 from spectrumdevice.devices.abstract_device.device_interface import SpectrumDeviceInterface
+from spectrumdevice.devices.abstract_device.register_batch import RegisterWriteBatch
 from spectrumdevice.devices.awg.awg_channel import SpectrumAWGAnalogChannel
 from spectrumdevice.devices.awg.awg_interface import SpectrumAWGInterface
 from spectrumdevice.devices.digitiser import SpectrumDigitiserInterface
+from spectrumdevice.devices.mocks.timestamps import MockTimestamper
 from spectrumdevice.exceptions import (
+    SpectrumAcquisitionStopped,
     SpectrumDeviceNotConnected,
     SpectrumExternalTriggerNotEnabled,
+    SpectrumFrameAlreadyReleased,
+    SpectrumInvalidParameterValue,
+    SpectrumNoTransferBufferDefined,
+    SpectrumTransferBufferFull,
+    SpectrumTransferTimeout,
     SpectrumTriggerOperationNotImplemented,
+    SpectrumWrongAcquisitionMode,
 )
 from spectrumdevice.settings import (
     AcquisitionSettings,
     InputImpedance,
     GenerationSettings,
+    ModelNumber,
     OutputChannelFilter,
     OutputChannelStopLevelMode,
+    SpectrumRegisterLength,
 )
 from spectrumdevice.settings.channel import SpectrumAnalogChannelName
 from spectrumdevice.settings.device_modes import AcquisitionMode, ClockMode, GenerationMode
+from spectrumdevice.settings.timestamps import TimestampMode, TimestampReadoutMode, TimestampReference
 from spectrumdevice.settings.transfer_buffer import (
+    DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS,
     create_samples_acquisition_transfer_buffer,
     transfer_buffer_factory,
     BufferType,
     BufferDirection,
+    PAGE_SIZE_IN_BYTES,
 )
 from spectrumdevice.settings.triggering import ExternalTriggerMode, TriggerSource
+from spectrumdevice.spectrum_wrapper import DEVICE_HANDLE_TYPE
 from tests.configuration import (
     ACQUISITION_LENGTH,
+    MOCK_DEVICE_TEST_FRAME_RATE_HZ,
     NUM_CHANNELS_PER_DIGITISER_MODULE,
     NUM_MODULES_PER_DIGITISER,
     NUM_MODULES_PER_AWG,
@@ -43,6 +91,7 @@ from tests.device_factories import create_awg_card_for_testing, create_digitiser
 
 
 CardInterfaceVar = TypeVar("CardInterfaceVar", bound=SpectrumDeviceInterface)
+ACQUISITION_TEST_BATCH_SIZE = 2
 
 
 class SingleCardTest(TestCase, Generic[CardInterfaceVar], ABC):
@@ -233,6 +282,641 @@ class DigitiserCardTest(SingleCardTest[SpectrumDigitiserInterface]):
         )
 
 
+class DigitiserCardAcquisitionTest(TestCase):
+    def setUp(self) -> None:
+        self._device = cast(SpectrumDigitiserCard, create_digitiser_card_for_testing())
+        self._num_samples_per_batch = ACQUISITION_LENGTH * 2 * ACQUISITION_TEST_BATCH_SIZE
+
+    def tearDown(self) -> None:
+        self._device.stop()
+        self._device.disconnect()
+
+    def _configure(
+        self,
+        acquisition_mode: AcquisitionMode,
+        batch_size: int = ACQUISITION_TEST_BATCH_SIZE,
+        number_of_averages: int = 1,
+    ) -> None:
+        self._device.configure_acquisition(
+            AcquisitionSettings(
+                acquisition_mode=acquisition_mode,
+                sample_rate_in_hz=int(4e6),
+                acquisition_length_in_samples=ACQUISITION_LENGTH,
+                pre_trigger_length_in_samples=0,
+                timeout_in_ms=1000,
+                enabled_channels=[0, 1],
+                vertical_ranges_in_mv=[200, 200],
+                vertical_offsets_in_percent=[0, 0],
+                input_impedances=[InputImpedance.ONE_MEGA_OHM, InputImpedance.ONE_MEGA_OHM],
+                timestamping_enabled=False,
+                batch_size=batch_size,
+                number_of_averages=number_of_averages,
+            )
+        )
+
+    def _start_fifo_acquisition(self, buffer_size_in_batches: Optional[float] = None) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        if buffer_size_in_batches is not None:
+            bytes_per_frame = ACQUISITION_LENGTH * 2 * self._device.bytes_per_sample
+            buffer = create_samples_acquisition_transfer_buffer(
+                size_in_samples=int(self._num_samples_per_batch * buffer_size_in_batches),
+                notify_size_in_pages=bytes_per_frame / PAGE_SIZE_IN_BYTES,
+                bytes_per_sample=self._device.bytes_per_sample,
+            )
+            self._device.define_transfer_buffer([buffer])
+        self._device.execute_continuous_fifo_acquisition()
+
+    def _user_position_in_bytes(self) -> int:
+        return self._device.read_spectrum_device_register(SPC_DATA_AVAIL_USER_POS)
+
+    def test_acquisition_plan_frozen_at_start(self) -> None:
+        self._start_fifo_acquisition()
+        plan = self._device.acquisition_plan
+        self.assertEqual(AcquisitionMode.SPC_REC_FIFO_MULTI, plan.acquisition_mode)
+        self.assertEqual(ACQUISITION_LENGTH, plan.acquisition_length_in_samples)
+        self.assertEqual(ACQUISITION_TEST_BATCH_SIZE, plan.batch_size)
+        self.assertEqual((0, 1), plan.enabled_channel_nums)
+        self.assertEqual(self._num_samples_per_batch, plan.num_samples_per_batch)
+        expected_scale, expected_offset = self._device.analog_channels[1].voltage_conversion_scale_and_offset
+        self.assertEqual(expected_scale, plan.voltage_conversion.scales[1])
+        self.assertEqual(expected_offset, plan.voltage_conversion.offsets[1])
+
+        # Settings changed while the acquisition is running only take effect when it is restarted
+        self._device.set_acquisition_length_in_samples(2 * ACQUISITION_LENGTH)
+        waveforms = self._device.get_waveforms()
+        self.assertEqual([(ACQUISITION_LENGTH,)] * 2, [wfm.shape for wfm in waveforms[0]])
+        self.assertIs(plan, self._device.acquisition_plan)
+
+    def test_waveform_array(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        self._device.execute_standard_single_acquisition()
+        waveform_array = self._device.get_waveform_array()
+        self.assertEqual((1, 2, ACQUISITION_LENGTH), waveform_array.shape)
+        self.assertTrue(waveform_array.flags.c_contiguous)
+        raw_samples = self._device.transfer_buffers[0].data_array.reshape((ACQUISITION_LENGTH, 2))
+        for channel_num in range(2):
+            assert_array_almost_equal(
+                self._device.analog_channels[channel_num].convert_raw_waveform_to_voltage_waveform(
+                    raw_samples[:, channel_num]
+                ),
+                waveform_array[0, channel_num],
+            )
+
+    def test_raw_waveform_array(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        self._device.execute_standard_single_acquisition()
+        raw_waveform_array = self._device.get_raw_waveform_array()
+        self.assertEqual(int16, raw_waveform_array.dtype)
+        self.assertEqual((1, 2, ACQUISITION_LENGTH), raw_waveform_array.shape)
+        self.assertTrue(raw_waveform_array.flags.c_contiguous)
+        assert_array_equal(
+            self._device.transfer_buffers[0].data_array.reshape((1, ACQUISITION_LENGTH, 2)).transpose((0, 2, 1)),
+            raw_waveform_array,
+        )
+        coefficients = self._device.voltage_conversion_coefficients
+        self.assertEqual((0, 1), coefficients.channel_nums)
+        assert_array_almost_equal(self._device.get_waveform_array(), coefficients.convert(raw_waveform_array))
+
+    def test_float32_output_dtype(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        self._device.set_output_dtype(float32)
+        measurement = self._device.execute_standard_single_acquisition()
+        self.assertEqual(float32, measurement.waveforms[0].dtype)
+        waveform_array = self._device.get_waveform_array()
+        self.assertEqual(float32, waveform_array.dtype)
+        assert_array_almost_equal(
+            self._device.voltage_conversion_coefficients.convert(self._device.get_raw_waveform_array()),
+            waveform_array,
+            decimal=6,
+        )
+
+    def test_invalid_output_dtype(self) -> None:
+        with self.assertRaises(ValueError):
+            self._device.set_output_dtype(int16)
+
+    def test_waveform_array_into_preallocated_array(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        self._device.execute_standard_single_acquisition()
+        out = zeros((1, 2, ACQUISITION_LENGTH))
+        self.assertIs(out, self._device.get_waveform_array(out=out))
+        assert_array_equal(self._device.get_waveform_array(), out)
+        raw_out = zeros((1, 2, ACQUISITION_LENGTH), dtype=int16)
+        self.assertIs(raw_out, self._device.get_raw_waveform_array(out=raw_out))
+        assert_array_equal(self._device.get_raw_waveform_array(), raw_out)
+        with self.assertRaises(ValueError):
+            self._device.get_waveform_array(out=zeros((1, 2, ACQUISITION_LENGTH), dtype=float32))
+        with self.assertRaises(ValueError):
+            self._device.get_raw_waveform_array(out=zeros((1, 1, ACQUISITION_LENGTH), dtype=int16))
+
+    def test_waveform_array_fifo_mode(self) -> None:
+        self._start_fifo_acquisition()
+        waveform_array = self._device.get_waveform_array()
+        self.assertEqual((ACQUISITION_TEST_BATCH_SIZE, 2, ACQUISITION_LENGTH), waveform_array.shape)
+        self.assertTrue(waveform_array.flags.c_contiguous)
+
+    def test_standard_average_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_AVERAGE, batch_size=1, number_of_averages=16)
+        measurement = self._device.execute_standard_single_acquisition()
+        self.assertEqual(16, self._device.acquisition_plan.number_of_averages)
+        raw_waveform_array = self._device.get_raw_waveform_array()
+        self.assertEqual(int32, raw_waveform_array.dtype)
+        self.assertEqual((1, 2, ACQUISITION_LENGTH), raw_waveform_array.shape)
+        # The card transfers sums, so the conversion includes the division by the number of averages
+        scale, offset = self._device.analog_channels[0].voltage_conversion_scale_and_offset
+        self.assertAlmostEqual(scale / 16, self._device.voltage_conversion_coefficients.scales[0])
+        assert_array_almost_equal(raw_waveform_array[0, 0] * scale / 16 + offset, measurement.waveforms[0])
+        self.assertTrue((abs(measurement.waveforms[0]) <= 0.2).all())
+
+    def test_standard_multi_mode_settings_in_any_order(self) -> None:
+        self._device.set_acquisition_mode(AcquisitionMode.SPC_REC_STD_MULTI)
+        self._device.set_acquisition_length_in_samples(ACQUISITION_LENGTH)
+        self._device.set_batch_size(3)
+        self.assertEqual(3 * ACQUISITION_LENGTH, self._device.read_spectrum_device_register(SPC_MEMSIZE))
+        self._device.set_acquisition_mode(AcquisitionMode.SPC_REC_STD_SINGLE)
+        self.assertEqual(ACQUISITION_LENGTH, self._device.read_spectrum_device_register(SPC_MEMSIZE))
+        self._device.set_acquisition_mode(AcquisitionMode.SPC_REC_STD_MULTI)
+        self.assertEqual(3 * ACQUISITION_LENGTH, self._device.read_spectrum_device_register(SPC_MEMSIZE))
+
+    def test_standard_multi_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_MULTI, batch_size=3)
+        self.assertEqual(ACQUISITION_LENGTH, self._device.acquisition_length_in_samples)
+        self.assertEqual(3 * ACQUISITION_LENGTH, self._device.read_spectrum_device_register(SPC_MEMSIZE))
+        measurements = self._device.execute_standard_multi_acquisition()
+        self.assertEqual(3, len(measurements))
+        self.assertEqual([(ACQUISITION_LENGTH,)] * 2, [wfm.shape for wfm in measurements[2].waveforms])
+        segments = self._device.get_waveform_array()
+        self.assertEqual((3, 2, ACQUISITION_LENGTH), segments.shape)
+        assert_array_equal(segments[2], array(measurements[2].waveforms))
+
+    def test_standard_multi_mode_wrong_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        with self.assertRaises(SpectrumWrongAcquisitionMode):
+            self._device.execute_standard_multi_acquisition()
+
+    def test_fifo_average_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_AVERAGE, number_of_averages=16)
+        self._device.execute_continuous_fifo_acquisition()
+        waveform_array = self._device.get_waveform_array()
+        self.assertEqual(int32, self._device.transfer_buffers[0].data_array.dtype)
+        self.assertEqual(
+            ACQUISITION_LENGTH * 2 * 4 * ACQUISITION_TEST_BATCH_SIZE, self._device.acquisition_plan.num_bytes_per_batch
+        )
+        self.assertEqual((ACQUISITION_TEST_BATCH_SIZE, 2, ACQUISITION_LENGTH), waveform_array.shape)
+        self.assertTrue((abs(waveform_array) <= 0.2).all())
+
+    def test_aba_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_ABA)
+        self._device.set_aba_divider(32)
+        self._device.execute_continuous_fifo_acquisition()
+        waveform_array = self._device.get_waveform_array()
+        self._device.get_waveform_array()
+        aba_waveform_array = self._device.get_aba_waveform_array()
+        self._device.stop()
+        self.assertEqual(32, self._device.aba_divider)
+        self.assertEqual((ACQUISITION_TEST_BATCH_SIZE, 2, ACQUISITION_LENGTH), waveform_array.shape)
+        self.assertEqual(2, aba_waveform_array.shape[0])
+        self.assertGreater(aba_waveform_array.shape[1], 0)
+        self.assertTrue((abs(aba_waveform_array) <= 0.2).all())
+
+    def test_aba_divider_invalid(self) -> None:
+        with self.assertRaises(SpectrumInvalidParameterValue):
+            self._device.set_aba_divider(17)
+
+    def test_aba_stream_not_available_in_fifo_multi_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        self._device.define_transfer_buffer()
+        with self.assertRaises(SpectrumNoTransferBufferDefined):
+            self._device.get_aba_waveform_array()
+
+    def test_fifo_single_mode_chunks(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_SINGLE)
+        chunks = [chunk.copy() for chunk in self._device.iter_raw_chunks(max_chunks=3)]
+        self.assertEqual(3, len(chunks))
+        for chunk in chunks:
+            self.assertEqual((2, ACQUISITION_TEST_BATCH_SIZE * ACQUISITION_LENGTH), chunk.shape)
+            self.assertEqual(int16, chunk.dtype)
+
+    def test_fifo_single_mode_chunks_are_views_of_the_transfer_buffer(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_SINGLE)
+        chunks = self._device.iter_raw_chunks()
+        chunk = next(chunks)
+        self.assertTrue(shares_memory(chunk, self._device.transfer_buffers[0].data_array))
+        chunks.close()
+
+    def test_fifo_single_mode_set_after_configuration(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        self._device.set_acquisition_mode(AcquisitionMode.SPC_REC_FIFO_SINGLE)
+        chunks = self._device.iter_raw_chunks()
+        self.assertEqual((2, ACQUISITION_TEST_BATCH_SIZE * ACQUISITION_LENGTH), next(chunks).shape)
+        chunks.close()
+
+    def test_fifo_single_mode_length_quantised(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_SINGLE)
+        self._device.set_acquisition_length_in_samples(ACQUISITION_LENGTH + 1)
+        self.assertEqual(ACQUISITION_LENGTH, self._device.acquisition_length_in_samples)
+
+    def test_fifo_single_mode_chunks_wrong_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        with self.assertRaises(SpectrumWrongAcquisitionMode):
+            next(self._device.iter_raw_chunks())
+
+    def test_gated_fifo_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_GATE)
+        self._device.execute_continuous_fifo_acquisition()
+        waveforms = self._device.get_waveforms()
+        timestamps = [self._device.get_timestamp() for _ in waveforms]
+        self._device.stop()
+        alignment = self._device.acquisition_plan.gate_length_alignment_in_samples
+        self.assertEqual(ACQUISITION_TEST_BATCH_SIZE, len(waveforms))
+        for acquisition in waveforms:
+            self.assertEqual(2, len(acquisition))
+            self.assertEqual(len(acquisition[0]), len(acquisition[1]))
+            self.assertGreater(len(acquisition[0]), ACQUISITION_LENGTH)
+            self.assertEqual(0, (len(acquisition[0]) - ACQUISITION_LENGTH) % alignment)
+        self.assertTrue(all(timestamp is not None for timestamp in timestamps))
+        self.assertIsNone(self._device.get_timestamp())
+
+    def test_gated_fifo_mode_batch_timestamps(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_GATE)
+        self._device.execute_continuous_fifo_acquisition()
+        self._device.get_waveforms()
+        timestamps = self._device.get_batch_timestamps_in_ns()
+        self._device.stop()
+        assert timestamps is not None
+        self.assertEqual(int64, timestamps.dtype)
+        self.assertEqual(ACQUISITION_TEST_BATCH_SIZE, len(timestamps))
+        self.assertTrue((diff(timestamps) >= 0).all())
+        self.assertIsNone(self._device.get_timestamp())
+
+    def test_gated_fifo_mode_with_notified_timestamps(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_GATE)
+        self._device.enable_timestamping(2 * DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS, TimestampReadoutMode.NOTIFY)
+        self._device.execute_continuous_fifo_acquisition()
+        waveforms = self._device.get_waveforms()
+        self._device.stop()
+        self.assertEqual(ACQUISITION_TEST_BATCH_SIZE, len(waveforms))
+        self.assertFalse(self._device.timestamps_lost)
+
+    def test_timestamp_buffer_size_must_be_whole_pages(self) -> None:
+        with self.assertRaises(ValueError):
+            self._device.enable_timestamping(DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS + 1)
+
+    def test_gated_fifo_mode_waveform_array_not_available(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_GATE)
+        self._device.execute_continuous_fifo_acquisition()
+        with self.assertRaises(SpectrumWrongAcquisitionMode):
+            self._device.get_waveform_array()
+        self._device.stop()
+
+    def test_get_waveforms_async(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+
+        async def _acquire() -> List[List[NDArray[floating]]]:
+            await self._device.execute_continuous_fifo_acquisition_async()
+            waveforms = await self._device.get_waveforms_async()
+            await self._device.stop_async()
+            return waveforms
+
+        waveforms = asyncio.run(_acquire())
+        self.assertEqual(ACQUISITION_TEST_BATCH_SIZE, len(waveforms))
+        self.assertEqual([(ACQUISITION_LENGTH,)] * 2, [wfm.shape for wfm in waveforms[0]])
+
+    def test_stream(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+
+        async def _stream() -> List[NDArray[floating]]:
+            return [frame async for frame in self._device.stream(max_frames=2)]
+
+        frames = asyncio.run(_stream())
+        self.assertEqual([(ACQUISITION_TEST_BATCH_SIZE, 2, ACQUISITION_LENGTH)] * 2, [f.shape for f in frames])
+
+    def test_iter_measurements(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        measurements = list(self._device.iter_measurements(max_frames=3))
+        self.assertEqual(3, len(measurements))
+        self.assertEqual([(ACQUISITION_LENGTH,)] * 2, [wfm.shape for wfm in measurements[2].waveforms])
+
+    def test_iter_measurements_raw_timestamps(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        self._device.enable_timestamping()
+        measurements = list(self._device.iter_measurements(max_frames=2, raw_timestamps=True))
+        self.assertEqual([None, None], [m.timestamp for m in measurements])
+        reference = self._device.timestamp_reference
+        assert reference is not None
+        self.assertEqual([reference] * 2, [m.timestamp_reference for m in measurements])
+        timestamps_in_samples = [m.timestamp_in_samples for m in measurements]
+        self.assertTrue(all(isinstance(t, int) for t in timestamps_in_samples))
+        timestamps_in_ns = reference.samples_to_ns(cast(List[int], timestamps_in_samples))
+        self.assertTrue((timestamps_in_ns >= reference.ref_time_in_ns).all())
+
+    def test_timestamp_reference_refreshed_on_start_after_sample_rate_change(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        self._device.enable_timestamping()
+        reference = self._device.timestamp_reference
+        assert reference is not None
+        new_rate = 1000000 if reference.sample_rate_in_hz != 1000000 else 2000000
+        self._device.set_sample_rate_in_hz(new_rate)
+        self.assertIs(reference, self._device.timestamp_reference)
+        self._device.start()
+        self._device.stop()
+        refreshed_reference = self._device.timestamp_reference
+        assert refreshed_reference is not None
+        self.assertEqual(new_rate, refreshed_reference.sample_rate_in_hz)
+        self._device.start()
+        self._device.stop()
+        self.assertIs(refreshed_reference, self._device.timestamp_reference)
+
+    def test_iter_measurements_duration(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        measurements = list(self._device.iter_measurements(duration_in_s=0.0))
+        self.assertEqual(0, len(measurements))
+
+    def test_closing_iter_measurements_stops_card(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        measurements = self._device.iter_measurements()
+        next(measurements)
+        measurements.close()
+        with self.assertRaises(SpectrumAcquisitionStopped):
+            for _ in range(3):  # the buffer holds at most two batches, so the third must wait for the stopped card
+                self._device.get_waveforms()
+
+    def test_transfer_buffer_size_in_batches(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_FIFO_MULTI)
+        self._device.set_transfer_buffer_size_in_batches(3)
+        self._device.define_transfer_buffer()
+        self.assertEqual(3 * self._num_samples_per_batch, len(self._device.transfer_buffers[0].data_array))
+        with self.assertRaises(ValueError):
+            self._device.set_transfer_buffer_size_in_batches(0)
+
+    def test_waveforms_wrapping_around_end_of_buffer(self) -> None:
+        self._start_fifo_acquisition(buffer_size_in_batches=2.5)
+        buffer_length_in_bytes = self._device.transfer_buffers[0].data_array_length_in_bytes
+        num_bytes_per_batch = self._num_samples_per_batch * self._device.bytes_per_sample
+        for n in range(1, 4):  # the third batch wraps around the end of the buffer
+            raw_waveform_array = self._device.get_raw_waveform_array()
+            self.assertEqual((ACQUISITION_TEST_BATCH_SIZE, 2, ACQUISITION_LENGTH), raw_waveform_array.shape)
+            self.assertEqual((n * num_bytes_per_batch) % buffer_length_in_bytes, self._user_position_in_bytes())
+
+    def test_zero_copy_frame(self) -> None:
+        self._start_fifo_acquisition()
+        with self._device.get_zero_copy_frame() as frame:
+            self.assertEqual((ACQUISITION_TEST_BATCH_SIZE, 2, ACQUISITION_LENGTH), frame.samples.shape)
+            self.assertFalse(frame.samples.flags.writeable)
+            self.assertTrue(shares_memory(frame.samples, self._device.transfer_buffers[0].data_array))
+        self.assertTrue(frame.released)
+        with self.assertRaises(SpectrumFrameAlreadyReleased):
+            _ = frame.samples
+
+    def test_zero_copy_frame_wrapping_around_end_of_buffer_is_copied(self) -> None:
+        self._start_fifo_acquisition(buffer_size_in_batches=2.5)
+        self._device.get_zero_copy_frame().release()
+        self._device.get_zero_copy_frame().release()
+        with self._device.get_zero_copy_frame() as frame:
+            data_array = self._device.transfer_buffers[0].data_array
+            self.assertFalse(shares_memory(frame.samples, data_array))
+            num_samples_before_end = len(data_array) - 2 * self._num_samples_per_batch
+            expected_raw_samples = concatenate(
+                (
+                    data_array[-num_samples_before_end:],
+                    data_array[: self._num_samples_per_batch - num_samples_before_end],
+                )
+            )
+            assert_array_equal(
+                expected_raw_samples.reshape((ACQUISITION_TEST_BATCH_SIZE, ACQUISITION_LENGTH, 2)).transpose((0, 2, 1)),
+                frame.samples,
+            )
+
+    def test_out_of_order_release(self) -> None:
+        self._start_fifo_acquisition(buffer_size_in_batches=4)
+        first_frame = self._device.get_zero_copy_frame()
+        second_frame = self._device.get_zero_copy_frame()
+        position_before_release = self._user_position_in_bytes()
+        second_frame.release()
+        self.assertEqual(position_before_release, self._user_position_in_bytes())
+        first_frame.release()
+        num_bytes_per_batch = self._num_samples_per_batch * self._device.bytes_per_sample
+        self.assertEqual(
+            (position_before_release + 2 * num_bytes_per_batch)
+            % self._device.transfer_buffers[0].data_array_length_in_bytes,
+            self._user_position_in_bytes(),
+        )
+
+    def test_hold_zero_copy_frame_while_getting_waveforms(self) -> None:
+        self._start_fifo_acquisition(buffer_size_in_batches=4)
+        frame = self._device.get_zero_copy_frame()
+        position_before_get_waveforms = self._user_position_in_bytes()
+        waveforms = self._device.get_waveforms()
+        self.assertEqual(ACQUISITION_TEST_BATCH_SIZE, len(waveforms))
+        self.assertEqual([(ACQUISITION_LENGTH,)] * 2, [wfm.shape for wfm in waveforms[0]])
+        # Bytes read by get_waveforms() cannot be handed back to the card until the older frame is released
+        self.assertFalse(frame.released)
+        self.assertEqual(position_before_get_waveforms, self._user_position_in_bytes())
+        frame.release()
+        self.assertNotEqual(position_before_get_waveforms, self._user_position_in_bytes())
+
+    def test_zero_copy_frame_buffer_too_small(self) -> None:
+        self._start_fifo_acquisition(buffer_size_in_batches=1)
+        with self.assertRaises(ValueError):
+            self._device.get_zero_copy_frame()
+
+    def test_zero_copy_frame_buffer_full(self) -> None:
+        self._start_fifo_acquisition()
+        first_frame = self._device.get_zero_copy_frame()
+        second_frame = self._device.get_zero_copy_frame()
+        with self.assertRaises(SpectrumTransferBufferFull):
+            self._device.get_zero_copy_frame()
+        first_frame.release()
+        second_frame.release()
+
+    def test_zero_copy_frame_after_stop(self) -> None:
+        self._start_fifo_acquisition()
+        self._device.stop()
+        with self.assertRaises(SpectrumAcquisitionStopped):
+            for _ in range(3):  # the buffer holds at most two batches, so the third must wait for the stopped card
+                self._device.get_zero_copy_frame().release()
+
+    def test_zero_copy_frame_timeout(self) -> None:
+        self._device.disconnect()
+        self._device = MockSpectrumDigitiserCard(
+            device_number=0,
+            model=ModelNumber.TYP_M2P5966_X4,
+            mock_source_frame_rate_hz=0.01,  # no frame arrives within the timeout
+            num_modules=NUM_MODULES_PER_DIGITISER,
+            num_channels_per_module=NUM_CHANNELS_PER_DIGITISER_MODULE,
+        )
+        self._start_fifo_acquisition()
+        with self.assertRaises(SpectrumTransferTimeout):
+            self._device.get_zero_copy_frame()
+
+    def test_zero_copy_frame_invalidated_by_restart(self) -> None:
+        self._start_fifo_acquisition()
+        frame = self._device.get_zero_copy_frame()
+        self._device.stop()
+        self._device.execute_continuous_fifo_acquisition()
+        self.assertTrue(frame.released)
+        with self.assertRaises(SpectrumFrameAlreadyReleased):
+            _ = frame.samples
+
+    def test_zero_copy_frame_standard_single_mode(self) -> None:
+        self._configure(AcquisitionMode.SPC_REC_STD_SINGLE, batch_size=1)
+        self._device.start()
+        self._device.wait_for_acquisition_to_complete()
+        self._device.define_transfer_buffer()
+        self._device.start_transfer()
+        self._device.wait_for_transfer_chunk_to_complete()
+        with self._device.get_zero_copy_frame() as frame:
+            self.assertEqual((1, 2, ACQUISITION_LENGTH), frame.samples.shape)
+            self.assertTrue(shares_memory(frame.samples, self._device.transfer_buffers[0].data_array))
+        self.assertTrue(frame.released)
+
+
+class MockTimestamperTest(TestCase):
+    def setUp(self) -> None:
+        self._device = MockSpectrumDigitiserCard(
+            device_number=0,
+            model=ModelNumber.TYP_M2P5966_X4,
+            mock_source_frame_rate_hz=MOCK_DEVICE_TEST_FRAME_RATE_HZ,
+            num_modules=NUM_MODULES_PER_DIGITISER,
+            num_channels_per_module=NUM_CHANNELS_PER_DIGITISER_MODULE,
+        )
+        self._device.enable_timestamping()  # so that the mock device updates the timestamp buffer position registers
+        self._timestamper = MockTimestamper(self._device, DEVICE_HANDLE_TYPE(c_void_p()))
+        buffer_length_in_bytes = self._timestamper.transfer_buffer.data_array_length_in_bytes
+        # each timestamp is followed by 8 unused bytes
+        self._timestamper.transfer_buffer.data_array.view(uint64)[::2] = arange(
+            DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS
+        )
+        self._device.write_to_spectrum_device_register(SPC_TS_AVAIL_USER_POS, buffer_length_in_bytes - 32)
+        self._device.write_to_spectrum_device_register(SPC_TS_AVAIL_USER_LEN, 64)
+
+    def tearDown(self) -> None:
+        self._device.disconnect()
+
+    def test_timestamps_read_across_end_of_buffer(self) -> None:
+        last = DEFAULT_TIMESTAMP_BUFFER_SIZE_IN_TIMESTAMPS - 1
+        assert_array_equal([last - 1, last, 0, 1], self._timestamper.get_timestamps_in_samples(4))
+        self.assertEqual(0, self._device.read_spectrum_device_register(SPC_TS_AVAIL_USER_LEN))
+        self.assertFalse(self._timestamper.timestamps_lost)
+
+    def test_reference_converts_samples_to_ns_exactly(self) -> None:
+        reference = TimestampReference(ref_time_in_ns=1000, sample_rate_in_hz=3)
+        assert_array_equal(
+            [1000, 1000 + 333_333_333, 1000 + 1_000_000_000, 1000 + 2_333_333_333],
+            reference.samples_to_ns(array([0, 1, 3, 7], dtype=uint64)),
+        )
+
+    def test_timestamp_buffer_overrun_detected(self) -> None:
+        buffer_length_in_bytes = self._timestamper.transfer_buffer.data_array_length_in_bytes
+        self._device.write_to_spectrum_device_register(SPC_TS_AVAIL_USER_LEN, buffer_length_in_bytes)
+        self._device.write_to_spectrum_device_register(SPC_M2STATUS, M2STAT_EXTRA_OVERRUN)
+        with self.assertLogs(level="WARNING"):
+            self._timestamper.get_timestamps_in_samples(4)
+        self.assertTrue(self._timestamper.timestamps_lost)
+
+
+class _WriteRecordingMockDigitiserCard(MockSpectrumDigitiserCard):
+    """Records the register writes that reach the mock device."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.written_registers: List[Tuple[int, int]] = []
+        super().__init__(**kwargs)
+
+    def _write_register_to_device(
+        self, spectrum_register: int, value: int, length: SpectrumRegisterLength = SpectrumRegisterLength.THIRTY_TWO
+    ) -> None:
+        self.written_registers.append((spectrum_register, value))
+        super()._write_register_to_device(spectrum_register, value, length)
+
+
+class RegisterBatchTest(TestCase):
+    def setUp(self) -> None:
+        self._device = _WriteRecordingMockDigitiserCard(
+            device_number=0,
+            model=ModelNumber.TYP_M2P5966_X4,
+            mock_source_frame_rate_hz=MOCK_DEVICE_TEST_FRAME_RATE_HZ,
+            num_modules=NUM_MODULES_PER_DIGITISER,
+            num_channels_per_module=NUM_CHANNELS_PER_DIGITISER_MODULE,
+        )
+        self._device.set_timeout_in_ms(1000)
+
+    def tearDown(self) -> None:
+        self._device.disconnect()
+
+    def test_writes_are_sent_when_batch_exits(self) -> None:
+        with self._device.register_batch():
+            self._device.set_timeout_in_ms(2000)
+            self._device.set_timeout_in_ms(3000)
+            self.assertEqual(3000, self._device.timeout_in_ms)
+            self.assertEqual(1000, self._device._param_dict[SPC_TIMEOUT])
+        self.assertEqual(3000, self._device._param_dict[SPC_TIMEOUT])
+
+    def test_bitmask_read_modify_write_in_memory(self) -> None:
+        with self._device.register_batch():
+            self._device.set_trigger_sources([TriggerSource.SPC_TMASK_EXT0])
+            self.assertEqual([TriggerSource.SPC_TMASK_EXT0], self._device.trigger_sources)
+            self._device.set_external_trigger_mode(ExternalTriggerMode.SPC_TM_POS)
+            self.assertEqual(ExternalTriggerMode.SPC_TM_POS, self._device.external_trigger_mode)
+        self.assertEqual([TriggerSource.SPC_TMASK_EXT0], self._device.trigger_sources)
+        self.assertEqual(ExternalTriggerMode.SPC_TM_POS, self._device.external_trigger_mode)
+
+    def test_nested_batches_are_sent_by_outermost(self) -> None:
+        with self._device.register_batch():
+            with self._device.register_batch():
+                self._device.set_timeout_in_ms(2000)
+            self.assertEqual(1000, self._device._param_dict[SPC_TIMEOUT])
+        self.assertEqual(2000, self._device._param_dict[SPC_TIMEOUT])
+
+    def test_exception_discards_queued_writes(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self._device.register_batch():
+                self._device.set_timeout_in_ms(2000)
+                raise RuntimeError()
+        self.assertEqual(1000, self._device.timeout_in_ms)
+
+    def test_command_sends_queued_writes_first(self) -> None:
+        with self._device.register_batch():
+            self._device.set_timeout_in_ms(2000)
+            self._device.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_FORCETRIGGER)
+            self.assertEqual(2000, self._device._param_dict[SPC_TIMEOUT])
+            self.assertEqual(M2CMD_CARD_FORCETRIGGER, self._device._param_dict[SPC_M2CMD])
+            self._device.write_to_spectrum_device_register(SPC_M2CMD, M2CMD_CARD_WRITESETUP)
+            self.assertEqual(M2CMD_CARD_FORCETRIGGER, self._device._param_dict[SPC_M2CMD])
+        self.assertEqual(M2CMD_CARD_WRITESETUP, self._device._param_dict[SPC_M2CMD])
+
+    def test_commands_are_not_merged(self) -> None:
+        self._device.enable_timestamping()
+        unbatched_commands = self._written_commands()
+        self._device.written_registers.clear()
+        with self._device.register_batch():
+            self._device.enable_timestamping()
+        self.assertEqual(unbatched_commands, self._written_commands())
+        self.assertEqual(
+            [
+                (SPC_TIMESTAMP_CMD, TimestampMode.STANDARD.value),
+                (SPC_M2CMD, M2CMD_CARD_WRITESETUP),
+                (SPC_TIMESTAMP_CMD, SPC_TS_RESET),
+                (SPC_M2CMD, M2CMD_EXTRA_POLL),
+            ],
+            unbatched_commands,
+        )
+
+    def _written_commands(self) -> List[Tuple[int, int]]:
+        return [write for write in self._device.written_registers if write[0] in (SPC_M2CMD, SPC_TIMESTAMP_CMD)]
+
+    def test_batch_keeps_last_write_to_each_register(self) -> None:
+        batch = RegisterWriteBatch()
+        batch.queue(SPC_TIMEOUT, 1, SpectrumRegisterLength.THIRTY_TWO)
+        batch.queue(SPC_MEMSIZE, 2, SpectrumRegisterLength.SIXTY_FOUR)
+        batch.queue(SPC_TIMEOUT, 3, SpectrumRegisterLength.THIRTY_TWO)
+        self.assertEqual(3, batch.queued_value(SPC_TIMEOUT))
+        self.assertIsNone(batch.queued_value(SPC_CHENABLE))
+        self.assertEqual(
+            [(SPC_MEMSIZE, 2, SpectrumRegisterLength.SIXTY_FOUR), (SPC_TIMEOUT, 3, SpectrumRegisterLength.THIRTY_TWO)],
+            batch.take_writes(),
+        )
+        self.assertEqual(0, len(batch))
+
+
 class AWGCardTest(SingleCardTest[SpectrumAWGInterface]):
     __test__ = True
 
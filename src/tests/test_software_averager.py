@@ -0,0 +1,98 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from numpy import int32, int64, int16
+from numpy.random import default_rng
+from numpy.testing import assert_array_almost_equal
+
+from spectrumdevice import MockSpectrumDigitiserCard, Recorder, SoftwareAverager
+from spectrumdevice.exceptions import SpectrumWrongAcquisitionMode
+from spectrumdevice.settings import (
+    AcquisitionMode,
+    AcquisitionSettings,
+    InputImpedance,
+    ModelNumber,
+    SoftwareAveragingMode,
+)
+from tests.configuration import (
+    ACQUISITION_LENGTH,
+    MOCK_DEVICE_TEST_FRAME_RATE_HZ,
+    NUM_CHANNELS_PER_DIGITISER_MODULE,
+    NUM_MODULES_PER_DIGITISER,
+)
+from tests.device_factories import create_digitiser_card_for_testing
+
+NUM_RECORDED_FRAMES = 4
+
+
+class SoftwareAveragerTest(TestCase):
+    def setUp(self) -> None:
+        settings = AcquisitionSettings(
+            acquisition_mode=AcquisitionMode.SPC_REC_FIFO_MULTI,
+            sample_rate_in_hz=int(4e6),
+            acquisition_length_in_samples=ACQUISITION_LENGTH,
+            pre_trigger_length_in_samples=0,
+            timeout_in_ms=1000,
+            enabled_channels=[0, 1],
+            vertical_ranges_in_mv=[200, 1000],
+            vertical_offsets_in_percent=[0, 10],
+            input_impedances=[InputImpedance.ONE_MEGA_OHM, InputImpedance.FIFTY_OHM],
+            timestamping_enabled=False,
+            batch_size=2,
+        )
+        # Replay known frames, so that the averages can be checked
+        self._frames = default_rng(0).integers(
+            -128, 128, size=(NUM_RECORDED_FRAMES, 2, ACQUISITION_LENGTH), dtype=int16
+        )
+        self._temp_dir = TemporaryDirectory()
+        file_path = Path(self._temp_dir.name) / "recording.spcm"
+        recording_card = create_digitiser_card_for_testing()
+        recording_card.configure_acquisition(settings)
+        with Recorder(file_path, recording_card, settings) as recorder:
+            recorder.write(self._frames)
+        recording_card.disconnect()
+
+        self._card = MockSpectrumDigitiserCard(
+            device_number=0,
+            model=ModelNumber.TYP_M2P5966_X4,
+            mock_source_frame_rate_hz=MOCK_DEVICE_TEST_FRAME_RATE_HZ,
+            num_modules=NUM_MODULES_PER_DIGITISER,
+            num_channels_per_module=NUM_CHANNELS_PER_DIGITISER_MODULE,
+            mock_source_recording=file_path,
+            mock_source_replay_at_recorded_rate=False,
+        )
+        self._card.configure_acquisition(settings)
+        self._card.execute_continuous_fifo_acquisition()
+
+    def tearDown(self) -> None:
+        self._card.stop()
+        self._card.disconnect()
+        self._temp_dir.cleanup()
+
+    def test_block_average(self) -> None:
+        # 3 averages from batches of 2 acquisitions, so acquisitions are left over between averages
+        averager = SoftwareAverager(self._card, num_averages=3)
+        coefficients = self._card.voltage_conversion_coefficients
+        assert_array_almost_equal(coefficients.convert(self._frames[[0, 1, 2]]).mean(axis=0), averager.get_average())
+        assert_array_almost_equal(coefficients.convert(self._frames[[3, 0, 1]]).mean(axis=0), averager.get_average())
+
+    def test_exponential_average(self) -> None:
+        averager = SoftwareAverager(self._card, num_averages=2, mode=SoftwareAveragingMode.EXPONENTIAL)
+        coefficients = self._card.voltage_conversion_coefficients
+        expected_running_average = coefficients.convert(self._frames[[0, 1]]).mean(axis=0)
+        assert_array_almost_equal(expected_running_average, averager.get_average())
+
+    def test_accumulator_dtype(self) -> None:
+        self.assertEqual(int32, SoftwareAverager(self._card, num_averages=2**16).accumulator_dtype)
+        self.assertEqual(int64, SoftwareAverager(self._card, num_averages=2**16 + 1).accumulator_dtype)
+
+    def test_invalid_num_averages(self) -> None:
+        with self.assertRaises(ValueError):
+            SoftwareAverager(self._card, num_averages=0)
+
+    def test_wrong_acquisition_mode(self) -> None:
+        self._card.stop()
+        self._card.set_acquisition_mode(AcquisitionMode.SPC_REC_STD_SINGLE)
+        with self.assertRaises(SpectrumWrongAcquisitionMode):
+            SoftwareAverager(self._card, num_averages=2)
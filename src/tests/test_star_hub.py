@@ -1,8 +1,15 @@
+import asyncio
+import threading
+from typing import List
+from unittest import TestCase
+
 import pytest
-from numpy import array
+from numpy import array, float32, float64, floating, int16, zeros
+from numpy.typing import DTypeLike, NDArray
 
-from spectrum_gmbh.py_header.regs import SPC_CHENABLE
+from spectrum_gmbh.py_header.regs import SPC_CHENABLE, SPC_TIMEOUT
 from spectrumdevice import SpectrumDigitiserAnalogChannel, SpectrumDigitiserStarHub
+from spectrumdevice.devices.abstract_device.card_worker_pool import CardWorkerPool
 from spectrumdevice.exceptions import SpectrumInvalidNumberOfEnabledChannels
 from spectrumdevice.settings import AcquisitionSettings, InputImpedance, AcquisitionMode
 from spectrumdevice.settings.channel import SpectrumAnalogChannelName
@@ -128,6 +135,16 @@ class StarHubTest(DigitiserCardTest):
         self._device.define_transfer_buffer(buffer)
         self.assertTrue((array(self._device.transfer_buffers) == buffer).all())
 
+    def test_register_batch_queues_writes_to_child_cards(self) -> None:
+        self._device.set_timeout_in_ms(1000)
+        with self._device.register_batch():
+            self._device.set_timeout_in_ms(2000)
+            self.assertEqual(2000, self._device.timeout_in_ms)
+            for card in self._device._child_cards:
+                self.assertEqual(1000, card._read_register_from_device(SPC_TIMEOUT))
+        for card in self._device._child_cards:
+            self.assertEqual(2000, card._read_register_from_device(SPC_TIMEOUT))
+
     def test_features(self) -> None:
         try:
             feature_list = self._device.feature_list
@@ -135,3 +152,142 @@ class StarHubTest(DigitiserCardTest):
             self.assertTrue(False, f"raised an exception {e}")
             feature_list = []
         self.assertEqual(len(feature_list), NUM_CARDS_IN_STAR_HUB)
+
+
+@pytest.mark.star_hub
+class StarHubAcquisitionTest(TestCase):
+    def setUp(self) -> None:
+        self._device = create_spectrum_star_hub_for_testing()
+        num_channels_per_card = NUM_CHANNELS_PER_DIGITISER_MODULE * NUM_MODULES_PER_DIGITISER
+        self._enabled_channels = [0, 1, num_channels_per_card, num_channels_per_card + 1]
+
+    def tearDown(self) -> None:
+        self._device.stop()
+        self._device.disconnect()
+
+    def _configure_fifo_acquisition(self, output_dtype: DTypeLike = float64) -> None:
+        self._device.configure_acquisition(
+            AcquisitionSettings(
+                acquisition_mode=AcquisitionMode.SPC_REC_FIFO_MULTI,
+                sample_rate_in_hz=int(4e6),
+                acquisition_length_in_samples=ACQUISITION_LENGTH,
+                pre_trigger_length_in_samples=0,
+                timeout_in_ms=1000,
+                enabled_channels=self._enabled_channels,
+                vertical_ranges_in_mv=[200] * len(self._enabled_channels),
+                vertical_offsets_in_percent=[0] * len(self._enabled_channels),
+                input_impedances=[InputImpedance.ONE_MEGA_OHM] * len(self._enabled_channels),
+                timestamping_enabled=False,
+                batch_size=2,
+                output_dtype=output_dtype,
+            )
+        )
+
+    def _start_fifo_acquisition(self, output_dtype: DTypeLike = float64) -> None:
+        self._configure_fifo_acquisition(output_dtype)
+        self._device.execute_continuous_fifo_acquisition()
+
+    def test_waveform_array(self) -> None:
+        self._start_fifo_acquisition()
+        waveform_array = self._device.get_waveform_array()
+        self.assertEqual((2, len(self._enabled_channels), ACQUISITION_LENGTH), waveform_array.shape)
+        self.assertTrue(waveform_array.flags.c_contiguous)
+
+    def test_raw_waveform_array(self) -> None:
+        self._start_fifo_acquisition()
+        raw_waveform_array = self._device.get_raw_waveform_array()
+        self.assertEqual(int16, raw_waveform_array.dtype)
+        self.assertEqual((2, len(self._enabled_channels), ACQUISITION_LENGTH), raw_waveform_array.shape)
+        self.assertEqual(tuple(self._enabled_channels), self._device.voltage_conversion_coefficients.channel_nums)
+
+    def test_cards_write_into_one_hub_array(self) -> None:
+        self._configure_fifo_acquisition()
+        self._device.execute_continuous_fifo_acquisition()
+        out = zeros((2, len(self._enabled_channels), ACQUISITION_LENGTH))
+        self.assertIs(out, self._device.get_waveform_array(out=out))
+        # every card has written its slice of the channel axis
+        self.assertTrue((out != 0).any(axis=(0, 2)).all())
+        with self.assertRaises(ValueError):
+            self._device.get_waveform_array(out=zeros((2, 1, ACQUISITION_LENGTH)))
+
+    def test_float32_output_dtype(self) -> None:
+        self._start_fifo_acquisition(output_dtype=float32)
+        self.assertEqual(float32, self._device.output_dtype)
+        self.assertEqual(float32, self._device.get_waveform_array().dtype)
+
+    def test_repeated_reads_reuse_reader_threads(self) -> None:
+        self._start_fifo_acquisition()
+        self._device.get_waveform_array()
+        reader_threads = set(threading.enumerate())
+        for _ in range(3):
+            self._device.get_waveform_array()
+            self._device.get_raw_waveform_array()
+        self.assertEqual(reader_threads, set(threading.enumerate()))
+
+    def test_disconnect_stops_card_worker_threads(self) -> None:
+        self._start_fifo_acquisition()
+        self._device.get_waveform_array()
+        assert self._device._card_pool is not None
+        worker_threads = self._device._card_pool._threads
+        self.assertEqual(NUM_CARDS_IN_STAR_HUB, len(worker_threads))
+        self._device.stop()
+        self._device.disconnect()
+        self.assertFalse(any(thread.is_alive() for thread in worker_threads))
+
+    def test_stream(self) -> None:
+        self._configure_fifo_acquisition()
+
+        async def _stream() -> List[NDArray[floating]]:
+            return [frame async for frame in self._device.stream(max_frames=2)]
+
+        frames = asyncio.run(_stream())
+        self.assertEqual([(2, len(self._enabled_channels), ACQUISITION_LENGTH)] * 2, [f.shape for f in frames])
+
+
+class CardWorkerPoolTest(TestCase):
+    def setUp(self) -> None:
+        self._pool: CardWorkerPool[int] = CardWorkerPool([1, 2, 3])
+
+    def tearDown(self) -> None:
+        self._pool.close()
+
+    def test_results_in_card_order(self) -> None:
+        self.assertEqual([2, 4, 6], list(self._pool.run(lambda card: 2 * card)))
+        self.assertEqual([-1, -2, -3], list(self._pool.run(lambda card: -card)))
+
+    def test_error_is_raised_after_all_cards(self) -> None:
+        called = []
+
+        def _fail_on_second_card(card: int) -> int:
+            called.append(card)
+            if card == 2:
+                raise ValueError("card 2 failed")
+            return card
+
+        with self.assertRaisesRegex(ValueError, "card 2 failed"):
+            self._pool.run(_fail_on_second_card)
+        self.assertEqual([1, 2, 3], sorted(called))
+        self.assertEqual([1, 2, 3], list(self._pool.run(lambda card: card)))
+
+    def test_cards_run_concurrently(self) -> None:
+        # the barrier is only passed if all three cards wait at it at the same time
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _wait_for_other_cards(card: int) -> int:
+            barrier.wait()
+            return card
+
+        self.assertEqual([1, 2, 3], list(self._pool.run(_wait_for_other_cards)))
+
+    def test_nested_run_does_not_deadlock(self) -> None:
+        results = self._pool.run(lambda card: [card * other for other in self._pool.run(lambda other_card: other_card)])
+        self.assertEqual([[1, 2, 3], [2, 4, 6], [3, 6, 9]], list(results))
+
+    def test_per_card_arguments(self) -> None:
+        self.assertEqual([11, 22, 33], list(self._pool.run(lambda card, arg: card + arg, [10, 20, 30])))
+
+    def test_run_after_close_raises(self) -> None:
+        self._pool.close()
+        self.assertTrue(self._pool.closed)
+        with self.assertRaises(RuntimeError):
+            self._pool.run(lambda card: card)